@@ -0,0 +1,198 @@
+'''
+Docstring for benchmarks.bench_analytics
+
+Named analytics queries (src.features.analytics) on DuckDB vs the same SQL on SQLite vs hand-written pandas.
+Usage (from repo root):
+	python -m benchmarks.bench_analytics --teams 5000 --cbsas 1000
+
+Synthetic inputs: cities + minor_league_teams + team_history (seasons --start..--end with relocations, expansions and folds)
+in SQLite, and a long ACS5-style panel in Parquet (also copied into SQLite for the SQLite runs). The panel has gaps (a
+missing year, missing CBSA-years) so by-row and by-year lags give different answers. Results of the three engines are
+compared column by column.
+'''
+
+# Imports
+import argparse, os, random, sqlite3, statistics, sys, tempfile, time
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if REPO_ROOT not in sys.path:
+	sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.bench_parse import synth_city_rows
+from benchmarks.synth import LEAGUES, MASCOTS
+
+# Constants
+PANEL_GAP_YEARS = {2015} # A whole ACS year missing from the panel, as when its fetch fails
+
+# Functions
+def build_inputs(workdir, n_teams, n_cbsas, start, end, seed=0):
+	'''Write the synthetic database and panel; returns (db_path, fin_path).'''
+	import pandas as pd
+	from src.clean.clean_cities import upsert_cities_more_robust
+	from src.database.schema import ensure_team_history
+	rng = random.Random(seed)
+	db_path = os.path.join(workdir, "milb.sqlite")
+	fin_path = os.path.join(workdir, "fin")
+	os.makedirs(fin_path, exist_ok=True)
+
+	cities = synth_city_rows(max(1, n_teams // 2), seed=seed)
+	upsert_cities_more_robust(pd.DataFrame(cities), db_path=db_path)
+	leagues = [league for league, _ in LEAGUES]
+	history, current = [], []
+	for i in range(n_teams):
+		first = rng.randint(start, end)
+		last = min(end, first + rng.randint(0, 40))
+		team, league, city = f"{rng.choice(MASCOTS)} {i}", rng.choice(leagues), rng.choice(cities)
+		for season in range(first, last + 1):
+			if rng.random() < 0.02: # Relocation or league switch
+				city, league = rng.choice(cities), rng.choice(leagues)
+			history.append((season, team, league, city["city"], city["state"]))
+		if last == end:
+			current.append((team, league, city["city"], city["state"]))
+
+	conn = sqlite3.connect(db_path)
+	conn.execute("CREATE TABLE IF NOT EXISTS minor_league_teams (id INTEGER PRIMARY KEY, Team TEXT, Division TEXT, City TEXT, State TEXT, Stadium TEXT, Capacity INTEGER, Affiliate TEXT, League TEXT);")
+	conn.executemany("INSERT INTO minor_league_teams (Team, League, City, State) VALUES (?, ?, ?, ?);", current)
+	ensure_team_history(conn)
+	conn.executemany("INSERT OR IGNORE INTO team_history (season, Team, League, City, State) VALUES (?, ?, ?, ?, ?);", history)
+
+	variables = ["B01003_001E", "B19013_001E", "B23025_004E"]
+	panel = pd.DataFrame([
+		(f"{10000 + c}", year, var, float(rng.randint(10000, 5000000)))
+		for c in range(n_cbsas) for year in range(2009, 2024) for var in variables
+		if year not in PANEL_GAP_YEARS and rng.random() > 0.05 # Like census_panel: failed years, CBSAs missing some years
+	], columns=["cbsa_code", "year", "variable", "value"])
+	panel.to_parquet(os.path.join(fin_path, "acs5_cbsa_panel.parquet"), index=False)
+	panel.to_sql("acs5_cbsa_panel", conn, index=False)
+	conn.commit()
+	conn.close()
+	return db_path, fin_path
+
+def pandas_team_city_features(db_path, fin_path):
+	import pandas as pd
+	conn = sqlite3.connect(db_path)
+	teams = pd.read_sql_query("SELECT * FROM minor_league_teams;", conn)
+	cities = pd.read_sql_query("SELECT * FROM cities;", conn)
+	conn.close()
+	df = teams.merge(cities.rename(columns={"id": "city_id", "city": "City", "state": "State"}), on=["City", "State"], how="left")
+	df["teams_in_city"] = df.groupby(["City", "State"])["Team"].transform("size")
+	df["league_size"] = df.groupby("League")["Team"].transform("size")
+	return df.sort_values(["League", "Team"])
+
+def pandas_population_deltas(db_path, fin_path, variable="B01003_001E"):
+	import pandas as pd
+	panel = pd.read_parquet(os.path.join(fin_path, "acs5_cbsa_panel.parquet"))
+	df = panel[panel["variable"] == variable].sort_values(["cbsa_code", "year"]).rename(columns={"value": "population"})
+	by_year = df.set_index(["cbsa_code", "year"])["population"]
+	def lag(years): # By year, not by row: the panel has gaps
+		return pd.Series(by_year.reindex(pd.MultiIndex.from_arrays([df["cbsa_code"], df["year"] - years])).to_numpy(), index=df.index)
+	lag1, lag5 = lag(1), lag(5)
+	df["delta_1y"], df["pct_1y"] = df["population"] - lag1, df["population"] / lag1.replace(0, float("nan")) - 1
+	df["delta_5y"], df["pct_5y"] = df["population"] - lag5, df["population"] / lag5.replace(0, float("nan")) - 1
+	return df.drop(columns="variable")
+
+def pandas_league_churn(db_path, fin_path):
+	import pandas as pd
+	conn = sqlite3.connect(db_path)
+	rosters = pd.read_sql_query("SELECT DISTINCT League, season, Team, City FROM team_history;", conn)
+	conn.close()
+	seasons = rosters[["League", "season"]].drop_duplicates().sort_values(["League", "season"])
+	seasons["prev_league_season"] = seasons.groupby("League")["season"].shift(1)
+	seasons["next_league_season"] = seasons.groupby("League")["season"].shift(-1)
+	stints = rosters.sort_values(["League", "Team", "City", "season"])
+	g = stints.groupby(["League", "Team", "City"])["season"]
+	stints = stints.assign(prev_season=g.shift(1), next_season=g.shift(-1)).merge(seasons, on=["League", "season"])
+	def distinct(a, b):
+		return ~((a == b) | (a.isna() & b.isna()))
+	stints["arrivals"] = distinct(stints["prev_season"], stints["prev_league_season"])
+	stints["leaving"] = distinct(stints["next_season"], stints["next_league_season"])
+	per = stints.groupby(["League", "season"], as_index=False).agg(teams=("Team", "size"), arrivals=("arrivals", "sum"),
+		leaving=("leaving", "sum"), prev_league_season=("prev_league_season", "first"))
+	per["joined"] = per["arrivals"].where(per["prev_league_season"].notna())
+	g = per.groupby("League")
+	per["departed"] = g["leaving"].shift(1)
+	per["churn_rate"] = (per["joined"] + per["departed"]) / g["teams"].shift(1)
+	return per[["League", "season", "teams", "joined", "departed", "churn_rate"]]
+
+QUERY_KEYS = {"team_city_features": ["League", "Team"], "population_deltas": ["cbsa_code", "year"], "league_churn": ["League", "season"]}
+
+def disagreements(name, frames):
+	'''Columns (shared by all frames) whose values differ between engines, after sorting on the query's keys.'''
+	import numpy as np
+	keys = QUERY_KEYS[name]
+	shared = sorted(set.intersection(*(set(f.columns) for f in frames)) - set(keys))
+	frames = [f.sort_values(keys, kind="stable").reset_index(drop=True) for f in frames]
+	if len({len(f) for f in frames}) > 1:
+		return ["row count"]
+	bad = [k for k in keys if any(not (as_text(f[k]) == as_text(frames[0][k])).all() for f in frames[1:])]
+	for col in shared:
+		base = frames[0][col]
+		for f in frames[1:]:
+			if pd_is_numeric(base) and pd_is_numeric(f[col]):
+				same = np.allclose(base.to_numpy(dtype=float, na_value=np.nan), f[col].to_numpy(dtype=float, na_value=np.nan), equal_nan=True)
+			else:
+				same = (as_text(base) == as_text(f[col])).all()
+			if not same:
+				bad.append(col)
+				break
+	return bad
+
+def as_text(series):
+	'''Values as strings with every kind of missing (None, NaN, NA) as "".'''
+	return series.astype(object).where(series.notna(), "").astype(str).to_numpy()
+
+def pd_is_numeric(series):
+	import pandas as pd
+	return pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series)
+
+PANDAS_QUERIES = {
+	"team_city_features": pandas_team_city_features,
+	"population_deltas": pandas_population_deltas,
+	"league_churn": pandas_league_churn,
+}
+
+def sqlite_query(name, db_path):
+	'''The DuckDB SQL run directly on SQLite (tables live in main instead of the milb schema).'''
+	import pandas as pd
+	from src.features.analytics import NAMED_QUERIES
+	query = NAMED_QUERIES[name]
+	conn = sqlite3.connect(db_path)
+	df = pd.read_sql_query(query["sql"].replace("milb.", ""), conn, params=query["params"] or None)
+	conn.close()
+	return df
+
+def time_ms(fn, repeat):
+	timings = []
+	for _ in range(repeat):
+		start = time.perf_counter()
+		result = fn()
+		timings.append((time.perf_counter() - start) * 1000)
+	return statistics.median(timings), result
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="Benchmark DuckDB named queries vs SQLite and pandas.")
+	parser.add_argument("--teams", type=int, default=5000)
+	parser.add_argument("--cbsas", type=int, default=1000)
+	parser.add_argument("--start", type=int, default=1950)
+	parser.add_argument("--end", type=int, default=2024)
+	parser.add_argument("--repeat", type=int, default=5)
+	parser.add_argument("--seed", type=int, default=0)
+	args = parser.parse_args(argv)
+
+	from src.features import analytics
+	with tempfile.TemporaryDirectory(prefix="milb_analytics_") as workdir:
+		db_path, fin_path = build_inputs(workdir, args.teams, args.cbsas, args.start, args.end, args.seed)
+		start = time.perf_counter()
+		con = analytics.connect(db_path, fin_path)
+		print(f"duckdb connect (attach + views): {(time.perf_counter() - start) * 1000:.1f} ms")
+		for name in analytics.NAMED_QUERIES:
+			duck_ms, duck = time_ms(lambda: analytics.run_query(name, con=con), args.repeat)
+			lite_ms, lite = time_ms(lambda: sqlite_query(name, db_path), args.repeat)
+			pd_ms, frame = time_ms(lambda: PANDAS_QUERIES[name](db_path, fin_path), args.repeat)
+			bad = disagreements(name, [duck, lite, frame])
+			print(f"{name:<20} rows={len(duck):>8}  duckdb {duck_ms:9.1f} ms  sqlite {lite_ms:9.1f} ms  pandas {pd_ms:9.1f} ms"
+				+ ("  (all three agree)" if not bad else f"  (DISAGREE on {', '.join(bad)})"))
+		con.close()
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,65 @@
+'''
+Docstring for benchmarks.bench_logos
+
+Logo pipeline (src.collect.logos) against a local stub server: a teams page, one club page per team and PNG logos
+with ETags (If-None-Match -> 304). Nothing leaves the machine.
+Usage (from repo root):
+	python -m benchmarks.bench_logos --teams 300 --unique 120 --changed 10
+
+Three runs: cold (everything downloaded), refresh (all 304), refresh after --changed logos are re-colored.
+'''
+
+# Imports
+import argparse, os, sys, tempfile, threading, time
+from http.server import ThreadingHTTPServer
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if REPO_ROOT not in sys.path:
+	sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.synth import StubSite
+
+# Functions
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="Benchmark the logo pipeline against a local stub server.")
+	parser.add_argument("--teams", type=int, default=300)
+	parser.add_argument("--unique", type=int, default=120, help="Distinct logos (teams share them modulo this)")
+	parser.add_argument("--changed", type=int, default=10, help="Logos re-colored before the third run")
+	args = parser.parse_args(argv)
+
+	from bs4 import BeautifulSoup
+	from src.utils.transport import Transport
+	from src.collect.logos import collect_logos, LogoStore
+	site = StubSite(args.teams, args.unique)
+	server = ThreadingHTTPServer(("127.0.0.1", 0), site.handler())
+	threading.Thread(target=server.serve_forever, daemon=True).start()
+	base = f"http://127.0.0.1:{server.server_address[1]}"
+	transport = Transport(policies={"127.0.0.1": (500, 50)}) # Local stub: no need for the Wikipedia budget
+
+	with tempfile.TemporaryDirectory(prefix="milb_logos_") as workdir:
+		paths = {
+			"club_html_path": os.path.join(workdir, "club"), "raw_path": os.path.join(workdir, "logos"),
+			"pack_path": os.path.join(workdir, "logos.pack"), "index_path": os.path.join(workdir, "logos_index.json"),
+		}
+		teams_soup = BeautifulSoup(transport.get(base + "/teams").text, "html.parser")
+		for label in ["cold", "refresh", f"refresh, {args.changed} changed"]:
+			if label.startswith("refresh,"):
+				for k in range(args.changed):
+					site.versions[k] += 1
+			site.image_hits = 0
+			start = time.perf_counter()
+			counts = collect_logos(teams_soup, teams_page_url=base + "/teams", transport=transport, **paths)
+			elapsed = time.perf_counter() - start
+			print(f"{label:<22} {elapsed:7.3f}s  image bodies served={site.image_hits:<4} {counts}")
+		store = LogoStore(paths["pack_path"], paths["index_path"])
+		teams = store.teams()
+		start = time.perf_counter()
+		total = sum(len(store.get(t)) for t in teams)
+		print(f"read {len(teams)} logos from one {os.path.getsize(paths['pack_path']):,}-byte pack in "
+			f"{(time.perf_counter() - start) * 1000:.2f} ms ({total:,} bytes)")
+		store.close()
+	server.shutdown()
+	transport.close()
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,67 @@
+'''
+Docstring for benchmarks.bench_names
+
+Team name pass (src.clean.team_names) vs the row-wise df.apply(get_mascot_name, axis=1) it replaces.
+Usage (from repo root):
+	python -m benchmarks.bench_names --rows 1000000 --teams 5000
+
+Rows are drawn from --teams distinct synthetic (Team, City) pairs (like decades of seasons of the same clubs), with
+footnote markers and doubled spaces mixed in. Mascots are checked for equality on the raw names before timing.
+'''
+
+# Imports
+import argparse, os, random, sys, time
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if REPO_ROOT not in sys.path:
+	sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.synth import MASCOTS, synth_place_name
+
+# Functions
+def synth_names(n_rows, n_teams, seed=0):
+	rng = random.Random(seed)
+	pairs = []
+	for _ in range(n_teams):
+		city = synth_place_name(rng)
+		team = f"{city} {rng.choice(MASCOTS)}" if rng.random() < 0.8 else rng.choice(MASCOTS)
+		if rng.random() < 0.1:
+			team += rng.choice(["[a]", "[1]", "*", "†"])
+		if rng.random() < 0.05:
+			team = team.replace(" ", "  ", 1)
+		pairs.append((team, city))
+	picks = np.random.default_rng(seed).integers(0, n_teams, n_rows)
+	teams, cities = zip(*pairs)
+	return pd.DataFrame({"Team": np.asarray(teams, dtype=object)[picks], "City": np.asarray(cities, dtype=object)[picks]})
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="Benchmark the column-wise team name pass against row-wise apply.")
+	parser.add_argument("--rows", type=int, default=1_000_000)
+	parser.add_argument("--teams", type=int, default=5000, help="Distinct (Team, City) pairs")
+	args = parser.parse_args(argv)
+
+	from src.clean.clean_teams import get_mascot_name
+	from src.clean.team_names import derive_mascots, normalize_team_names
+	df = synth_names(args.rows, args.teams)
+	print(f"{len(df):,} rows, {args.teams:,} distinct (Team, City) pairs")
+
+	start = time.perf_counter()
+	expected = df.apply(get_mascot_name, axis=1)
+	apply_seconds = time.perf_counter() - start
+	start = time.perf_counter()
+	mascots = derive_mascots(df["Team"].to_numpy(dtype=object), df["City"].to_numpy(dtype=object))
+	derive_seconds = time.perf_counter() - start
+	assert (expected.to_numpy(dtype=object) == mascots).all(), "derive_mascots differs from get_mascot_name"
+
+	start = time.perf_counter()
+	out = normalize_team_names(df)
+	normalize_seconds = time.perf_counter() - start
+	print(f"apply(get_mascot_name)      {apply_seconds:8.3f}s")
+	print(f"derive_mascots              {derive_seconds:8.3f}s  ({apply_seconds / derive_seconds:,.0f}x, identical output)")
+	print(f"normalize_team_names (all)  {normalize_seconds:8.3f}s  "
+		f"(cleaned {int((out['Team'] != df['Team']).sum()):,} names, {out['TeamFingerprint'].nunique():,} fingerprints)")
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,207 @@
+'''
+Docstring for benchmarks.bench_parse
+
+Offline benchmark of the parsing and load hot paths on a synthetic corpus (see benchmarks.synth).
+Usage (from repo root):
+	python -m benchmarks.bench_parse --scales 1,10,100 --repeat 3
+	python -m benchmarks.bench_parse --compare benchmarks/results/<older>.json
+
+Results land in benchmarks/results/<timestamp>_<commit>.json for comparison across commits.
+'''
+
+# Imports
+import argparse, json, os, platform, statistics, subprocess, sys, tempfile, time
+import datetime as dt
+import random
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if REPO_ROOT not in sys.path:
+	sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.synth import synth_corpus, write_corpus, synth_place_name, STATES
+
+# Constants
+RESULTS_DIR = os.path.join(REPO_ROOT, "benchmarks", "results")
+EXTRACT_ITEMS_PER_SCALE = 1000
+UPSERT_ROWS_PER_SCALE = 1000
+
+# Functions
+def git_revision():
+	try:
+		sha = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+							capture_output=True, text=True, check=True).stdout.strip()
+		dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=REPO_ROOT,
+								capture_output=True, text=True, check=True).stdout.strip()
+	except (OSError, subprocess.CalledProcessError):
+		return "unknown"
+	return sha + ("-dirty" if dirty else "")
+
+def time_it(fn, repeat, setup=None):
+	'''Run fn() `repeat` times (setup() before each, untimed) and return the timings in seconds.'''
+	timings = []
+	for _ in range(repeat):
+		if setup:
+			setup()
+		start = time.perf_counter()
+		fn()
+		timings.append(time.perf_counter() - start)
+	return timings
+
+def record(results, name, scale, n, timings):
+	entry = {
+		"name": name,
+		"scale": scale,
+		"n": n,
+		"min_s": min(timings),
+		"median_s": statistics.median(timings),
+		"per_item_us": min(timings) / max(n, 1) * 1e6,
+	}
+	results.append(entry)
+	print(f"{name:<40} {scale:>4}x  n={n:<8} min={entry['min_s']:.4f}s  median={entry['median_s']:.4f}s  ({entry['per_item_us']:.1f} us/item)")
+
+def tile(values, n):
+	'''Repeat values up to exactly n items.'''
+	if not values:
+		return []
+	return (values * (n // len(values) + 1))[:n]
+
+def synth_city_rows(n, seed=0):
+	'''Rows shaped like clean_cities output (REQUIRED_COLUMNS).'''
+	rng = random.Random(seed)
+	rows = []
+	for i in range(n):
+		rows.append({
+			"city": f"{synth_place_name(rng)} {i}", "country": "United States", "state": rng.choice(STATES),
+			"metro": synth_place_name(rng), "urban_area": None, "csa": rng.randint(100, 600), "county": synth_place_name(rng) + " County",
+			"province": None, "elevation": f"{rng.randint(5, 7000)} ft", "population_density": f"{rng.uniform(50, 9000):.1f}/sq mi",
+			"population_urbandensity": None, "population_csa_density": None, "fips_code": f"{rng.randint(1, 56):02d}-{rng.randint(1000, 99999):05d}",
+			"year_founded_max": rng.randint(1800, 1950), "year_founded_min": rng.randint(1650, 1800),
+			"area_max": rng.uniform(10, 900), "area_min": rng.uniform(1, 10), "pop_max": float(rng.randint(50000, 3000000)),
+			"pop_min": float(rng.randint(2000, 50000)), "gdp_max": rng.uniform(1000, 250000), "gdp_min": rng.uniform(100, 1000),
+			"gnis_est": str(rng.randint(100000, 2500000)), "msa_est": str(rng.randint(10000, 49999)),
+			"latitude": rng.uniform(25, 49), "longitude": rng.uniform(-124, -67),
+		})
+	return rows
+
+def run_scale(scale, repeat, seed, workdir, results):
+	import pandas as pd
+	from src.utils.html import cook_html
+	from src.clean import clean_cities as cc
+	from src.clean.clean_teams import read_milb_soup, get_mascot_name, upsert_minor_league_teams
+	from src.clean.team_names import normalize_team_names
+
+	corpus = synth_corpus(scale=scale, seed=seed)
+	paths = write_corpus(corpus, os.path.join(workdir, f"html_{scale}x"))
+	all_paths = paths["cities"] + paths["teams"]
+
+	# cook_html: disk -> soup
+	record(results, "cook_html", scale, len(all_paths), time_it(lambda: [cook_html(p) for p in all_paths], repeat))
+	city_soups = [cook_html(p) for p in paths["cities"]]
+	team_soups = [cook_html(p) for p in paths["teams"]]
+
+	# read_city_soup / read_milb_soup: soup -> frame
+	record(results, "read_city_soup", scale, len(city_soups), time_it(lambda: [cc.read_city_soup(s) for s in city_soups], repeat))
+	record(results, "read_city_facts", scale, len(city_soups), time_it(lambda: [cc.read_city_facts(s, "place") for s in city_soups], repeat))
+	record(results, "read_milb_soup", scale, len(team_soups), time_it(lambda: [read_milb_soup(s) for s in team_soups], repeat))
+
+	# extract_*: feed each parser the infobox values it sees in clean_cities
+	city_tables = [cc.read_city_soup(s) for s in city_soups]
+	values = {"year": [], "area": [], "pop": [], "gdp": [], "gnis": [], "msa": []}
+	for table in city_tables:
+		for col, val in table.iloc[0].items():
+			first = col.split(" ")[0]
+			if col in ("First settled", "Founded", "Incorporated", "Established", "Settled"):
+				values["year"].append(val)
+			elif first == "Area":
+				values["area"].append(val)
+			elif first == "Population" and not col.lower().endswith("density"):
+				values["pop"].append(val)
+			elif first == "GDP":
+				values["gdp"].append(val)
+			elif col.startswith("GNIS"):
+				values["gnis"].append(val)
+			elif col in ("MSA", "Metropolitan statistical area"):
+				values["msa"].append(val)
+	n_extract = EXTRACT_ITEMS_PER_SCALE * scale
+	for kind, fn in [("year", cc.extract_year), ("area", cc.extract_area_sqmi), ("pop", cc.extract_pop),
+						("gdp", cc.extract_gdp), ("gnis", cc.extract_gnis), ("msa", cc.extract_msa)]:
+		series = pd.Series(tile(values[kind], n_extract), dtype=object)
+		record(results, fn.__name__, scale, len(series), time_it(lambda: series.map(fn), repeat))
+
+	# get_mascot_name: row-wise apply as in clean_teams
+	teams = pd.concat([read_milb_soup(s) for s in team_soups], axis=0).reset_index(drop=True)
+	record(results, "get_mascot_name", scale, len(teams), time_it(lambda: teams.apply(get_mascot_name, axis=1), repeat))
+
+	# Upserts: empty table ("insert") and identical reload ("reload")
+	teams = normalize_team_names(teams) # As clean_teams does: the upsert stores Mascot, HasCityPrefix and TeamFingerprint
+	teams["Affiliates"] = None
+	teams["Capacity"] = pd.to_numeric(teams["Capacity"].astype(str).str.replace(",", ""), errors="coerce")
+	cities = pd.DataFrame(synth_city_rows(UPSERT_ROWS_PER_SCALE * scale, seed=seed))
+	db_path = os.path.join(workdir, f"bench_{scale}x.sqlite")
+	def fresh_db():
+		if os.path.exists(db_path):
+			os.remove(db_path)
+	for name, fn, df in [("upsert_cities_more_robust", cc.upsert_cities_more_robust, cities),
+							("upsert_minor_league_teams", upsert_minor_league_teams, teams)]:
+		record(results, name + " [insert]", scale, len(df), time_it(lambda: fn(df, db_path=db_path), repeat, setup=fresh_db))
+		record(results, name + " [reload]", scale, len(df), time_it(lambda: fn(df, db_path=db_path), repeat))
+		fresh_db()
+
+def compare(current, baseline_path):
+	with open(baseline_path, "r", encoding="utf-8") as f:
+		baseline = json.load(f)
+	base = {(r["name"], r["scale"]): r for r in baseline["results"]}
+	print(f"\nvs {baseline['meta']['commit']} ({os.path.basename(baseline_path)}):")
+	for r in current["results"]:
+		b = base.get((r["name"], r["scale"]))
+		if b is None:
+			continue
+		ratio = r["min_s"] / b["min_s"] if b["min_s"] else float("nan")
+		print(f"{r['name']:<40} {r['scale']:>4}x  {b['min_s']:.4f}s -> {r['min_s']:.4f}s  ({ratio:.2f}x time)")
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="Benchmark parsing and load hot paths on a synthetic corpus.")
+	parser.add_argument("--scales", default="1,10,100", help="Comma-separated corpus multipliers")
+	parser.add_argument("--repeat", type=int, default=3)
+	parser.add_argument("--seed", type=int, default=0)
+	parser.add_argument("--compare", default=None, help="Earlier results JSON to compare against")
+	parser.add_argument("--no-save", action="store_true", help="Do not write a results file")
+	args = parser.parse_args(argv)
+
+	scales = [int(s) for s in args.scales.split(",") if s.strip()]
+	results = []
+	with tempfile.TemporaryDirectory(prefix="milb_bench_") as workdir:
+		# The upsert functions write debug output relative to the working directory
+		cwd = os.getcwd()
+		os.makedirs(os.path.join(workdir, "data", "mid"), exist_ok=True)
+		os.chdir(workdir)
+		try:
+			for scale in scales:
+				run_scale(scale, args.repeat, args.seed, workdir, results)
+		finally:
+			os.chdir(cwd)
+
+	output = {
+		"meta": {
+			"commit": git_revision(),
+			"timestamp": dt.datetime.now().strftime("%Y%m%d_%H%M%S"),
+			"python": platform.python_version(),
+			"platform": platform.platform(),
+			"scales": scales,
+			"repeat": args.repeat,
+			"seed": args.seed,
+		},
+		"results": results,
+	}
+	if not args.no_save:
+		os.makedirs(RESULTS_DIR, exist_ok=True)
+		out_path = os.path.join(RESULTS_DIR, f"{output['meta']['timestamp']}_{output['meta']['commit']}.json")
+		with open(out_path, "w", encoding="utf-8") as f:
+			json.dump(output, f, indent=2)
+		print(f"\nSaved: {out_path}")
+	if args.compare:
+		compare(output, args.compare)
+	return output
+
+if __name__ == '__main__':
+	main()
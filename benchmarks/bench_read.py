@@ -0,0 +1,69 @@
+'''
+Docstring for benchmarks.bench_read
+
+Cold vs warm latency of the read-side API (src.database.read_db) on a synthetic cities/teams database.
+Usage (from repo root):
+	python -m benchmarks.bench_read --cities 20000 --batch 50
+'''
+
+# Imports
+import argparse, os, sqlite3, sys, tempfile, time
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if REPO_ROOT not in sys.path:
+	sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.bench_parse import synth_city_rows
+
+# Functions
+def build_db(db_path, n_cities, seed=0):
+	import pandas as pd
+	from src.clean.clean_cities import upsert_cities_more_robust
+	from src.database.schema import ensure_team_history
+	upsert_cities_more_robust(pd.DataFrame(synth_city_rows(n_cities, seed=seed)), db_path=db_path)
+	conn = sqlite3.connect(db_path)
+	conn.execute("CREATE TABLE IF NOT EXISTS minor_league_teams (id INTEGER PRIMARY KEY, Team TEXT, League TEXT, City TEXT, State TEXT);")
+	cities = conn.execute("SELECT city, state FROM cities WHERE id % 10 = 0;").fetchall()
+	conn.executemany("INSERT INTO minor_league_teams (Team, League, City, State) VALUES (?, ?, ?, ?);",
+					[(f"Team {i}", "League", city, state) for i, (city, state) in enumerate(cities)])
+	ensure_team_history(conn)
+	conn.execute("""
+		INSERT INTO team_history (season, team_id, Team, League, City, State)
+		SELECT s.value, t.id, t.Team, t.League, t.City, t.State FROM minor_league_teams t, json_each('[2021,2022,2023,2024]') s;
+	""")
+	conn.commit()
+	conn.close()
+
+def time_ms(fn):
+	start = time.perf_counter()
+	fn()
+	return (time.perf_counter() - start) * 1000
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="Benchmark read_db lookups (cold = after a write, warm = cached).")
+	parser.add_argument("--cities", type=int, default=20000)
+	parser.add_argument("--batch", type=int, default=50)
+	parser.add_argument("--seed", type=int, default=0)
+	args = parser.parse_args(argv)
+
+	from src.database import read_db
+	with tempfile.TemporaryDirectory(prefix="milb_read_") as workdir:
+		db_path = os.path.join(workdir, "milb.sqlite")
+		build_db(db_path, args.cities, args.seed)
+		conn = sqlite3.connect(db_path)
+		lat, lon = conn.execute("SELECT latitude, longitude FROM cities WHERE id = 1;").fetchone()
+		conn.close()
+		ids = list(range(1, args.batch + 1))
+		queries = [
+			("get_city_features", lambda: read_db.get_city_features(ids, db_path=db_path)),
+			("get_team_history", lambda: read_db.get_team_history(ids, years=[2023, 2024], db_path=db_path)),
+			("teams_in_radius 100mi", lambda: read_db.teams_in_radius(lat, lon, 100, db_path=db_path)),
+		]
+		for name, fn in queries:
+			read_db.clear_cache(db_path)
+			cold = time_ms(fn)
+			warm = min(time_ms(fn) for _ in range(20))
+			print(f"{name:<24} cold {cold:8.3f} ms   warm {warm:8.3f} ms")
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,47 @@
+'''
+Docstring for benchmarks.bench_seasons
+
+Season-page ingestion (src.clean.season_history) on synthetic archived pages: serial vs process pool.
+Usage (from repo root):
+	python -m benchmarks.bench_seasons --start 1990 --end 2024 --workers 4
+
+Each run starts from an empty database; a final re-run of the pool shows the content-hash skip.
+'''
+
+# Imports
+import argparse, os, sqlite3, sys, tempfile, time
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if REPO_ROOT not in sys.path:
+	sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.synth import write_season_pages
+
+# Functions
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="Benchmark season-page ingestion, serial vs process pool.")
+	parser.add_argument("--start", type=int, default=1990)
+	parser.add_argument("--end", type=int, default=2024)
+	parser.add_argument("--teams", type=int, default=10, help="Teams per league page")
+	parser.add_argument("--workers", type=int, default=os.cpu_count())
+	parser.add_argument("--window", type=int, default=None, help="Pages in flight (default: 2 x workers)")
+	args = parser.parse_args(argv)
+
+	from src.clean.season_history import ingest_season_pages
+	with tempfile.TemporaryDirectory(prefix="milb_seasons_") as workdir:
+		html_path = os.path.join(workdir, "season")
+		paths = write_season_pages(html_path, range(args.start, args.end + 1), teams_per_league=args.teams)
+		print(f"{len(paths)} season pages, {args.teams} teams each")
+		runs = [("serial", 0, "serial.sqlite"), (f"pool x{args.workers}", args.workers, "pool.sqlite"),
+				(f"pool x{args.workers}, re-run", args.workers, "pool.sqlite")]
+		for label, workers, db_name in runs:
+			db_path = os.path.join(workdir, db_name)
+			start = time.perf_counter()
+			counts = ingest_season_pages(db_path=db_path, html_path=html_path, max_workers=workers, window=args.window)
+			elapsed = time.perf_counter() - start
+			with sqlite3.connect(db_path) as conn:
+				rows = conn.execute("SELECT COUNT(*) FROM team_history").fetchone()[0]
+			print(f"{label:<22} {elapsed:7.2f}s  team_history rows={rows:<6} {counts}")
+
+if __name__ == '__main__':
+	main()
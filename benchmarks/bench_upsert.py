@@ -0,0 +1,59 @@
+'''
+Docstring for benchmarks.bench_upsert
+
+Row-by-row executemany upsert vs the set-based staging-table path (load_db.bulk_upsert) on the cities table.
+Usage (from repo root):
+	python -m benchmarks.bench_upsert --rows 100000
+
+Three passes per path: initial load, identical reload, reload with --changed share of rows modified.
+'''
+
+# Imports
+import argparse, os, sqlite3, sys, tempfile, time
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if REPO_ROOT not in sys.path:
+	sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.bench_parse import synth_city_rows
+
+# Functions
+def legacy_upsert(df, db_path):
+	'''The pre-staging path: per-cell clean_value, then executemany(UPSERT_SQL); every row rewritten and re-triggered.'''
+	from src.clean.clean_cities import CREATE_TABLE_SQL, CREATE_UPDATE_TRIGGER_SQL, UPSERT_SQL, REQUIRED_COLUMNS, clean_value
+	rows = [tuple(clean_value(row[col]) for col in REQUIRED_COLUMNS) for row in df.to_dict("records")]
+	conn = sqlite3.connect(db_path)
+	conn.execute(CREATE_TABLE_SQL)
+	conn.execute(CREATE_UPDATE_TRIGGER_SQL)
+	conn.executemany(UPSERT_SQL, rows)
+	conn.commit()
+	conn.close()
+
+def staged_upsert(df, db_path):
+	from src.clean.clean_cities import upsert_cities_more_robust
+	return upsert_cities_more_robust(df, db_path=db_path)
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="Benchmark row-by-row vs staged upserts into cities.")
+	parser.add_argument("--rows", type=int, default=100000)
+	parser.add_argument("--changed", type=float, default=0.01, help="Share of rows modified in the third pass")
+	parser.add_argument("--seed", type=int, default=0)
+	args = parser.parse_args(argv)
+
+	import pandas as pd
+	records = pd.DataFrame(synth_city_rows(args.rows, seed=args.seed))
+	modified = records.copy()
+	modified.loc[:int(len(records) * args.changed) - 1, "pop_max"] += 1
+	passes = [("insert", records), ("reload", records), (f"reload {args.changed:.0%} changed", modified)]
+
+	with tempfile.TemporaryDirectory(prefix="milb_upsert_") as workdir:
+		for name, fn in [("executemany", legacy_upsert), ("staged", staged_upsert)]:
+			db_path = os.path.join(workdir, f"{name}.sqlite")
+			for label, batch in passes:
+				start = time.perf_counter()
+				counts = fn(batch, db_path)
+				elapsed = time.perf_counter() - start
+				print(f"{name:<12} {label:<22} {len(batch):>8} rows  {elapsed:8.3f}s  {counts or ''}")
+
+if __name__ == '__main__':
+	main()
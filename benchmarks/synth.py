@@ -0,0 +1,291 @@
+'''
+Docstring for benchmarks.synth
+
+Synthetic Wikipedia pages for offline benchmarking.
+- City pages carry an infobox built from the key variants seen in the wild (city_html_all_infobox_data.txt)
+- Team-list pages mimic "List of Minor League Baseball leagues and teams", incl. the nonstandard City/State columns
+- Season pages mimic "<year> <league> season" (standings + teams table; older years use Club/Location columns)
+- StubSite serves a teams page, club pages and ETag'd PNG logos over http.server for the logo pipeline
+- Everything is seeded, so a given (scale, seed) always produces the same corpus
+'''
+
+# Imports
+import hashlib, io, os, random, threading
+from http.server import BaseHTTPRequestHandler
+
+# Constants
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+INFOBOX_KEYS_FILE = os.path.join(REPO_ROOT, "city_html_all_infobox_data.txt")
+CITY_PAGES_PER_SCALE = 25 # 1x ~ one state's worth of team cities
+TEAM_PAGES_PER_SCALE = 1
+GROUP_HEADERS = ["Area", "Population", "GDP", "Government"] # Rendered as mergedtoprow + "• sub" rows
+EXTRA_KEYS = ["Urban Area", "CSA", "MSA", "Metropolitan statistical area", "GNIS ID", "Area Urban", "Area Metro",
+				"Population CSA", "Population TriCities", "Population CSA density", "GDP Greensboro", "GDP Total"] # Special-cased in clean_cities
+ALWAYS_KEYS = ["Country", "State", "County", "Area City", "Population City", "Population Density", "Elevation", "FIPS code", "GNIS feature ID"]
+FOUNDED_KEYS = ["First settled", "Founded", "Incorporated", "Established", "Settled"]
+STATES = ["North Carolina", "Ohio", "Florida", "California", "Arizona", "Texas", "New York", "Iowa", "Tennessee", "Pennsylvania"]
+SYLLABLES = ["ash", "bor", "cal", "den", "el", "fay", "glen", "har", "iv", "jam", "kes", "lan", "mor", "nor", "os", "pell", "quin",
+				"ros", "sal", "tur", "val", "wes", "york", "zan"]
+SUFFIXES = ["ville", "ton", " City", "burg", " Falls", "port", " Springs", "field", ""]
+MASCOTS = ["Hawks", "Grasshoppers", "Mud Hens", "RubberDucks", "IronPigs", "Sod Poodles", "Biscuits", "Flying Squirrels",
+			"Lugnuts", "Jumbo Shrimp", "Trash Pandas", "Blue Rocks", "Storm Chasers", "Crawdads", "Wood Ducks"]
+MONTHS = ["January", "February", "March", "April", "May", "June", "July", "August", "September", "October", "November", "December"]
+LEAGUES = [ # (League, layout variant)
+	("International League", "standard"),
+	("Pacific Coast League", "standard"),
+	("Eastern League", "standard"),
+	("Southern League", "standard"),
+	("Texas League", "standard"),
+	("Midwest League", "state_province"),
+	("South Atlantic League", "standard"),
+	("Northwest League", "province"),
+	("Carolina League", "standard"),
+	("Florida State League", "city_all_in"),
+	("Arizona Complex League", "city_all_in"),
+	("Arizona Fall League", "no_state"),
+]
+
+# Classes
+class StubSite:
+	'''Teams page at /teams, club pages at /wiki/Team_<i>, logos at /img/<k>.png (teams share logos modulo `unique`).'''
+	def __init__(self, n_teams, n_unique):
+		self.n_teams, self.n_unique = n_teams, n_unique
+		self.versions = {k: 0 for k in range(n_unique)}
+		self.image_hits = 0
+		self.served = {} # logo index -> image bodies served (304s not counted)
+		self.lock = threading.Lock()
+
+	def logo(self, k):
+		data = synth_logo(k, self.versions[k])
+		return data, '"' + hashlib.md5(data).hexdigest() + '"'
+
+	def handler(self):
+		site = self
+		class Handler(BaseHTTPRequestHandler):
+			def log_message(self, *args):
+				pass
+			def send(self, status, body=b"", content_type="text/html", headers=None):
+				self.send_response(status)
+				self.send_header("Content-Type", content_type)
+				self.send_header("Content-Length", str(len(body)))
+				for key, value in (headers or {}).items():
+					self.send_header(key, value)
+				self.end_headers()
+				self.wfile.write(body)
+			def do_GET(self):
+				if self.path == "/teams":
+					rows = "".join(f'<tr><td>North</td><td><a href="/wiki/Team_{i}">{MASCOTS[i % len(MASCOTS)]} {i}</a></td><td>City {i}</td></tr>'
+									for i in range(site.n_teams))
+					return self.send(200, f'<table class="wikitable"><tr><th>Division</th><th>Team</th><th>City</th></tr>{rows}</table>'.encode())
+				if self.path.startswith("/wiki/Team_"):
+					i = int(self.path.rsplit("_", 1)[1])
+					body = f'<table class="infobox"><tr><td class="infobox-image"><img src="/img/{i % site.n_unique}.png"></td></tr></table>'
+					return self.send(200, body.encode())
+				if self.path.startswith("/img/"):
+					data, etag = site.logo(int(self.path[5:-4]))
+					if self.headers.get("If-None-Match") == etag:
+						return self.send(304, headers={"ETag": etag})
+					with site.lock:
+						site.image_hits += 1
+						site.served[int(self.path[5:-4])] = site.served.get(int(self.path[5:-4]), 0) + 1
+					return self.send(200, data, "image/png", {"ETag": etag})
+				self.send(404)
+		return Handler
+
+# Functions
+def load_infobox_keys(keys_file=INFOBOX_KEYS_FILE):
+	'''Infobox header variants, one per line.'''
+	with open(keys_file, "r", encoding="utf-8") as f:
+		return [line.strip() for line in f if line.strip()]
+
+def synth_place_name(rng):
+	name = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 2))).capitalize()
+	return name + rng.choice(SUFFIXES)
+
+def synth_infobox_value(rng, key, state):
+	'''Value text shaped like what Wikipedia renders for a given header, footnotes included.'''
+	footnote = f"[{rng.randint(1, 40)}]" if rng.random() < 0.5 else ""
+	first = key.split(" ")[0]
+	if key in FOUNDED_KEYS:
+		return f"{rng.choice(MONTHS)} {rng.randint(1, 28)}, {rng.randint(1650, 1950)}{footnote}"
+	if key.endswith("density") or key.endswith("Density"):
+		d = rng.uniform(50, 9000)
+		return f"{d:,.1f}/sq mi ({d / 2.58999:,.1f}/km2)"
+	if first == "Area":
+		a = rng.uniform(1, 900)
+		return f"{a:,.2f} sq mi ({a * 2.58999:,.2f} km2){footnote}"
+	if key == "Population Rank":
+		return f"{rng.randint(50, 400)}th in the United States"
+	if first == "Population":
+		return f"{rng.randint(2000, 3000000):,}{footnote}"
+	if first == "GDP":
+		return f"${rng.uniform(1, 250):.1f} billion (2022){footnote}"
+	if first == "Government":
+		return f"{synth_place_name(rng)} {synth_place_name(rng)} (D)"
+	if key == "Elevation":
+		e = rng.randint(5, 7000)
+		return f"{e:,} ft ({e * 0.3048:,.0f} m)"
+	if key == "FIPS code":
+		return f"{rng.randint(1, 56):02d}-{rng.randint(1000, 99999):05d}"
+	if key.startswith("GNIS"):
+		return f"{rng.randint(100000, 2500000)}{footnote}"
+	if key in ("MSA", "Metropolitan statistical area", "CSA"):
+		return str(rng.randint(10000, 49999))
+	if key.startswith("ZIP"):
+		z = rng.randint(10000, 99000)
+		return f"{z}–{z + rng.randint(1, 90)}"
+	if key.startswith("Area code"):
+		return f"{rng.randint(200, 989)}, {rng.randint(200, 989)}"
+	if key == "Time zone":
+		return "UTC−5 (EST)"
+	if key == "Country":
+		return "United States"
+	if key == "State":
+		return state
+	if key == "Website":
+		return f"www.{synth_place_name(rng).lower().replace(' ', '')}.gov"
+	return f"{synth_place_name(rng)} {synth_place_name(rng)}{footnote}"
+
+def synth_city_page(rng, city, state, keys):
+	'''HTML for a single city article with an infobox table.'''
+	chosen = list(ALWAYS_KEYS) + [k for k in keys + EXTRA_KEYS + FOUNDED_KEYS if k not in ALWAYS_KEYS and rng.random() < 0.35]
+	plain, grouped = [], {}
+	for key in dict.fromkeys(chosen): # Keep order, drop dupes
+		first, _, rest = key.partition(" ")
+		if first in GROUP_HEADERS and rest:
+			grouped.setdefault(first, []).append(rest)
+		else:
+			plain.append(key)
+	rows = [f'<tr><th colspan="2" class="infobox-above">{city}, {state}</th></tr>']
+	for key in plain:
+		rows.append(f'<tr class="mergedrow"><th scope="row" class="infobox-label">{key}</th>'
+					f'<td class="infobox-data">{synth_infobox_value(rng, key, state)}</td></tr>')
+	for group, subs in grouped.items():
+		rows.append(f'<tr class="mergedtoprow"><th colspan="2" class="infobox-header">{group}'
+					f'<sup class="reference">[{rng.randint(1, 9)}]</sup></th></tr>')
+		for sub in subs:
+			rows.append(f'<tr class="mergedrow"><th scope="row" class="infobox-label">&#160;•&#160;{sub}</th>'
+						f'<td class="infobox-data">{synth_infobox_value(rng, group + " " + sub, state)}</td></tr>')
+	body = "".join(f"<p>{synth_place_name(rng)} is a city in {state}.</p>" for _ in range(20)) # Article filler
+	return (f"<html><head><title>{city}, {state} - Wikipedia</title></head><body>"
+			f'<h1 id="firstHeading">{city}, {state}</h1>'
+			f'<table class="infobox ib-settlement vcard"><tbody>{"".join(rows)}</tbody></table>'
+			f"{body}</body></html>")
+
+def _team_table(rng, league, variant, n_teams):
+	state = rng.choice(STATES)
+	if variant == "city_all_in":
+		state = "Arizona" if league.startswith("Arizona") else "Florida"
+		cols = ["Division", "Team", f"City (all in {state})", "Stadium", "Capacity", "Affiliate"]
+	elif variant == "province":
+		cols = ["Division", "Team", "City", "Province", "Stadium", "Capacity", "Affiliate"]
+	elif variant == "state_province":
+		cols = ["Division", "Team", "City", "State/province", "Stadium", "Capacity", "Affiliate"]
+	elif variant == "no_state":
+		cols = ["Team", "City", "Stadium", "Capacity", "Affiliate"]
+	elif variant == "location": # Older season pages
+		cols = ["Division", "Club", "Location", "Ballpark", "Capacity", "MLB affiliate"]
+	else:
+		cols = ["Division", "Team", "City", "State", "Stadium", "Capacity", "Affiliate"]
+	rows = ["<tr>" + "".join(f"<th>{c}</th>" for c in cols) + "</tr>"]
+	for i in range(n_teams):
+		city = synth_place_name(rng)
+		mascot = rng.choice(MASCOTS)
+		team = f"{city} {mascot}" if rng.random() < 0.8 else mascot # Some teams drop the city
+		values = {
+			"Division": "North" if i < n_teams // 2 else "South",
+			"Team": team,
+			"City": city,
+			"Stadium": f"{synth_place_name(rng)} Field",
+			"Capacity": f"{rng.randint(1500, 12000):,}",
+			"Affiliate": f"{synth_place_name(rng)} {rng.choice(MASCOTS)}",
+		}
+		values[f"City (all in {state})"] = city
+		values["Club"], values["Location"], values["Ballpark"], values["MLB affiliate"] = team, f"{city}, {state}", values["Stadium"], values["Affiliate"]
+		values["State"] = values["Province"] = values["State/province"] = state
+		rows.append("<tr>" + "".join(f"<td>{values[c]}</td>" for c in cols) + "</tr>")
+	return f'<table class="wikitable">{"".join(rows)}</table>'
+
+def synth_teams_page(rng, teams_per_league=10):
+	'''HTML for a team-list page: one h2 per league, each followed by its wikitable.'''
+	sections = []
+	for league, variant in LEAGUES:
+		sections.append(f'<h2><span class="mw-headline">{league}</span></h2>')
+		sections.append(_team_table(rng, league, variant, teams_per_league))
+	return (f"<html><head><title>List of Minor League Baseball leagues and teams - Wikipedia</title></head><body>"
+			f'<h1 id="firstHeading">List of Minor League Baseball leagues and teams</h1>'
+			f'{"".join(sections)}</body></html>')
+
+def synth_season_page(rng, season, league, variant, n_teams=10):
+	'''HTML for a "<season> <league> season" page: a standings table (no City, skipped) then the teams table.'''
+	standings = "".join(f"<tr><td>{synth_place_name(rng)} {rng.choice(MASCOTS)}</td><td>{rng.randint(40, 100)}</td><td>{rng.randint(40, 100)}</td></tr>"
+						for _ in range(n_teams))
+	return (f"<html><head><title>{season} {league} season - Wikipedia</title></head><body>"
+			f'<h1 id="firstHeading">{season} {league} season</h1>'
+			f'<h2><span class="mw-headline">Standings</span></h2>'
+			f'<table class="wikitable"><tr><th>Team</th><th>W</th><th>L</th></tr>{standings}</table>'
+			f'<h2><span class="mw-headline">Teams</span></h2>'
+			f"{_team_table(rng, league, variant, n_teams)}</body></html>")
+
+def write_season_pages(folder_path, seasons=range(1990, 2025), seed=0, teams_per_league=10):
+	'''One archived page per (season, league) in LEAGUES; pages before 2000 use the older "location" layout.'''
+	rng = random.Random(seed)
+	os.makedirs(folder_path, exist_ok=True)
+	paths = []
+	for season in seasons:
+		for league, variant in LEAGUES:
+			html = synth_season_page(rng, season, league, "location" if season < 2000 else variant, teams_per_league)
+			page = f"{season}_{league}_season".replace(" ", "_").lower()
+			path = os.path.join(folder_path, f"wiki_{page}_20250101_000000.html")
+			with open(path, "w", encoding="utf-8-sig") as f:
+				f.write(html)
+			paths.append(path)
+	return paths
+
+def synth_corpus(scale=1, seed=0, keys=None):
+	'''
+	Build an in-memory corpus at a given scale.
+
+	:param scale: Multiplier on the 1x page counts
+	:param seed: Random seed, same seed == same corpus
+	:param keys: Infobox key variants; defaults to city_html_all_infobox_data.txt
+	:return: dict with "cities" [(city, state, html)] and "teams" [html]
+	'''
+	rng = random.Random(seed * 1000003 + scale)
+	keys = keys if keys is not None else load_infobox_keys()
+	cities = []
+	for _ in range(CITY_PAGES_PER_SCALE * scale):
+		city, state = synth_place_name(rng), rng.choice(STATES)
+		cities.append((city, state, synth_city_page(rng, city, state, keys)))
+	teams = [synth_teams_page(rng) for _ in range(TEAM_PAGES_PER_SCALE * scale)]
+	return {"cities": cities, "teams": teams}
+
+def write_corpus(corpus, folder_path):
+	'''Write a corpus to disk using the cook_soup archive naming (wiki_<page>_<timestamp>.html).'''
+	city_dir, team_dir = os.path.join(folder_path, "city"), os.path.join(folder_path, "milb")
+	os.makedirs(city_dir, exist_ok=True)
+	os.makedirs(team_dir, exist_ok=True)
+	paths = {"cities": [], "teams": []}
+	for i, (city, state, html) in enumerate(corpus["cities"]):
+		page = "{},_{}".format(city.replace(" ", "_").lower(), state.replace(" ", "_").lower())
+		path = os.path.join(city_dir, f"wiki_{page}_{i:03d}_20250101_000000.html") # Index keeps synthetic name clashes apart
+		with open(path, "w", encoding="utf-8-sig") as f:
+			f.write(html)
+		paths["cities"].append(path)
+	for i, html in enumerate(corpus["teams"]):
+		path = os.path.join(team_dir, f"wiki_list_of_minor_league_{i:03d}_20250101_000000.html")
+		with open(path, "w", encoding="utf-8-sig") as f:
+			f.write(html)
+		paths["teams"].append(path)
+	return paths
+
+def synth_logo(seed, version, size=(320, 240)):
+	from PIL import Image, ImageDraw
+	rng = random.Random(f"{seed}-{version}")
+	image = Image.new("RGBA", size, (0, 0, 0, 0))
+	draw = ImageDraw.Draw(image)
+	draw.ellipse([10, 10, size[0] - 10, size[1] - 10], fill=tuple(rng.randrange(256) for _ in range(3)) + (255,))
+	draw.rectangle([size[0] // 4, size[1] // 3, 3 * size[0] // 4, 2 * size[1] // 3], fill=tuple(rng.randrange(256) for _ in range(3)) + (255,))
+	out = io.BytesIO()
+	image.save(out, format="PNG")
+	return out.getvalue()
@@ -0,0 +1,19 @@
+'''
+Docstring for scripts.run_model
+
+Entrypoint for model experiments (see src/modeling/runner.py).
+Usage (from repo root):
+	python scripts/run_model.py --splits 5 --workers 4
+'''
+
+# Imports
+import os, sys
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if REPO_ROOT not in sys.path:
+	sys.path.insert(0, REPO_ROOT)
+
+from src.modeling.runner import main
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,184 @@
+'''
+Docstring for clean.city_history
+
+Infobox history across every archived snapshot of a city page (find_latest_html only ever uses the newest).
+- Snapshots are keyed by content hash: a page already seen for the place is never parsed again
+- Only (field, qualifier) values that changed since the previous snapshot are stored; NULL marks a removed value
+- value_as_of(place, field, date) replays those deltas, e.g. population revisions over time
+'''
+
+# Imports
+import datetime as dt
+import hashlib
+import os
+import sqlite3
+from src.utils.html import find_all_html, cook_html
+from src.clean.clean_cities import read_city_facts, city_page_id
+
+# Constants
+DB_PATH = os.path.abspath(os.path.join('.','database','milb.sqlite'))
+CITY_HTML_PATH = os.path.join('.','data','raw','wikipedia','city')
+TS_FORMAT = "%Y-%m-%d %H:%M:%S" # Sortable as text
+
+CREATE_SNAPSHOTS_SQL = """
+	CREATE TABLE IF NOT EXISTS city_snapshots (
+	place TEXT NOT NULL,
+	snapshot_ts TEXT NOT NULL,
+	content_hash TEXT NOT NULL,
+	file_name TEXT,
+	created_on TEXT DEFAULT CURRENT_TIMESTAMP,
+	PRIMARY KEY (place, snapshot_ts)
+);
+"""
+
+CREATE_HISTORY_SQL = """
+	CREATE TABLE IF NOT EXISTS city_fact_history (
+	place TEXT NOT NULL,
+	field TEXT NOT NULL,
+	qualifier TEXT NOT NULL,
+	valid_from TEXT NOT NULL,
+	value TEXT,
+	PRIMARY KEY (place, field, qualifier, valid_from)
+) WITHOUT ROWID;
+"""
+
+STATE_AS_OF_SQL = """
+	SELECT h.field, h.qualifier, h.value
+	FROM city_fact_history h
+	WHERE h.place = ?
+	AND h.valid_from = (
+		SELECT MAX(valid_from) FROM city_fact_history
+		WHERE place = h.place AND field = h.field AND qualifier = h.qualifier AND valid_from <= ?
+	);
+"""
+
+VALUE_AS_OF_SQL = """
+	SELECT h.qualifier, h.value
+	FROM city_fact_history h
+	WHERE h.place = ? AND h.field = ?
+	AND h.valid_from = (
+		SELECT MAX(valid_from) FROM city_fact_history
+		WHERE place = h.place AND field = h.field AND qualifier = h.qualifier AND valid_from <= ?
+	);
+"""
+
+# Functions
+def content_hash(path):
+	'''sha256 of the archived file bytes.'''
+	h = hashlib.sha256()
+	with open(path, "rb") as f:
+		for chunk in iter(lambda: f.read(1 << 20), b""):
+			h.update(chunk)
+	return h.hexdigest()
+
+def as_of_text(as_of):
+	'''Normalize a date/datetime/str to the stored timestamp text. A bare date means end of that day.'''
+	if isinstance(as_of, str):
+		as_of = dt.datetime.fromisoformat(as_of) if len(as_of) > 10 else dt.date.fromisoformat(as_of)
+	if isinstance(as_of, dt.datetime):
+		return as_of.strftime(TS_FORMAT)
+	return dt.datetime.combine(as_of, dt.time(23, 59, 59)).strftime(TS_FORMAT)
+
+def ensure_history_tables(conn):
+	conn.execute(CREATE_SNAPSHOTS_SQL)
+	conn.execute(CREATE_HISTORY_SQL)
+
+def state_as_of(conn, place, as_of_ts):
+	'''{(field, qualifier): value} for a place as of a stored timestamp (removed values excluded).'''
+	return {(f, q): v for f, q, v in conn.execute(STATE_AS_OF_SQL, (place, as_of_ts)) if v is not None}
+
+def facts_to_state(facts):
+	state = {}
+	for _, field, qualifier, value in facts:
+		state.setdefault((field, qualifier), value) # First occurrence wins, as in city_row_from_facts
+	return state
+
+def build_place_history(conn, city, state_name, html_path=CITY_HTML_PATH):
+	'''
+	Fold every new snapshot of one city page into the history tables.
+
+	:return: dict of counts {"parsed", "reused", "unchanged", "deltas"}
+	'''
+	place = "{}, {}".format(city, state_name)
+	stats = {"parsed": 0, "reused": 0, "unchanged": 0, "deltas": 0}
+	snapshots = find_all_html(os.path.abspath(html_path), city_page_id(city, state_name))
+	known = dict(conn.execute("SELECT snapshot_ts, content_hash FROM city_snapshots WHERE place = ?", (place,)).fetchall())
+	new = [(ts.strftime(TS_FORMAT), path) for ts, path in snapshots if ts.strftime(TS_FORMAT) not in known]
+	if not new:
+		return stats
+	states_by_hash = {}
+	if known and min(ts for ts, _ in new) < max(known):
+		# Backfilled an older snapshot: later deltas depend on it, so replay this place from scratch. States of content
+		# already parsed are rebuilt from the stored deltas first, so the replay only parses the new files
+		for ts, h in sorted(known.items()):
+			if h not in states_by_hash:
+				states_by_hash[h] = state_as_of(conn, place, ts)
+		conn.execute("DELETE FROM city_fact_history WHERE place = ?", (place,))
+		conn.execute("DELETE FROM city_snapshots WHERE place = ?", (place,))
+		known = {}
+		new = [(ts.strftime(TS_FORMAT), path) for ts, path in snapshots]
+
+	last_ts = max(known) if known else None
+	current = state_as_of(conn, place, last_ts) if last_ts else {}
+	prev_hash = known[last_ts] if last_ts else None
+	hash_to_ts = {h: ts for ts, h in sorted(known.items())}
+	for ts, path in new:
+		h = content_hash(path)
+		if h == prev_hash:
+			stats["unchanged"] += 1
+			new_state = current
+		elif h in states_by_hash:
+			stats["reused"] += 1
+			new_state = states_by_hash[h]
+		elif h in hash_to_ts:
+			# Page reverted to content we already parsed: rebuild its state from the deltas
+			stats["reused"] += 1
+			new_state = state_as_of(conn, place, hash_to_ts[h])
+		else:
+			stats["parsed"] += 1
+			facts = read_city_facts(cook_html(path), place)
+			new_state = facts_to_state(facts) if facts else {}
+		deltas = [(place, f, q, ts, v) for (f, q), v in new_state.items() if current.get((f, q)) != v]
+		deltas += [(place, f, q, ts, None) for (f, q) in current if (f, q) not in new_state]
+		conn.executemany("INSERT OR REPLACE INTO city_fact_history (place, field, qualifier, valid_from, value) VALUES (?, ?, ?, ?, ?)", deltas)
+		conn.execute("INSERT OR REPLACE INTO city_snapshots (place, snapshot_ts, content_hash, file_name) VALUES (?, ?, ?, ?)",
+					(place, ts, h, os.path.basename(path)))
+		stats["deltas"] += len(deltas)
+		hash_to_ts.setdefault(h, ts)
+		current, prev_hash = new_state, h
+	return stats
+
+def build_city_history(db_path=DB_PATH, html_path=CITY_HTML_PATH):
+	'''Update the history store for every team city; only snapshots not yet recorded are read.'''
+	conn = sqlite3.connect(db_path)
+	ensure_history_tables(conn)
+	totals = {"parsed": 0, "reused": 0, "unchanged": 0, "deltas": 0}
+	cities = conn.execute("SELECT DISTINCT City, State FROM minor_league_teams;").fetchall()
+	for city, state_name in cities:
+		try:
+			with conn: # One transaction per place
+				stats = build_place_history(conn, city, state_name, html_path=html_path)
+		except Exception as e:
+			print(f"Failed for {city}, {state_name}: {e}")
+			continue
+		for k, v in stats.items():
+			totals[k] += v
+	conn.close()
+	return totals
+
+def value_as_of(place, field, as_of, qualifier=None, db_path=DB_PATH):
+	'''
+	Value of a canonical field for a place as of a date.
+
+	:param place: "City, State" as used in the facts table
+	:param field: Canonical field (see crosswalks.INFOBOX_KEY_RULES), e.g. "population"
+	:param as_of: date/datetime/ISO string
+	:param qualifier: e.g. "metro"; if None, return {qualifier: value} for all qualifiers
+	'''
+	conn = sqlite3.connect(db_path)
+	ensure_history_tables(conn)
+	rows = {q: v for q, v in conn.execute(VALUE_AS_OF_SQL, (place, field, as_of_text(as_of))) if v is not None}
+	conn.close()
+	if qualifier is not None:
+		return rows.get(qualifier)
+	return rows
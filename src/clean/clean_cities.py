@@ -1,25 +1,27 @@
 # Imports
-import time
 import pandas as pd
 import datetime as dt
 import numpy as np
 import os, re
-from geopy.geocoders import Nominatim
 import sqlite3
 from src.utils.html import find_latest_html, cook_html, set_user_agent
+from src.clean.crosswalks import infobox_to_facts
+from src.utils.transport import get_transport
+from src.database.load_db import bulk_upsert, records_from_frame, ensure_columns
+from src.database.schema import CREATE_CITY_COORDS_INDEX_SQL
 import json
 
 # Constants
-SLEEP_TIME = 1
-USER_AGENT = set_user_agent(headers_file=os.path.abspath(os.path.join(".","user-agent.txt")))
-
-# Constants
+NOMINATIM_HOST = "nominatim.openstreetmap.org"
+USER_AGENT_FILE = "user-agent.txt"
 DB_PATH = os.path.abspath(os.path.join('.','database','milb.sqlite'))
 
 REQUIRED_COLUMNS = ['city', 'country', 'state', 'metro', 'urban_area', 'csa', 'county', 'province', 
 					'elevation', 'population_density', 'population_urbandensity', 'population_csa_density', 'fips_code', 
 					'year_founded_max', 'year_founded_min', 'area_max', 'area_min', 'pop_max', 'pop_min', 
-					'gdp_max', 'gdp_min', 'gnis_est', 'msa_est']
+					'gdp_max', 'gdp_min', 'gnis_est', 'msa_est', 'latitude', 'longitude']
+
+FACT_COLUMNS = ["place", "field", "qualifier", "value"]
 
 CREATE_TABLE_SQL = """
 	CREATE TABLE IF NOT EXISTS cities (
@@ -47,6 +49,8 @@ CREATE_TABLE_SQL = """
 	gdp_min FLOAT, 
 	gnis_est TEXT, 
 	msa_est TEXT,
+	latitude FLOAT,
+	longitude FLOAT,
 	created_on TEXT DEFAULT CURRENT_TIMESTAMP,
 	updated_on TEXT DEFAULT CURRENT_TIMESTAMP,
 	UNIQUE (city, state)
@@ -57,6 +61,7 @@ CREATE_UPDATE_TRIGGER_SQL = """
 	CREATE TRIGGER IF NOT EXISTS trg_cities_updated
 	AFTER UPDATE ON cities
 	FOR EACH ROW
+	WHEN NEW.updated_on IS OLD.updated_on
 	BEGIN
 		UPDATE cities
 		SET updated_on = CURRENT_TIMESTAMP
@@ -64,14 +69,20 @@ CREATE_UPDATE_TRIGGER_SQL = """
 	END;
 	"""
 
+DROP_UPDATE_TRIGGER_SQL = "DROP TRIGGER IF EXISTS trg_cities_updated;" # Recreate so older DBs pick up the WHEN clause
+
+UPSERT_KEY_COLUMNS = ["city", "state"]
+
+ADDED_COLUMNS = {"latitude": "FLOAT", "longitude": "FLOAT"} # Columns newer than some existing databases
+
 UPSERT_SQL = """
 INSERT INTO cities (
 	city, country, state, metro, urban_area, csa, county, province, elevation, 
 	population_density, population_urbandensity, population_csa_density,
 	fips_code, year_founded_max, year_founded_min, area_max, area_min,
-	pop_max, pop_min, gdp_max, gdp_min, gnis_est, msa_est
+	pop_max, pop_min, gdp_max, gdp_min, gnis_est, msa_est, latitude, longitude
 )
-VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
 ON CONFLICT (city, state) DO UPDATE SET
 	country=excluded.country,
 	metro=excluded.metro,
@@ -94,12 +105,15 @@ ON CONFLICT (city, state) DO UPDATE SET
 	gdp_min=excluded.gdp_min,
 	gnis_est=excluded.gnis_est,
 	msa_est=excluded.msa_est,
+	latitude=excluded.latitude,
+	longitude=excluded.longitude,
 	updated_on=CURRENT_TIMESTAMP;
 """
 
 
 # Functions
-def read_city_soup(soup, output_csv_path=None):
+def parse_city_infobox(soup):
+	'''Infobox key-value pairs {raw header: value text}; None if the page has no infobox.'''
 	# Check if soup looks like HTML
 	if not hasattr(soup, "find"):
 		return None
@@ -146,7 +160,12 @@ def read_city_soup(soup, output_csv_path=None):
 			).strip().replace("(", "").replace(")", "")
 			
 			infobox[header_text] = value_text
+	return infobox
 
+def read_city_soup(soup, output_csv_path=None):
+	infobox = parse_city_infobox(soup)
+	if infobox is None:
+		return None
 	# Convert to DataFrame
 	df = pd.DataFrame({k: [v] for k, v in infobox.items()})
 	if output_csv_path:
@@ -159,13 +178,14 @@ def add_lat_lon(city, state, header=None):
 	if not header:
 		# TODO: Throw exception?
 		return None, None
+	from geopy.geocoders import Nominatim # Only needed when geocoding
 	geolocator = Nominatim(user_agent=header) 
 	# Lat Lon 
 	if (city is None) | (state is None):
 		lat, lon = 999, 999
 	else:
+		get_transport().throttle(NOMINATIM_HOST) # Shared per-host budget instead of a fixed sleep
 		location = geolocator.geocode(city + ", " + state) # Address goes in arg
-		time.sleep(SLEEP_TIME)
 		try:
 			lat = location.latitude
 			lon = location.longitude
@@ -300,6 +320,62 @@ def extract_msa(x):
 	except:
 		return np.nan
 
+def city_page_id(city, state):
+	'''Archive file id for a city page, e.g. ("Akron", "Ohio") -> "akron,_ohio".'''
+	return "{},_{}".format(city.replace(" ","_").lower(),state.replace(" ","_").lower())
+
+def read_city_facts(soup, place, unknown_keys=None):
+	'''Sparse (place, field, qualifier, value) facts for a city page; None if the page has no infobox.'''
+	infobox = parse_city_infobox(soup)
+	if infobox is None:
+		return None
+	return infobox_to_facts(place, infobox, unknown_keys=unknown_keys)
+
+def city_row_from_facts(city, state, facts):
+	'''
+	Aggregate one city's facts into a cities table row (REQUIRED_COLUMNS).
+	Fields with several qualifiers (area, population, gdp, founded) are reduced to max/min.
+	'''
+	by_field = {}
+	for _, field, qualifier, value in facts:
+		by_field.setdefault(field, {}).setdefault(qualifier, value) # First occurrence wins, as in the infobox
+	def first(field, qualifier=""):
+		return by_field.get(field, {}).get(qualifier)
+	def parsed(field, parser):
+		return [v for v in (parser(x) for x in by_field.get(field, {}).values()) if pd.notna(v)]
+	def first_int(values):
+		return next((int(v) for v in values if isinstance(v, (int, np.integer))), np.nan)
+
+	years, areas, pops, gdps = parsed("founded", extract_year), parsed("area", extract_area_sqmi), parsed("population", extract_pop), parsed("gdp", extract_gdp)
+	row = {
+		"city": city,
+		"state": state,
+		"country": first("country"),
+		"metro": first("metro"),
+		"urban_area": first("urban_area"),
+		"csa": first("csa"),
+		"county": first("county"),
+		"province": first("province"),
+		"elevation": first("elevation"),
+		"population_density": first("population_density"),
+		"population_urbandensity": first("population_density", "urban"),
+		"population_csa_density": first("population_density", "csa"),
+		"fips_code": first("fips_code"),
+		"year_founded_max": int(max(years)) if years else None,
+		"year_founded_min": int(min(years)) if years else None,
+		"area_max": float(max(areas)) if areas else np.nan,
+		"area_min": float(min(areas)) if areas else np.nan,
+		"pop_max": float(max(pops)) if pops else np.nan,
+		"pop_min": float(min(pops)) if pops else np.nan,
+		"gdp_max": float(max(gdps)) if gdps else np.nan,
+		"gdp_min": float(min(gdps)) if gdps else np.nan,
+		"gnis_est": first_int(parsed("gnis", extract_gnis)),
+		"msa_est": first_int(parsed("msa", extract_msa)),
+		"latitude": None,
+		"longitude": None,
+	}
+	return row
+
 def clean_value(val):
 		if pd.isna(val):
 			return None
@@ -307,10 +383,12 @@ def clean_value(val):
 			return json.dumps(val)  # Convert to JSON string
 		return val
 
-def upsert_cities_more_robust(df, db_path=DB_PATH):
+def upsert_cities_more_robust(df, db_path=DB_PATH, records_dump_path=None):
 	"""
 	Upsert city records into SQLite database safely.
 	Cleans unsupported types and ensures proper records format.
+	Set-based through a staging table: only new or changed rows are written.
+	Returns {"inserted", "updated", "unchanged"} counts.
 	"""
 	if not isinstance(df, pd.DataFrame):
 		raise TypeError("Input must be a pandas DataFrame")
@@ -320,27 +398,30 @@ def upsert_cities_more_robust(df, db_path=DB_PATH):
 	if missing_cols:
 		raise ValueError(f"The following required columns are missing from the DataFrame: {missing_cols}")
 
-	# Create list of tuples for executemany
-	records = [
-		tuple(clean_value(row[col]) for col in REQUIRED_COLUMNS)
-		for row in df.to_dict("records")
-	]
+	# Create list of tuples, keys first (column-wise equivalent of clean_value)
+	value_cols = [col for col in REQUIRED_COLUMNS if col not in UPSERT_KEY_COLUMNS]
+	records = records_from_frame(df, UPSERT_KEY_COLUMNS + value_cols)
 
 	if not records:
 		return  # Nothing to insert
 	
-	with open(os.path.abspath(os.path.join(".","data","mid","cities_records.txt")), "w") as f:
-		f.write(str(records))
+	if records_dump_path: # Optional debug dump
+		with open(records_dump_path, "w") as f:
+			f.write(str(records))
 
 	# Upsert into SQLite
 	try:
 		conn = sqlite3.connect(db_path)
 		cursor = conn.cursor()
 		cursor.execute(CREATE_TABLE_SQL)
+		ensure_columns(conn, "cities", ADDED_COLUMNS)
+		cursor.execute(CREATE_CITY_COORDS_INDEX_SQL)
+		cursor.execute(DROP_UPDATE_TRIGGER_SQL)
 		cursor.execute(CREATE_UPDATE_TRIGGER_SQL)
-		cursor.executemany(UPSERT_SQL, records)
+		counts = bulk_upsert(conn, "cities", UPSERT_KEY_COLUMNS, value_cols, records)
 		conn.commit()
 		conn.close()
+		return counts
 	except Exception as e: 
 		print(e)
 
@@ -354,87 +435,29 @@ def drop_cities_table(db_path=DB_PATH):
 	conn.commit()
 	conn.close()
 
-def clean_cities():
+def clean_cities(db_path=DB_PATH, user_agent=None):
+	## Resolve config at call time
+	user_agent = user_agent or set_user_agent(headers_file=os.path.abspath(USER_AGENT_FILE))
 	## Grab cities from database
-	conn = sqlite3.connect(DB_PATH)
-	query = "SELECT City, State FROM minor_league_teams;"
-	cities_list, cities_df, infobox_unique_cols, failed_cities = [], [], [], []
+	conn = sqlite3.connect(db_path)
+	query = "SELECT DISTINCT City, State FROM minor_league_teams;"
+	city_rows, city_facts, failed_cities = [], [], []
+	unknown_keys = {}
 	for row in conn.execute(query):
 		try:
-			cities_list.append(row)
 			city, state = row
 			soup_html = cook_html(find_latest_html(os.path.abspath(os.path.join('.','data','raw','wikipedia','city')),
-												internal_text = "{},_{}".format(city.replace(" ","_").lower(),state.replace(" ","_").lower())))
-			table = read_city_soup(soup_html)
-			[infobox_unique_cols.append(x) for x in table.columns.tolist() if x not in infobox_unique_cols]
-			# Additional cleaning steps
-			table.insert(0, "State Name", state)
-			table.insert(0, "City Name", city)
-			table['Latitude'], table['Longitude'] = add_lat_lon(city, state, header=USER_AGENT)
-			first_values = {col: table[col].dropna().iloc[0] if not table[col].dropna().empty else None for col in table.columns}
-			for k, v in first_values.items():
-				if v is None:
-					print(f"{k} has all None values")
-				else:
-					print(k, " : ", v)
-			# Strip and consolidate information
-			keep_cols = ["City Name", "State Name", "Country", "Metro", "MSA", "Metropolitan statistical area", "Urban Area", "CSA", "County", "Province", 
-						"Area City", "Area Urban", "Area Metro", "Area CSA", "Area Censusdesignated place", "Area Federal capital city",
-						"Area City and provincial capital",
-						"Elevation", 
-						"Population City", "Population Density", "Population Urban", "Population Federal capital city",
-						"Population Urbandensity", "Population CSA density", "Population Metro", "Population CSA", "Population Region", "Population TriCities", 
-						"Population Censusdesignated place", "Population City and provincial capital",
-						"GDP Metro", "GDP", "GDP MSA", "GDP Total", "GDP Greensboro",
-						"FIPS code", "GNIS ID", "GNIS IDs"] 
-			group_agg = {"Founded": ["First settled","Founded","Named","Incorporated","Established", "First settlement", "Charter", "Chartered", "Adopted", 
-										"Foundation", "Founding", "City Charter", "Laid out", "Laid Out", "Incorporated as a town", "Incorporated as a city", "Incorporated as a village", "Incorporation",
-										"Constituted", "Municipal corporation"],
-						"Area_Geo":["Area City", "Area Urban", "Area Metro", "Area CSA", "Area Censusdesignated place", "Area Federal capital city",
-									"Area City and provincial capital"],
-						"Pop_Est":["Population City", "Population Urban", "Population Federal capital city", "Population Metro", 
-									"Population CSA", "Population Region", "Population TriCities", "Population Censusdesignated place", "Population City and provincial capital"],
-						"GDP":["GDP Metro", "GDP", "GDP MSA", "GDP Total", "GDP Greensboro"],
-						"GNIS":["GNIS ID", "GNIS IDs", "GNIS feature ID"],
-						"MSA":["MSA", "Metropolitan statistical area"]}
-			# Build out desired columns
-			table = table.reindex(columns=keep_cols + [item for lst in group_agg.values() for item in lst if item not in keep_cols])
-			# Aggregate founding
-			# founded_col = table.columns.intersection(group_agg["Founded"]) # Use these columns to filter; became unnecessary after reindex force including all listed above
-			founded_table = table[group_agg["Founded"]]
-			years_founded = founded_table.apply(lambda c: c.map(extract_year))
-			table["year_founded_max"] = years_founded.max(axis=1).astype("Int64")
-			table["year_founded_min"] = years_founded.min(axis=1).astype("Int64")	
-			table = table.drop(columns = group_agg["Founded"])
-			# Aggregate geo area
-			area_table = table[group_agg["Area_Geo"]]
-			area_sizes = area_table.apply(lambda c: c.map(extract_area_sqmi))
-			table["area_max"] = area_sizes.max(axis=1).astype("float")
-			table["area_min"] = area_sizes.min(axis=1).astype("float")
-			# Aggregate population
-			pop_table = table[group_agg["Pop_Est"]]
-			pop_ests = pop_table.apply(lambda c: c.map(extract_pop))
-			table["pop_max"] = pop_ests.max(axis=1).astype("float")
-			table["pop_min"] = pop_ests.min(axis=1).astype("float")
-			# Aggregate GDP 
-			gdp_table = table[group_agg["GDP"]]
-			gdp_ests = gdp_table.apply(lambda c: c.map(extract_gdp))
-			table["gdp_max"] = gdp_ests.max(axis=1).astype("float")
-			table["gdp_min"] = gdp_ests.min(axis=1).astype("float")
-			# Select GNIS
-			gnis = table[group_agg["GNIS"]]
-			table["gnis_est"] = choose_value(gnis.apply(lambda c: c.map(extract_gnis)))
-			# Select MSA
-			msas = table[group_agg["MSA"]]
-			table["msa_est"] = choose_value(msas.apply(lambda c: c.map(extract_msa)))
-			# Reindex
-			table = table.reindex(columns=[col for col in table.columns.tolist() if col not in [item for lst in group_agg.values() for item in lst]])
-			# Update column names to match SQL convention
-			table.columns = [col.lower().replace(" ","_") for col in table.columns.tolist()]
-			table = table.rename(columns={"city_name":"city"})
-			table = table.rename(columns={"state_name":"state"})
-			# Add to tables container
-			cities_df.append(table)
+												internal_text = city_page_id(city, state)))
+			# Long-format facts (only keys the page actually has), then one aggregated row per city
+			facts = read_city_facts(soup_html, "{}, {}".format(city, state), unknown_keys=unknown_keys)
+			if facts is None:
+				raise ValueError("No infobox found")
+			city_facts.extend(facts)
+			city_row = city_row_from_facts(city, state, facts)
+			lat, lon = add_lat_lon(city, state, header=user_agent)
+			if lat is not None and lat != 999: # 999 == geocoding failed
+				city_row["latitude"], city_row["longitude"] = lat, lon
+			city_rows.append(city_row)
 		except Exception as e:
 			print(f"Failed for {city}, {state}: {e}")
 			failed_cities.append((city, state))
@@ -442,20 +465,23 @@ def clean_cities():
 
 	# Close connection
 	conn.close()
-	# Columns to consider for future development 
-	with open(os.path.abspath(os.path.join(".","data","mid","cities_all_infobox_data.txt")), "w") as f:
-		for item in infobox_unique_cols:
-			f.write(f"{item}\n")
+	# Keys with no canonical rule yet (for review; add rules to crosswalks.INFOBOX_KEY_RULES)
+	with open(os.path.abspath(os.path.join(".","data","mid","cities_unknown_infobox_keys.txt")), "w") as f:
+		for key, count in sorted(unknown_keys.items(), key=lambda kv: -kv[1]):
+			f.write(f"{key}\t{count}\n")
 	# Print failed cities (temporary)
 	with open(os.path.abspath(os.path.join(".","data","mid","cities_failed.txt")), "w") as f:
 		for city in failed_cities:
 			f.write("{}, {}".format(city[0], city[1]))
 
+	# Sparse facts table
+	pd.DataFrame(city_facts, columns=FACT_COLUMNS).to_csv(os.path.abspath(os.path.join(".","data","mid","city_facts.csv")), index=False)
+
 	# Create df
-	cities_df = pd.concat(cities_df, axis=0)
+	cities_df = pd.DataFrame(city_rows)
 	cities_df.to_csv(os.path.abspath(os.path.join(".","data","fin","cities_df.csv")))
 
 	## Inject cities_df into DB table
-	upsert_cities_more_robust(cities_df, db_path=DB_PATH) # NOTE: Doesn't work, param 13 error nonstandard
+	upsert_cities_more_robust(cities_df, db_path=db_path) # NOTE: Doesn't work, param 13 error nonstandard
 
 # clean_cities()
@@ -6,6 +6,9 @@ import os, re, glob
 from io import StringIO
 import sqlite3
 from src.utils.html import find_latest_html, cook_html
+from src.database.load_db import bulk_upsert, ensure_columns
+from src.clean.team_names import normalize_team_names
+from src.database.schema import ensure_team_history, TEAM_HISTORY_KEY_COLUMNS, TEAM_HISTORY_VALUE_COLUMNS, TEAM_NAME_COLUMNS
 
 # Constants
 DB_PATH = os.path.abspath(os.path.join('.','database','milb.sqlite'))
@@ -24,6 +27,8 @@ CREATE_TABLE_SQL = """
 	TableIndex INTEGER,
 	Affiliates TEXT,
 	Mascot TEXT,
+	HasCityPrefix INTEGER,
+	TeamFingerprint INTEGER,
 	created_on TEXT DEFAULT CURRENT_TIMESTAMP,
 	updated_on TEXT DEFAULT CURRENT_TIMESTAMP,
 	UNIQUE (Team, City, League)
@@ -34,6 +39,7 @@ CREATE_UPDATE_TRIGGER_SQL = """
 	CREATE TRIGGER IF NOT EXISTS trg_minor_league_teams_updated
 	AFTER UPDATE ON minor_league_teams
 	FOR EACH ROW
+	WHEN NEW.updated_on IS OLD.updated_on
 	BEGIN
 		UPDATE minor_league_teams
 		SET updated_on = CURRENT_TIMESTAMP
@@ -41,62 +47,107 @@ CREATE_UPDATE_TRIGGER_SQL = """
 	END;
 	"""
 
-UPSERT_SQL = """
-	INSERT INTO minor_league_teams (
-		Team, Division, City, State, Stadium,
-		Capacity, Affiliate, League,
-		TableIndex, Affiliates, Mascot
-	)
-	VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-	ON CONFLICT (Team, City, League) DO UPDATE SET
-		Division=excluded.Division,
-		State=excluded.State,
-		Stadium=excluded.Stadium,
-		Capacity=excluded.Capacity,
-		Affiliate=excluded.Affiliate,
-		TableIndex=excluded.TableIndex,
-		Affiliates=excluded.Affiliates,
-		Mascot=excluded.Mascot;
-	"""
+DROP_UPDATE_TRIGGER_SQL = "DROP TRIGGER IF EXISTS trg_minor_league_teams_updated;" # Recreate so older DBs pick up the WHEN clause
+
+SKIP_SECTIONS = {"Dominican Summer League"} # Excluded from the current-teams table for now
+CITY_ALL_IN_RE = re.compile(r"^City \(all in (.+)\)$")
+LEAGUE_STATES = {"Arizona Fall League": "Arizona", "Dominican Summer League": "Dominican Republic"} # Tables without a state column
+COLUMN_ALIASES = {"Club": "Team", "Team name": "Team", "Ballpark": "Stadium", "Home ballpark": "Stadium", "MLB affiliate": "Affiliate",
+					"MLB affiliation": "Affiliate", "Affiliation": "Affiliate"}
+
+UPSERT_KEY_COLUMNS = ["Team", "City", "League"]
+UPSERT_VALUE_COLUMNS = ["Division", "State", "Stadium", "Capacity", "Affiliate", "TableIndex", "Affiliates", "Mascot", "HasCityPrefix", "TeamFingerprint"]
 
 # Functions
-def read_milb_soup(soup, output_csv_path=None):
+def _rule_column_aliases(df, league):
+	'''Older season pages name the same columns differently.'''
+	renames = {c: COLUMN_ALIASES[c] for c in df.columns if c in COLUMN_ALIASES and COLUMN_ALIASES[c] not in df.columns}
+	return df.rename(columns=renames) if renames else None
+
+def _rule_city_all_in(df, league):
+	'''City (all in Florida) style headers: the state lives in the column name.'''
+	city_col = [c for c in df.columns if CITY_ALL_IN_RE.match(str(c))]
+	if not city_col:
+		return None
+	df["City"], df["State"] = df[city_col[0]], CITY_ALL_IN_RE.match(city_col[0]).group(1)
+	return df.drop(columns=city_col)
+
+def _rule_league_state(df, league):
+	'''Leagues whose tables have no state column at all (e.g. Arizona Fall League).'''
+	if league not in LEAGUE_STATES or "State" in df.columns:
+		return None
+	df["State"] = LEAGUE_STATES[league]
+	return df
+
+def _rule_province(df, league):
+	if "Province" not in df.columns:
+		return None
+	df["State"] = df["Province"]
+	return df.drop(columns="Province")
+
+def _rule_state_slash(df, league):
+	'''State/province, State/territory, ... columns.'''
+	cols = df.filter(regex='^State/', axis=1).columns.tolist()
+	if "State" in df.columns or not cols:
+		return None
+	df["State"] = df[cols[0]]
+	return df.drop(columns=cols)
+
+def _rule_location(df, league):
+	'''Location as "City, State" (older season pages).'''
+	if "Location" not in df.columns or "City" in df.columns:
+		return None
+	parts = df["Location"].astype(str).str.rsplit(",", n=1, expand=True)
+	df["City"] = parts[0].str.strip()
+	if "State" not in df.columns:
+		df["State"] = parts[1].str.strip() if parts.shape[1] > 1 else None
+	return df.drop(columns="Location")
+
+# (name, rule): each rule gets (df, league) and returns the fixed frame, or None if it does not apply. Applied in order;
+# add new layouts here rather than in read_milb_soup
+COLUMN_RULES = [
+	("column_aliases", _rule_column_aliases),
+	("city_all_in", _rule_city_all_in),
+	("league_state", _rule_league_state),
+	("province", _rule_province),
+	("state_slash", _rule_state_slash),
+	("location", _rule_location),
+]
+
+def apply_column_rules(df, league, rules=None):
+	for name, rule in (COLUMN_RULES if rules is None else rules):
+		fixed = rule(df, league)
+		if fixed is not None:
+			df = fixed
+	return df
+
+def read_milb_soup(soup, output_csv_path=None, skip_sections=SKIP_SECTIONS, rules=None, league=None):
+	'''Team tables -> one frame. League is the header above each table, or `league` for single-league (season) pages.'''
 	# Check if soup looks like HTML
 	if not hasattr(soup, "find"):
 		return None
 	# Parse sequentially: want headers as column value joined w their associated tables
 	ti = 1
+	h_txt = None
 	df_list = []
 	for tag in soup.find_all(): # Sequential 
 		if tag.name in ['h1','h2','h3','h4']: # Section headers 
 			h_txt = tag.text.replace("\n","").replace("\t","") # Not 'Contents'; Set this so that the following table can grab
 		elif tag.name in ['table']:
-			if h_txt=="Dominican Summer League": # Exclude DSL for now
+			if h_txt in skip_sections:
 				continue
 			# Setting up the dataframe(s)
 			df = pd.read_html(StringIO(str(tag)))[0] 
-			# Adding info and handling nonstandard columns
-			df["League"], df["TableIndex"] = h_txt, ti # Grab most recent Header text, establish table seq number
-			city_dict = {'City (all in Florida)':'Florida','City (all in California)':'California', 'City (all in Arizona)':'Arizona'}
-			city_col = [c for c in df.columns if c in list(city_dict.keys())] # Need to handle nonstandard City columns
-			if set(city_col): # set(col_headers).intersection(set(['City (all in Florida)','City (all in California)', 'City (all in Arizona)'])):
-				# Replace 'City in XX' columns
-				df["City"], df["State"] = df[city_col[0]], city_dict[city_col[0]]
-				df = df.drop(columns=city_col)
-			if h_txt=="Arizona Fall League": # Known 'State' col missing from this wikitable
-				df["State"] = "Arizona"
-			try:
-				df["State"] = df["Province"]
-				df = df.drop(columns="Province")
-			except:
-				pass
-			if 'State' not in df.columns and 'Province' not in df.columns:
-				try:
-					df["State"] = df.filter(regex='^State/', axis=1).iloc[:,0]
-					df = df.drop(columns=df.filter(regex='^State/', axis=1).columns.tolist())
-				except:
-					print("ERROR: New case in input tables.")
-					pass
+			if isinstance(df.columns, pd.MultiIndex): # Two-row headers (some season pages): keep the lower row
+				df.columns = [c[-1] for c in df.columns]
+			# Adding info and handling nonstandard columns (COLUMN_RULES)
+			df["League"], df["TableIndex"] = league or h_txt, ti # Grab most recent Header text, establish table seq number
+			df = apply_column_rules(df, league or h_txt, rules)
+			if "Team" not in df.columns or "City" not in df.columns: # Navboxes, standings, ...
+				continue
+			if "State" not in df.columns:
+				print(f"ERROR: New case in input tables ({h_txt}: {list(df.columns)}).")
+				df["State"] = ""
 			# Strip leading and trailing " " from City, State
 			df["City"], df["State"] = df["City"].astype(str).str.strip(), df["State"].astype(str).str.strip()
 			# Export just in case
@@ -104,6 +155,8 @@ def read_milb_soup(soup, output_csv_path=None):
 			ti += 1
    
 	# Join and reformat all dfs
+	if not df_list:
+		return None
 	df = pd.concat(df_list, axis=0).reset_index(drop=True)
 	if output_csv_path:
 		df.to_csv(output_csv_path)
@@ -122,36 +175,96 @@ def get_mascot_name(row):
 	else:
 		return team
 
+def migrate_team_names(conn, table, key_columns):
+	'''
+	One-time cleanup of rows stored before the name pass (TeamFingerprint IS NULL): Team/City are cleaned in place and
+	Mascot/HasCityPrefix/TeamFingerprint filled. Where the cleaned key already exists (a later run inserted the cleaned
+	name next to the old one), the old row is dropped and team_history.team_id is pointed at the row that stays.
+	A no-op once every row has a fingerprint. The caller commits.
+
+	:return: dict {"renamed", "merged"}
+	'''
+	counts = {"renamed": 0, "merged": 0}
+	if conn.execute(f"SELECT 1 FROM {table} WHERE TeamFingerprint IS NULL LIMIT 1").fetchone() is None:
+		return counts
+	df = pd.read_sql_query(f"SELECT id, {', '.join(key_columns)}, TeamFingerprint FROM {table}", conn)
+	clean = normalize_team_names(df)
+	df["_legacy"] = df["TeamFingerprint"].isna()
+	df["_dirty"] = ((df["Team"].fillna("") != clean["Team"].fillna("")) | (df["City"].fillna("") != clean["City"].fillna(""))).to_numpy()
+	clean["_keep_rank"] = (~df["_dirty"]).astype(int) * 2 + (~df["_legacy"]).astype(int) # Prefer rows already clean, then newer
+	clean = clean.sort_values(["_keep_rank", "id"], ascending=False, kind="stable")
+	keys = list(key_columns)
+	keep_ids = clean.drop_duplicates(keys, keep="first").set_index(keys)["id"]
+	kept_for = clean.join(keep_ids.rename("_kept_id"), on=keys)
+	dropped = kept_for[kept_for["id"] != kept_for["_kept_id"]]
+	if len(dropped):
+		if table == "minor_league_teams" and conn.execute("SELECT name FROM sqlite_master WHERE name = 'team_history'").fetchone():
+			conn.executemany("UPDATE team_history SET team_id = ? WHERE team_id = ?",
+							[(int(k), int(i)) for i, k in zip(dropped["id"], dropped["_kept_id"])])
+		conn.executemany(f"DELETE FROM {table} WHERE id = ?", [(int(i),) for i in dropped["id"]])
+		counts["merged"] = len(dropped)
+	todo = kept_for[(kept_for["id"] == kept_for["_kept_id"]) & df.set_index("id").loc[kept_for["id"], "_legacy"].to_numpy()]
+	conn.executemany(f"UPDATE {table} SET Team = ?, City = ?, Mascot = ?, HasCityPrefix = ?, TeamFingerprint = ? WHERE id = ?", [
+		(r.Team, r.City, r.Mascot, int(r.HasCityPrefix), int(r.TeamFingerprint), int(r.id)) for r in todo.itertuples(index=False)
+	])
+	counts["renamed"] = int(df.set_index("id").loc[todo["id"], "_dirty"].sum())
+	if counts["renamed"] or counts["merged"]:
+		print(f"{table}: cleaned {counts['renamed']} stored team names, merged {counts['merged']} duplicate rows")
+	return counts
+
 def upsert_minor_league_teams(df, db_path=DB_PATH):
+	'''Set-based upsert via a staging table; returns {"inserted", "updated", "unchanged"} counts.'''
 	conn = sqlite3.connect(db_path)
 	cursor = conn.cursor()
 
 	cursor.execute(CREATE_TABLE_SQL)
+	ensure_columns(conn, "minor_league_teams", TEAM_NAME_COLUMNS)
+	cursor.execute(DROP_UPDATE_TRIGGER_SQL)
 	cursor.execute(CREATE_UPDATE_TRIGGER_SQL)
+	migrate_team_names(conn, "minor_league_teams", UPSERT_KEY_COLUMNS)
 	records = [
 	(
 		row.Team,
-		row.Division,
 		row.City,
+		row.League,
+		row.Division,
 		row.State,
 		row.Stadium,
 		int(row.Capacity) if pd.notna(row.Capacity) else None,
 		row.Affiliate,
-		row.League,
 		int(row.TableIndex) if pd.notna(row.TableIndex) else None,
-		row.Affiliates,
+		getattr(row, "Affiliates", None), # Only some pages have this column
 		row.Mascot,
+		int(row.HasCityPrefix),
+		int(row.TeamFingerprint),
 	)
 	for row in df.itertuples(index=False)
 	]
-	cursor.executemany(UPSERT_SQL, records)
+	counts = bulk_upsert(conn, "minor_league_teams", UPSERT_KEY_COLUMNS, UPSERT_VALUE_COLUMNS, records)
+	conn.commit()
+	conn.close()
+	return counts
+
+def snapshot_team_history(db_path=DB_PATH, season=None):
+	'''Copy the current minor_league_teams into team_history for a season (default: this year).'''
+	season = season or dt.date.today().year
+	conn = sqlite3.connect(db_path)
+	ensure_team_history(conn)
+	migrate_team_names(conn, "team_history", TEAM_HISTORY_KEY_COLUMNS)
+	records = conn.execute("""
+		SELECT ?, Team, City, League, id, Division, State, Stadium, Capacity, Affiliate, Mascot, HasCityPrefix, TeamFingerprint
+		FROM minor_league_teams
+	""", (season,)).fetchall()
+	counts = bulk_upsert(conn, "team_history", TEAM_HISTORY_KEY_COLUMNS, TEAM_HISTORY_VALUE_COLUMNS, records)
 	conn.commit()
 	conn.close()
+	return counts
 
-def clean_teams():
-	soup_html = cook_html(find_latest_html(os.path.abspath(os.path.join('.','data','raw','wikipedia','milb'))))
+def clean_teams(db_path=DB_PATH, html_path=os.path.join('.','data','raw','wikipedia','milb')):
+	soup_html = cook_html(find_latest_html(os.path.abspath(html_path)))
 	table = read_milb_soup(soup_html)
-	table["Mascot"] = table.apply(get_mascot_name, axis=1)
-	upsert_minor_league_teams(table, db_path=DB_PATH)
+	table = normalize_team_names(table) # Cleaned Team/City + Mascot (same result as get_mascot_name, column-wise)
+	upsert_minor_league_teams(table, db_path=db_path)
+	snapshot_team_history(db_path=db_path)
 
 # clean_teams()
\ No newline at end of file
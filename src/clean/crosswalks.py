@@ -0,0 +1,136 @@
+'''
+Docstring for clean.crosswalks
+
+Raw -> canonical mappings shared by the clean stage.
+- Infobox keys: header text as read_city_soup emits it ("GDP Greensboro", "Area State capital city", "Population TriCities")
+  maps to a canonical (field, qualifier) pair, e.g. ("gdp", "greensboro"), ("area", "state capital city").
+- CBSA vintages: CBSA codes of one delineation vintage (2000/2010/2020) map onto another through shared counties.
+'''
+
+# Imports
+import os, re
+from functools import lru_cache
+import pandas as pd
+
+# Constants
+# Ordered (pattern, field) rules; first full match wins. Named group "q" becomes the qualifier ("" if absent).
+# Keys arrive stripped of punctuation/digits by read_city_soup, so patterns only need to handle words and spaces.
+FOUNDED_KEYS = ["first settled", "first settlement", "settled", "founded", "named", "incorporated", "incorporation",
+				"incorporated as a town", "incorporated as a city", "incorporated as a village", "established",
+				"charter", "chartered", "city charter", "adopted", "foundation", "founding", "laid out",
+				"constituted", "municipal corporation"]
+# Qualifiers the aggregates (max/min in city_row_from_facts) accept; any other "Population ..."/"Area ..."/"GDP ..." key
+# goes to unknown_keys instead of being parsed as a number. Add new ones here once checked.
+POPULATION_QUALIFIERS = ["city", "town", "village", "urban", "metro", "msa", "csa", "region", "tricities", "total", "estimate",
+						"censusdesignated place", "federal capital city", "state capital city", "city and provincial capital"]
+AREA_QUALIFIERS = ["city", "town", "village", "urban", "metro", "csa", "total", "censusdesignated place", "federal capital city",
+					"state capital city", "city and provincial capital"]
+GDP_QUALIFIERS = ["metro", "msa", "total", "greensboro", "charlotte"]
+
+INFOBOX_KEY_RULES = [
+	(r"(?:population|gdp|area) (?P<q>summer)(?: dst)?", "time_zone"), # The DST row, filed under the preceding group header
+	(r"population\s*(?P<q>.*?)\s*density", "population_density"),
+	(r"population rank", "population_rank"),
+	(r"population(?: (?P<q>" + "|".join(sorted(POPULATION_QUALIFIERS, key=len, reverse=True)) + r"))?", "population"),
+	(r"area codes?", "area_code"),
+	(r"area (?P<q>land|water)", "area_component"),
+	(r"area(?: (?P<q>" + "|".join(sorted(AREA_QUALIFIERS, key=len, reverse=True)) + r"))?", "area"),
+	(r"gdp(?: (?P<q>" + "|".join(sorted(GDP_QUALIFIERS, key=len, reverse=True)) + r"))?", "gdp"),
+	(r"government(?: (?P<q>.+))?", "government"),
+	(r"(?P<q>" + "|".join(sorted(FOUNDED_KEYS, key=len, reverse=True)) + r")", "founded"),
+	(r"gnis(?: feature)? ids?", "gnis"),
+	(r"msa|metropolitan statistical area", "msa"),
+	(r"csa|combined statistical area", "csa"),
+	(r"urban area", "urban_area"),
+	(r"metro(?:politan area)?", "metro"),
+	(r"country", "country"),
+	(r"state", "state"),
+	(r"province", "province"),
+	(r"region", "region"),
+	(r"county|counties", "county"),
+	(r"elevation(?: (?P<q>.+))?", "elevation"),
+	(r"fips code", "fips_code"),
+	(r"zip codes?", "zip_code"),
+	(r"time zone(?: (?P<q>.+))?", "time_zone"),
+	(r"demonyms?", "demonym"),
+	(r"named after", "named_after"),
+	(r"website", "website"),
+	(r"primary airport", "airport"),
+	(r"public transportation", "public_transportation"),
+]
+DELINEATION_PATH = os.path.join(".","data","raw","census","delineation")
+COMPILED_KEY_RULES = [(re.compile(pattern, re.IGNORECASE), field) for pattern, field in INFOBOX_KEY_RULES]
+
+# Functions
+@lru_cache(maxsize=None)
+def canonicalize_key(raw_key):
+	'''
+	Map a raw infobox key to (field, qualifier); None if no rule matches.
+	Cached by raw key: each distinct header is matched against the rule table once per process.
+	'''
+	key = " ".join(str(raw_key).split()).lower()
+	for pattern, field in COMPILED_KEY_RULES:
+		m = pattern.fullmatch(key)
+		if m:
+			qualifier = m.groupdict().get("q") or ""
+			return field, qualifier.strip()
+	return None
+
+def infobox_to_facts(place, infobox, unknown_keys=None):
+	'''
+	Long-format facts for one infobox: [(place, field, qualifier, value), ...].
+
+	:param place: Place label, e.g. "Greensboro, North Carolina"
+	:param infobox: {raw key: value text} as parsed from the page
+	:param unknown_keys: Optional dict/Counter; unmatched raw keys are counted here instead of emitted
+	'''
+	facts = []
+	for raw_key, value in infobox.items():
+		if value is None or value == "":
+			continue
+		canonical = canonicalize_key(raw_key)
+		if canonical is None:
+			if unknown_keys is not None:
+				unknown_keys[raw_key] = unknown_keys.get(raw_key, 0) + 1
+			continue
+		facts.append((place, canonical[0], canonical[1], value))
+	return facts
+
+def load_cbsa_delineation(vintage, delineation_path=DELINEATION_PATH):
+	'''
+	County -> CBSA membership for one delineation vintage: DataFrame [cbsa_code, county_fips].
+	Reads cbsa_delineation_{vintage}.csv, a CSV export of the Census "list1" delineation file
+	(https://www.census.gov/geographies/reference-files/time-series/demo/metro-micro/delineation-files.html).
+	'''
+	path = os.path.join(delineation_path, f"cbsa_delineation_{vintage}.csv")
+	if not os.path.exists(path):
+		raise FileNotFoundError(f"Missing CBSA delineation file for vintage {vintage}: {path}")
+	df = pd.read_csv(path, dtype=str)
+	cols = {re.sub(r"\s+", " ", c).strip().lower(): c for c in df.columns}
+	def col(name):
+		match = next((c for key, c in cols.items() if name in key), None)
+		if match is None:
+			raise ValueError(f"Delineation file {path} has no '{name}' column")
+		return match
+	out = pd.DataFrame({
+		"cbsa_code": df[col("cbsa code")].str.strip().str.zfill(5),
+		"county_fips": df[col("fips state code")].str.strip().str.zfill(2) + df[col("fips county code")].str.strip().str.zfill(3),
+	})
+	return out.dropna().drop_duplicates().reset_index(drop=True)
+
+def cbsa_vintage_crosswalk(source_vintage, target_vintage, delineation_path=DELINEATION_PATH):
+	'''
+	Map CBSA codes between vintages: DataFrame [source_cbsa, target_cbsa, share].
+	Each source CBSA goes to the target CBSA holding most of its counties; share is that fraction of its counties.
+	'''
+	source = load_cbsa_delineation(source_vintage, delineation_path)
+	if str(source_vintage) == str(target_vintage):
+		codes = source["cbsa_code"].drop_duplicates()
+		return pd.DataFrame({"source_cbsa": codes, "target_cbsa": codes, "share": 1.0}).reset_index(drop=True)
+	target = load_cbsa_delineation(target_vintage, delineation_path)
+	merged = source.merge(target, on="county_fips", how="inner", suffixes=("_source", "_target"))
+	counts = merged.groupby(["cbsa_code_source", "cbsa_code_target"]).size().rename("n").reset_index()
+	counts["share"] = counts["n"] / counts["cbsa_code_source"].map(source.groupby("cbsa_code").size())
+	best = counts.sort_values(["cbsa_code_source", "share", "cbsa_code_target"], ascending=[True, False, True]).drop_duplicates("cbsa_code_source")
+	best = best.rename(columns={"cbsa_code_source": "source_cbsa", "cbsa_code_target": "target_cbsa"})
+	return best[["source_cbsa", "target_cbsa", "share"]].reset_index(drop=True)
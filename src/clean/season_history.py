@@ -0,0 +1,211 @@
+'''
+Docstring for clean.season_history
+
+Bulk ingestion of archived season pages (e.g. "2005 Eastern League season") into team_history.
+- Pages are archived by cook_season_soup as wiki_<yyyy>_<league>_season_<timestamp>.html; the latest snapshot of each
+  page is used and the season is the year in its name
+- Pages are parsed in a process pool (bs4 + read_html are CPU bound); read_milb_soup and its COLUMN_RULES handle the
+  table layouts, so a new layout is a new rule in clean_teams rather than a branch here
+- At most `window` pages are in flight: each parsed page comes back as plain record tuples, is upserted and committed,
+  then dropped, so memory stays flat however many seasons are archived
+- season_pages remembers the content hash of every ingested file; re-runs only parse new or changed pages
+- A changed page (new content or a newer snapshot of it) replaces its previous ingest: team_history rows of the
+  (season, League)s it listed before that it no longer lists are deleted in the same transaction as the upsert
+'''
+
+# Imports
+import datetime as dt
+import json, os, re, sqlite3
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+import pandas as pd
+from src.utils.html import cook_html
+from src.clean.clean_teams import read_milb_soup, migrate_team_names
+from src.clean.team_names import normalize_team_names
+from src.clean.city_history import content_hash
+from src.database.load_db import bulk_upsert, ensure_columns
+from src.database.schema import ensure_team_history, link_team_ids, TEAM_HISTORY_KEY_COLUMNS, TEAM_HISTORY_VALUE_COLUMNS
+
+# Constants
+DB_PATH = os.path.abspath(os.path.join('.','database','milb.sqlite'))
+SEASON_HTML_PATH = os.path.join('.','data','raw','wikipedia','season')
+SEASON_FILE_RE = re.compile(r"wiki_(.*?)_(\d{8}_\d{6})\.html")
+YEAR_RE = re.compile(r"(?<!\d)(1[89]\d{2}|20\d{2})(?!\d)")
+MULTI_LEAGUE_TITLES = ("Minor League Baseball",) # Pages listing several leagues: the section header is the league
+VALUE_COLUMNS = [c for c in TEAM_HISTORY_VALUE_COLUMNS if c != "team_id"] # Left to link_team_ids, never overwritten here
+
+CREATE_SEASON_PAGES_SQL = """
+	CREATE TABLE IF NOT EXISTS season_pages (
+	file_name TEXT PRIMARY KEY,
+	content_hash TEXT NOT NULL,
+	season INTEGER NOT NULL,
+	league TEXT,
+	n_rows INTEGER,
+	ingested_on TEXT DEFAULT CURRENT_TIMESTAMP
+);
+"""
+SEASON_PAGES_ADDED_COLUMNS = {"leagues": "TEXT"} # JSON list of the leagues the page's rows were stored under
+
+# Functions
+def season_page_paths(html_path=SEASON_HTML_PATH):
+	'''[(season, path)] for the latest snapshot of every archived season page, oldest season first.'''
+	latest = {}
+	for filename in os.listdir(html_path):
+		match = SEASON_FILE_RE.fullmatch(filename)
+		year = YEAR_RE.search(match.group(1)) if match else None
+		if not year:
+			continue
+		slug, stamp = match.group(1), match.group(2)
+		if slug not in latest or stamp > latest[slug][1]:
+			latest[slug] = (int(year.group(1)), stamp, os.path.join(html_path, filename))
+	return sorted((season, path) for season, _, path in latest.values())
+
+def clean_header(text):
+	'''"2005 Eastern League season[edit]" -> "Eastern League"; None stays None.'''
+	if text is None:
+		return None
+	text = re.sub(r"\[edit\]$", "", text.strip())
+	text = YEAR_RE.sub("", text, count=1) if YEAR_RE.match(text) else text
+	return re.sub(r"\s+season$", "", text.strip(), flags=re.IGNORECASE).strip()
+
+def page_league(soup):
+	'''League named by the page title, or None for pages covering several leagues.'''
+	title = soup.find("h1") if hasattr(soup, "find") else None
+	if title is None:
+		return None
+	league = clean_header(title.get_text(" ", strip=True))
+	if not league or any(t in league for t in MULTI_LEAGUE_TITLES):
+		return None
+	return league
+
+def season_records(df, season, league=None):
+	'''Parsed season tables -> tuples ordered TEAM_HISTORY_KEY_COLUMNS + VALUE_COLUMNS.'''
+	df = df.copy()
+	if not league:
+		df["League"] = df["League"].map(clean_header)
+	for col in ["Division", "Stadium", "Capacity", "Affiliate"]:
+		if col not in df.columns:
+			df[col] = None
+	df = normalize_team_names(df[df["Team"].notna() & df["League"].notna()])
+	df["Capacity"] = pd.to_numeric(df["Capacity"].astype(str).str.replace(",", "", regex=False), errors="coerce")
+	df["season"] = season
+	df["HasCityPrefix"] = df["HasCityPrefix"].astype(int)
+	df = df[TEAM_HISTORY_KEY_COLUMNS + VALUE_COLUMNS].astype(object)
+	return list(df.where(df.notna(), None).itertuples(index=False, name=None))
+
+def parse_season_page(season, path):
+	'''Worker: one archived page -> (path, league, records). Top level so the process pool can pickle it.'''
+	soup = cook_html(path)
+	league = page_league(soup)
+	df = read_milb_soup(soup, skip_sections=(), league=league)
+	return path, league, ([] if df is None else season_records(df, season, league))
+
+def ensure_season_pages(conn):
+	ensure_team_history(conn)
+	conn.execute(CREATE_SEASON_PAGES_SQL)
+	ensure_columns(conn, "season_pages", SEASON_PAGES_ADDED_COLUMNS)
+
+def page_slug(file_name):
+	'''Archive name without its timestamp: the same for every snapshot of a page.'''
+	match = SEASON_FILE_RE.fullmatch(file_name)
+	return match.group(1) if match else file_name
+
+def previous_ingests(conn, file_name):
+	'''Earlier ingests of this page (this file or an older snapshot of it): [(file_name, season, leagues)].'''
+	slug, out = page_slug(file_name), []
+	for name, season, league, leagues in conn.execute("SELECT file_name, season, league, leagues FROM season_pages"):
+		if page_slug(name) == slug:
+			out.append((name, season, json.loads(leagues) if leagues else ([league] if league else [])))
+	return out
+
+def remove_dropped_rows(conn, previous, records):
+	'''Delete the team_history rows of previously ingested (season, League)s that the new records no longer list.'''
+	keep = {tuple(r[:len(TEAM_HISTORY_KEY_COLUMNS)]) for r in records}
+	key_list = ", ".join(TEAM_HISTORY_KEY_COLUMNS)
+	dropped = []
+	for _, season, leagues in previous:
+		if not leagues:
+			continue
+		rows = conn.execute(f"SELECT rowid, {key_list} FROM team_history WHERE season = ? AND League IN ({', '.join('?' for _ in leagues)})",
+							(season, *leagues)).fetchall()
+		dropped += [(row[0],) for row in rows if tuple(row[1:]) not in keep]
+	conn.executemany("DELETE FROM team_history WHERE rowid = ?", dropped)
+	return len(dropped)
+
+def _store(conn, season, path, digest, league, records, totals):
+	file_name = os.path.basename(path)
+	previous = previous_ingests(conn, file_name)
+	counts = bulk_upsert(conn, "team_history", TEAM_HISTORY_KEY_COLUMNS, VALUE_COLUMNS, records)
+	# A page that now parses to nothing keeps its old rows: more likely a layout we can't read than an empty season
+	counts["removed"] = remove_dropped_rows(conn, previous, records) if records else 0
+	conn.executemany("DELETE FROM season_pages WHERE file_name = ?", [(name,) for name, _, _ in previous])
+	leagues = sorted({r[TEAM_HISTORY_KEY_COLUMNS.index("League")] for r in records})
+	conn.execute("INSERT INTO season_pages (file_name, content_hash, season, league, n_rows, ingested_on, leagues) VALUES (?, ?, ?, ?, ?, ?, ?)",
+				(file_name, digest, season, league, len(records), dt.datetime.now().isoformat(sep=" ", timespec="seconds"), json.dumps(leagues)))
+	conn.commit()
+	for key, value in counts.items():
+		totals[key] += value
+	totals["pages"] += 1
+	if not records:
+		print(f"No team tables: {os.path.basename(path)}")
+
+def ingest_season_pages(db_path=DB_PATH, html_path=SEASON_HTML_PATH, max_workers=None, window=None, refresh=False):
+	'''
+	Parse every new or changed season page and upsert its teams into team_history.
+
+	:param max_workers: Pool size (default: os.cpu_count()); 0 parses in this process
+	:param window: Most pages in flight at once (default: 2 x workers)
+	:param refresh: Re-parse pages whose content hash is already recorded
+	:return: dict of counts {"pages", "skipped", "failed", "inserted", "updated", "unchanged", "removed"}
+	'''
+	conn = sqlite3.connect(db_path)
+	ensure_season_pages(conn)
+	migrate_team_names(conn, "team_history", TEAM_HISTORY_KEY_COLUMNS)
+	conn.commit()
+	known = dict(conn.execute("SELECT file_name, content_hash FROM season_pages").fetchall())
+	todo = []
+	totals = {"pages": 0, "skipped": 0, "failed": 0, "inserted": 0, "updated": 0, "unchanged": 0, "removed": 0}
+	for season, path in season_page_paths(os.path.abspath(html_path)):
+		digest = content_hash(path)
+		if not refresh and known.get(os.path.basename(path)) == digest:
+			totals["skipped"] += 1
+			continue
+		todo.append((season, path, digest))
+
+	if max_workers == 0:
+		for season, path, digest in todo:
+			try:
+				_, league, records = parse_season_page(season, path)
+			except Exception as e:
+				print(f"Season page failed: {os.path.basename(path)} ({e})")
+				totals["failed"] += 1
+				continue
+			_store(conn, season, path, digest, league, records, totals)
+	elif todo:
+		workers = max_workers or os.cpu_count() or 1
+		window = window or 2 * workers
+		pages = iter(todo)
+		with ProcessPoolExecutor(max_workers=workers) as pool:
+			pending = {}
+			while True:
+				for season, path, digest in pages: # Refill up to the window, never past it
+					pending[pool.submit(parse_season_page, season, path)] = (season, path, digest)
+					if len(pending) >= window:
+						break
+				if not pending:
+					break
+				done, _ = wait(pending, return_when=FIRST_COMPLETED)
+				for future in done:
+					season, path, digest = pending.pop(future)
+					try:
+						_, league, records = future.result()
+					except Exception as e:
+						print(f"Season page failed: {os.path.basename(path)} ({e})")
+						totals["failed"] += 1
+						continue
+					_store(conn, season, path, digest, league, records, totals)
+
+	if conn.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'minor_league_teams'").fetchone():
+		link_team_ids(conn)
+		conn.commit()
+	conn.close()
+	return totals
@@ -0,0 +1,89 @@
+'''
+Docstring for clean.team_names
+
+Column-wise team name pass: cleaned Team/City, Mascot, HasCityPrefix and TeamFingerprint for a whole frame at once.
+- Names repeat heavily (every team in every season), so each step runs once per distinct value or (Team, City) pair
+  and is broadcast back with the factorize codes; cost grows with distinct names, not rows
+- Footnote markers ("[a]", "[12]", "*", "†"), non-breaking spaces and repeated whitespace are removed
+- Mascot follows get_mascot_name exactly (derive_mascots on raw names == df.apply(get_mascot_name, axis=1))
+- TeamFingerprint is a 64-bit hash of the case-folded cleaned (Team, City), stable across runs and seasons, for joins;
+  stored as int64 (the uint64 bits reinterpreted) so SQLite can hold it
+'''
+
+# Imports
+import numpy as np
+import pandas as pd
+
+# Constants
+FOOTNOTE_RE = r"\[[^\]]{1,12}\]|[*†‡§]+" # [a], [12], [note 1], *, †, ...
+SPACE_RE = "[\\s\u00a0\u200b]+" # Whitespace, non-breaking and zero-width spaces (works with re and RE2)
+FINGERPRINT_HASH_KEY = "milb-team-names0" # 16 bytes; changing it changes every fingerprint
+
+# Functions
+def _factorized(values):
+	'''(codes, uniques as object array); missing values get code -1.'''
+	codes, uniques = pd.factorize(pd.Series(values, dtype=object), use_na_sentinel=True)
+	return codes, np.asarray(uniques, dtype=object)
+
+def _broadcast(codes, unique_results):
+	out = np.empty(len(codes), dtype=object)
+	out[:] = None
+	valid = codes >= 0
+	out[valid] = np.asarray(unique_results, dtype=object)[codes[valid]]
+	return out
+
+def clean_names(values):
+	'''Strip footnote markers and normalize whitespace; one regex pass per distinct value. Returns an object array.'''
+	codes, uniques = _factorized(values)
+	cleaned = (pd.Series(uniques, dtype=object).astype(str)
+				.str.replace(FOOTNOTE_RE, "", regex=True)
+				.str.replace(SPACE_RE, " ", regex=True)
+				.str.strip())
+	return _broadcast(codes, cleaned.to_numpy(dtype=object))
+
+def _pairs(teams, cities):
+	'''Factorize (Team, City) pairs -> (codes, unique teams, unique cities).'''
+	t_codes, t_uniques = pd.factorize(pd.Series(teams, dtype=object).fillna(""))
+	c_codes, c_uniques = pd.factorize(pd.Series(cities, dtype=object).fillna(""))
+	pair_ids, codes = np.unique(t_codes.astype("int64") * len(c_uniques) + c_codes, return_inverse=True)
+	return (codes.reshape(-1), np.asarray(t_uniques, dtype=object)[pair_ids // len(c_uniques)],
+			np.asarray(c_uniques, dtype=object)[pair_ids % len(c_uniques)])
+
+def derive_mascots(teams, cities):
+	'''get_mascot_name over whole columns: city removed if present, else the last word, else the name itself.'''
+	codes, u_team, u_city = _pairs(teams, cities)
+	words = pd.Series(u_team, dtype=object).str.split()
+	last_word = words.str[-1].to_numpy(dtype=object)
+	multi_word = (words.str.len() >= 2).to_numpy()
+	contains = np.fromiter((c in t for t, c in zip(u_team, u_city)), dtype=bool, count=len(u_team))
+	mascots = np.where(multi_word, last_word, u_team)
+	mascots[contains] = [t.replace(c, "").strip() for t, c in zip(u_team[contains], u_city[contains])]
+	mascots[u_team == ""] = None # Missing team name: no mascot (get_mascot_name would raise)
+	return _broadcast(codes, mascots)
+
+def has_city_prefix(teams, cities):
+	'''True where the team name starts with its city ("Akron RubberDucks" / "Akron").'''
+	codes, u_team, u_city = _pairs(teams, cities)
+	flags = np.fromiter((bool(c) and t.startswith(c) for t, c in zip(u_team, u_city)), dtype=bool, count=len(u_team))
+	return flags[codes]
+
+def team_fingerprints(teams, cities):
+	'''int64 per row from the case-folded (Team, City); same name in any season -> same fingerprint.'''
+	codes, u_team, u_city = _pairs(teams, cities)
+	keys = pd.DataFrame({"Team": pd.Series(u_team, dtype=object).str.casefold(), "City": pd.Series(u_city, dtype=object).str.casefold()})
+	return pd.util.hash_pandas_object(keys, index=False, hash_key=FINGERPRINT_HASH_KEY).to_numpy().view("int64")[codes]
+
+def normalize_team_names(df, team_col="Team", city_col="City"):
+	'''
+	Copy of df with cleaned name columns and the derived ones.
+
+	:return: df with team_col/city_col cleaned plus Mascot, HasCityPrefix and TeamFingerprint
+	'''
+	df = df.copy()
+	df[team_col] = clean_names(df[team_col].to_numpy(dtype=object))
+	df[city_col] = clean_names(df[city_col].to_numpy(dtype=object))
+	teams, cities = df[team_col].to_numpy(dtype=object), df[city_col].to_numpy(dtype=object)
+	df["Mascot"] = derive_mascots(teams, cities)
+	df["HasCityPrefix"] = has_city_prefix(teams, cities)
+	df["TeamFingerprint"] = team_fingerprints(teams, cities)
+	return df
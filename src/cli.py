@@ -0,0 +1,203 @@
+'''
+Docstring for cli
+
+Single entrypoint: python -m src.cli <stage> <target> [options]
+- Only argparse is imported up front; each handler imports its own subsystem (pandas, bs4, geopy, ...) when it runs
+- Paths, user agents and API keys are resolved when the command runs, never on import
+'''
+
+# Imports
+import argparse
+import os
+import sys
+
+# Constants
+DB_PATH = os.path.join("database", "milb.sqlite")
+USER_AGENT_FILE = "user-agent.txt"
+
+# Handlers
+def _collect_teams(args):
+	from src.collect.wikipedia import cook_teams_soup, wiki_header
+	cook_teams_soup(header=wiki_header(args.user_agent_file), output_file_path=args.out)
+
+def _collect_city(args):
+	from src.collect.wikipedia import cook_city_soup, wiki_header
+	cook_city_soup(args.city, args.state, header=wiki_header(args.user_agent_file), output_file_path=args.out)
+
+def _collect_census(args):
+	from src.collect import census_api
+	census_api.main(acs_year=args.year)
+
+def _collect_panel(args):
+	from src.collect.census_panel import build_acs5_panel
+	panel = build_acs5_panel(start_year=args.start, end_year=args.end, target_vintage=args.target_vintage,
+							db_path=os.path.abspath(args.db), output_path=args.out, refresh=args.refresh, max_workers=args.workers)
+	print("No ACS years available" if panel is None else f"{len(panel)} rows -> {args.out}")
+
+def _collect_logos(args):
+	from src.collect.logos import collect_logos
+	from src.collect.wikipedia import wiki_header
+	print(collect_logos(header=wiki_header(args.user_agent_file), teams_html_path=args.html, refresh_pages=args.refresh_pages))
+
+def _clean_teams(args):
+	from src.clean.clean_teams import clean_teams
+	clean_teams(db_path=os.path.abspath(args.db), html_path=args.html)
+
+def _clean_seasons(args):
+	from src.clean.season_history import ingest_season_pages
+	print(ingest_season_pages(db_path=os.path.abspath(args.db), html_path=args.html, max_workers=args.workers,
+							window=args.window, refresh=args.refresh))
+
+def _clean_cities(args):
+	from src.clean.clean_cities import clean_cities
+	from src.utils.html import set_user_agent
+	clean_cities(db_path=os.path.abspath(args.db), user_agent=set_user_agent(headers_file=os.path.abspath(args.user_agent_file)))
+
+def _history_build(args):
+	from src.clean.city_history import build_city_history
+	print(build_city_history(db_path=os.path.abspath(args.db), html_path=args.html))
+
+def _history_query(args):
+	from src.clean.city_history import value_as_of
+	print(value_as_of(args.place, args.field, args.as_of, qualifier=args.qualifier, db_path=os.path.abspath(args.db)))
+
+def _analytics(args):
+	from src.features.analytics import run_query
+	params = dict(p.split("=", 1) for p in args.param)
+	df = run_query(args.query, db_path=os.path.abspath(args.db), fin_path=args.fin, **params)
+	if not args.out:
+		print(df.to_string(max_rows=40))
+		return
+	if args.out.endswith(".parquet"):
+		df.to_parquet(args.out, index=False)
+	else:
+		df.to_csv(args.out, index=False)
+	print(f"{len(df)} rows -> {args.out}")
+
+def _features_modeling_table(args):
+	from src.features.modeling_table import build_modeling_table, verify_modeling_table
+	db_path = os.path.abspath(args.db)
+	if args.verify:
+		report = verify_modeling_table(db_path=db_path, panel_path=args.panel, output_path=args.out)
+		print(report)
+		return 0 if report["ok"] else 1
+	report = build_modeling_table(db_path=db_path, panel_path=args.panel, output_path=args.out, full=args.full)
+	print(f"built {len(report['built'])}, removed {len(report['removed'])}, unchanged {len(report['unchanged'])} seasons")
+
+def _model(args):
+	from src.modeling.runner import main as model_main
+	model_main(args.extra)
+
+def _bench(args):
+	from benchmarks.bench_parse import main as bench_main
+	bench_main(args.extra)
+
+# Functions
+def build_parser():
+	parser = argparse.ArgumentParser(prog="minor-league", description="Minor League data pipeline.")
+	stages = parser.add_subparsers(dest="stage", metavar="<stage>", required=True)
+
+	# Collect
+	collect = stages.add_parser("collect", help="Fetch raw data (Wikipedia, Census)")
+	collect_targets = collect.add_subparsers(dest="target", metavar="<target>", required=True)
+	p = collect_targets.add_parser("teams", help="Archive the MiLB leagues and teams page")
+	p.add_argument("--user-agent-file", default=USER_AGENT_FILE)
+	p.add_argument("--out", default=os.path.join("data", "raw", "wikipedia", "milb"))
+	p.set_defaults(handler=_collect_teams)
+	p = collect_targets.add_parser("city", help="Archive a single city page")
+	p.add_argument("city")
+	p.add_argument("state")
+	p.add_argument("--user-agent-file", default=USER_AGENT_FILE)
+	p.add_argument("--out", default=os.path.join("data", "raw", "wikipedia", "city"))
+	p.set_defaults(handler=_collect_city)
+	p = collect_targets.add_parser("census", help="Query ACS5 for the configured CBSAs")
+	p.add_argument("--year", type=int, default=2023)
+	p.set_defaults(handler=_collect_census)
+	p = collect_targets.add_parser("panel", help="Build the multi-year ACS5 panel for team metros (fetches only missing years)")
+	p.add_argument("--start", type=int, default=2009)
+	p.add_argument("--end", type=int, default=2023)
+	p.add_argument("--target-vintage", default=None, help="CBSA vintage to harmonize to (default: vintage of --end)")
+	p.add_argument("--refresh", action="store_true", help="Re-fetch cached years")
+	p.add_argument("--workers", type=int, default=4)
+	p.add_argument("--db", default=DB_PATH)
+	p.add_argument("--out", default=os.path.join("data", "fin", "acs5_cbsa_panel.parquet"))
+	p.set_defaults(handler=_collect_panel)
+	p = collect_targets.add_parser("logos", help="Club logos -> data/fin/logos.pack (only changed images are downloaded)")
+	p.add_argument("--user-agent-file", default=USER_AGENT_FILE)
+	p.add_argument("--html", default=os.path.join("data", "raw", "wikipedia", "milb"), help="Archived teams pages")
+	p.add_argument("--refresh-pages", action="store_true", help="Re-fetch cached club pages too")
+	p.set_defaults(handler=_collect_logos)
+
+	# Clean
+	clean = stages.add_parser("clean", help="Parse archived data and load the database")
+	clean_targets = clean.add_subparsers(dest="target", metavar="<target>", required=True)
+	p = clean_targets.add_parser("teams", help="Parse the latest teams page into minor_league_teams")
+	p.add_argument("--db", default=DB_PATH)
+	p.add_argument("--html", default=os.path.join("data", "raw", "wikipedia", "milb"))
+	p.set_defaults(handler=_clean_teams)
+	p = clean_targets.add_parser("seasons", help="Parse archived season pages into team_history (process pool, new pages only)")
+	p.add_argument("--db", default=DB_PATH)
+	p.add_argument("--html", default=os.path.join("data", "raw", "wikipedia", "season"))
+	p.add_argument("--workers", type=int, default=None, help="Pool size (0: parse in-process)")
+	p.add_argument("--window", type=int, default=None, help="Pages in flight at once (default: 2 x workers)")
+	p.add_argument("--refresh", action="store_true", help="Re-parse pages already ingested")
+	p.set_defaults(handler=_clean_seasons)
+	p = clean_targets.add_parser("cities", help="Parse city infoboxes into cities")
+	p.add_argument("--db", default=DB_PATH)
+	p.add_argument("--user-agent-file", default=USER_AGENT_FILE)
+	p.set_defaults(handler=_clean_cities)
+
+	# History
+	history = stages.add_parser("history", help="Infobox values across archived snapshots")
+	history_targets = history.add_subparsers(dest="target", metavar="<target>", required=True)
+	p = history_targets.add_parser("build", help="Fold new city snapshots into the history store")
+	p.add_argument("--db", default=DB_PATH)
+	p.add_argument("--html", default=os.path.join("data", "raw", "wikipedia", "city"))
+	p.set_defaults(handler=_history_build)
+	p = history_targets.add_parser("query", help="Value of a field for a place as of a date")
+	p.add_argument("place", help='e.g. "Akron, Ohio"')
+	p.add_argument("field", help="Canonical field, e.g. population")
+	p.add_argument("as_of", help="YYYY-MM-DD")
+	p.add_argument("--qualifier", default=None)
+	p.add_argument("--db", default=DB_PATH)
+	p.set_defaults(handler=_history_query)
+
+	# Features
+	features = stages.add_parser("features", help="Build feature tables in data/fin")
+	feature_targets = features.add_subparsers(dest="target", metavar="<target>", required=True)
+	p = feature_targets.add_parser("modeling-table", help="Update modeling_table.parquet (only seasons whose inputs changed)")
+	p.add_argument("--full", action="store_true", help="Rebuild every season")
+	p.add_argument("--verify", action="store_true", help="Compare the table against a fresh full rebuild instead of building")
+	p.add_argument("--db", default=DB_PATH)
+	p.add_argument("--panel", default=os.path.join("data", "fin", "acs5_cbsa_panel.parquet"))
+	p.add_argument("--out", default=os.path.join("data", "fin", "modeling_table.parquet"))
+	p.set_defaults(handler=_features_modeling_table)
+
+	# Analytics
+	p = stages.add_parser("analytics", help="Run a named DuckDB query over the database and data/fin Parquet files")
+	p.add_argument("query", help="team_city_features, population_deltas, league_churn")
+	p.add_argument("--param", action="append", default=[], metavar="KEY=VALUE", help="Query parameter, e.g. variable=B19013_001E")
+	p.add_argument("--db", default=DB_PATH)
+	p.add_argument("--fin", default=os.path.join("data", "fin"))
+	p.add_argument("--out", default=None, help="Write .csv or .parquet instead of printing")
+	p.set_defaults(handler=_analytics)
+
+	# Modeling
+	p = stages.add_parser("model", help="Cross-validate models on the modeling table (extra options go to src.modeling.runner)")
+	p.set_defaults(handler=_model, passthrough=True)
+
+	# Benchmarks
+	p = stages.add_parser("bench", help="Run the offline parsing/load benchmarks (extra options go to benchmarks.bench_parse)")
+	p.set_defaults(handler=_bench, passthrough=True)
+	return parser
+
+def main(argv=None):
+	parser = build_parser()
+	args, extra = parser.parse_known_args(argv)
+	if extra and not getattr(args, "passthrough", False):
+		parser.error(f"unrecognized arguments: {' '.join(extra)}")
+	args.extra = extra
+	return args.handler(args)
+
+if __name__ == '__main__':
+	sys.exit(main())
@@ -3,16 +3,10 @@ Docstring for collect.census_api
 ac5 geographic options: https://api.census.gov/data/2023/acs/acs5/geography.html
 
 '''
-import os, requests, time
-from dotenv import load_dotenv
-import pandas as pd
-from us import states
+import os, requests
+from src.utils.transport import get_transport
 
-dotenv_path = os.path.join(os.path.dirname(__file__), "..", ".env") # Two levels up
-load_dotenv(dotenv_path=dotenv_path)
-census_api_key = os.getenv("CENSUS_API_KEY")
-
-SLEEP_TIME = 0.5
+DOTENV_PATH = os.path.join(os.path.dirname(__file__), "..", ".env") # Two levels up
 ACS_YEAR = 2023
 ACS_VARIABLES = [
 	"B01003_001E",  # Total population
@@ -51,6 +45,14 @@ STATE_ABBR = {
 }
 
 
+def get_census_api_key(dotenv_path=DOTENV_PATH):
+	'''
+	Read CENSUS_API_KEY at call time (.env is loaded here, not on import).
+	'''
+	from dotenv import load_dotenv
+	load_dotenv(dotenv_path=dotenv_path)
+	return os.getenv("CENSUS_API_KEY")
+
 def normalize_state(state_input):
 	'''
 	If state input is a full name, normalize to abbrev.
@@ -72,13 +74,14 @@ def cbsa_vintage_for_acs_year(acs_year):
 			return row["cbsa_vintage"]
 	raise ValueError(f"No CBSA vintage mapping for ACS year {acs_year}")
 
-def city_state_to_cbsa_with_micro(city, state, acs_year):
+def city_state_to_cbsa_with_micro(city, state, acs_year, raise_errors=False):
 	'''
 	Lookup CBSA for city, state pair and given ACS Vintage. Includes fallback if muMSA (<50k).
 	
 	:param city: Description
 	:param state: Description
 	:param acs_year: Description
+	:param raise_errors: Re-raise transport/HTTP errors instead of treating them as "no match" (for callers that cache)
 	'''
 	cbsa_vintage = cbsa_vintage_for_acs_year(acs_year)
 
@@ -92,7 +95,7 @@ def city_state_to_cbsa_with_micro(city, state, acs_year):
 		}
 
 		try:
-			r = requests.get(
+			r = get_transport().get(
 				"https://geocoding.geo.census.gov/geocoder/geographies/onelineaddress",
 				params=params,
 				timeout=10
@@ -100,12 +103,13 @@ def city_state_to_cbsa_with_micro(city, state, acs_year):
 			r.raise_for_status()
 			geos = r.json()["result"]["geographies"].get(layer, [])
 		except requests.exceptions.RequestException:
+			if raise_errors:
+				raise
 			geos = []
 
 		# Return first match if available
 		if geos:
 			cbsa = geos[0]
-			time.sleep(SLEEP_TIME) 
 			return {
 				"cbsa_code": cbsa["GEOID"],
 				"cbsa_name": cbsa["NAME"],
@@ -142,21 +146,24 @@ def resolve_cbsas(city_state_list, acs_year):
 	return cbsa_map
 
 
-def query_acs5_cbsa(cbsa_code, variables, year):
+def query_acs5_cbsa(cbsa_code, variables, year, api_key=None):
 	'''
 	Query ACS5 for a single CBSA
 	
 	:param cbsa_code: Description
 	:param variables: Description
 	:param year: Description
+	:param api_key: Census API key (optional for low request volumes)
 	'''
 	params = {
 		"get": ",".join(["NAME"] + variables),
 		"for": f"cbsa:{cbsa_code}"
 	}
+	if api_key:
+		params["key"] = api_key
 
 	try:
-		r = requests.get(
+		r = get_transport().get(
 			f"https://api.census.gov/data/{year}/acs/acs5",
 			params=params,
 			timeout=10
@@ -167,22 +174,22 @@ def query_acs5_cbsa(cbsa_code, variables, year):
 		return None
 
 	header, values = data[:2]
-	time.sleep(SLEEP_TIME) 
 	return dict(zip(header, values))
 
-def run_pipeline(city_state_list, variables, acs_year):
+def run_pipeline(city_state_list, variables, acs_year, api_key=None):
 	'''
 	Full pipeline with MSA and muMSA handling. Intake cities output ACS results.
 	
 	:param city_state_list: Description
 	:param variables: Description
 	:param acs_year: Description
+	:param api_key: Census API key (optional)
 	'''
 	results = []
 	cbsa_map = resolve_cbsas(city_state_list, acs_year)
 
 	for cbsa_code, info in cbsa_map.items():
-		record = query_acs5_cbsa(cbsa_code, variables, acs_year)
+		record = query_acs5_cbsa(cbsa_code, variables, acs_year, api_key=api_key)
 		if record:  # skip failed ACS queries
 			record.update({
 				"cbsa_code": cbsa_code,
@@ -195,11 +202,17 @@ def run_pipeline(city_state_list, variables, acs_year):
 
 	return results
 
-acs_results = run_pipeline(
-	city_state_list=CITY_STATE_LIST,
-	variables=ACS_VARIABLES,
-	year=ACS_YEAR
-)
+def main(city_state_list=CITY_STATE_LIST, variables=ACS_VARIABLES, acs_year=ACS_YEAR):
+	acs_results = run_pipeline(
+		city_state_list=city_state_list,
+		variables=variables,
+		acs_year=acs_year,
+		api_key=get_census_api_key()
+	)
+	for r in acs_results:
+		print(r)
+	return acs_results
+
+if __name__ == '__main__':
+	main()
 
-for r in acs_results:
-	print(r)
@@ -0,0 +1,185 @@
+'''
+Docstring for collect.census_panel
+
+Multi-year ACS5 panel for team metros, harmonized to a single CBSA vintage.
+- One ACS5 request per year pulls every metro/micro area; years are fetched in parallel (paced by the shared transport) and cached as raw JSON
+- Each year's CBSA codes are remapped to the target vintage through the county delineation crosswalk
+- Output is a long (cbsa_code, year, variable, value) fact table in data/fin
+Re-running only fetches years missing from the cache.
+'''
+
+# Imports
+import json, os, sqlite3
+import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import pandas as pd
+from src.collect.census_api import (ACS_VARIABLES, ACS_YEAR, ACS_TO_CBSA_VINTAGE, cbsa_vintage_for_acs_year,
+									city_state_to_cbsa_with_micro, get_census_api_key)
+from src.clean.crosswalks import cbsa_vintage_crosswalk, DELINEATION_PATH
+from src.utils.transport import get_transport
+
+# Constants
+PANEL_START_YEAR = 2009
+MAX_WORKERS = 4
+ACS_CBSA_GEOGRAPHY = "metropolitan statistical area/micropolitan statistical area"
+ACS_VARIABLE_KINDS = {"B19013_001E": "median"} # Everything else is a count and can be summed across merged CBSAs
+ACS_POPULATION_VARIABLE = "B01003_001E" # Picks which source CBSA's medians survive a merge
+ACS_MISSING_FLOOR = -222222222 # Census annotation values (-222222222, -666666666, ...) mean "no estimate"
+DB_PATH = os.path.abspath(os.path.join('.','database','milb.sqlite'))
+CACHE_PATH = os.path.join(".","data","raw","census","acs5")
+PANEL_PATH = os.path.join(".","data","fin","acs5_cbsa_panel.parquet")
+
+# Functions
+def acs_year_for_vintage(cbsa_vintage):
+	'''Latest ACS year published on a given CBSA vintage.'''
+	years = [row["acs_end"] for row in ACS_TO_CBSA_VINTAGE if row["cbsa_vintage"] == str(cbsa_vintage)]
+	if not years:
+		raise ValueError(f"Unknown CBSA vintage {cbsa_vintage}")
+	return min(max(years), ACS_YEAR)
+
+def cache_file(year, cache_path=CACHE_PATH):
+	return os.path.join(cache_path, f"acs5_cbsa_{year}.json")
+
+def is_cached(year, variables, cache_path=CACHE_PATH):
+	path = cache_file(year, cache_path)
+	if not os.path.exists(path):
+		return False
+	with open(path, "r", encoding="utf-8") as f:
+		cached = json.load(f)
+	return set(variables) <= set(cached.get("variables", []))
+
+def fetch_acs5_year(year, variables, api_key=None, cache_path=CACHE_PATH):
+	'''
+	All CBSAs for one ACS5 year in a single request, written to the cache.
+
+	:return: year on success
+	'''
+	params = {
+		"get": ",".join(["NAME"] + variables),
+		"for": f"{ACS_CBSA_GEOGRAPHY}:*"
+	}
+	if api_key:
+		params["key"] = api_key
+	r = get_transport().get(f"https://api.census.gov/data/{year}/acs/acs5", params=params, timeout=60) # Big payload
+	r.raise_for_status()
+	os.makedirs(cache_path, exist_ok=True)
+	tmp_path = cache_file(year, cache_path) + ".tmp"
+	with open(tmp_path, "w", encoding="utf-8") as f:
+		json.dump({"year": year, "variables": variables, "rows": r.json()}, f)
+	os.replace(tmp_path, cache_file(year, cache_path)) # Never leave a half-written year behind
+	return year
+
+def fetch_missing_years(years, variables, api_key=None, cache_path=CACHE_PATH, refresh=False, max_workers=MAX_WORKERS):
+	'''Fetch (in parallel) every year not already cached with these variables. Returns the years that failed.'''
+	missing = [y for y in years if refresh or not is_cached(y, variables, cache_path)]
+	failed = []
+	if not missing:
+		return failed
+	with ThreadPoolExecutor(max_workers=max_workers) as pool:
+		futures = {pool.submit(fetch_acs5_year, y, variables, api_key, cache_path): y for y in missing}
+		for future in as_completed(futures):
+			year = futures[future]
+			try:
+				future.result()
+				print(f"ACS5 {year}: fetched")
+			except Exception as e:
+				print(f"ACS5 {year}: failed ({e})")
+				failed.append(year)
+	return sorted(failed)
+
+def load_cached_year(year, variables, cache_path=CACHE_PATH):
+	'''Long frame [cbsa_code, year, variable, value] for one cached year.'''
+	with open(cache_file(year, cache_path), "r", encoding="utf-8") as f:
+		rows = json.load(f)["rows"]
+	df = pd.DataFrame(rows[1:], columns=rows[0])
+	df = df.rename(columns={ACS_CBSA_GEOGRAPHY: "cbsa_code"})
+	df = df.melt(id_vars=["cbsa_code"], value_vars=[v for v in variables if v in df.columns], var_name="variable", value_name="value")
+	df["value"] = pd.to_numeric(df["value"], errors="coerce")
+	df.loc[df["value"] <= ACS_MISSING_FLOOR, "value"] = float("nan")
+	df["year"] = year
+	return df[["cbsa_code", "year", "variable", "value"]]
+
+def harmonize_to_vintage(df, crosswalk):
+	'''
+	Remap one year's CBSA codes to the target vintage.
+	Counts are summed over source CBSAs that merge; medians keep the value of the most populous source.
+	'''
+	df = df.merge(crosswalk[["source_cbsa", "target_cbsa"]], left_on="cbsa_code", right_on="source_cbsa", how="inner")
+	kinds = df["variable"].map(ACS_VARIABLE_KINDS).fillna("count")
+	counts = df[kinds == "count"].groupby(["target_cbsa", "year", "variable"], as_index=False)["value"].sum(min_count=1)
+	medians = df[kinds == "median"]
+	if not medians.empty:
+		pop = df[df["variable"] == ACS_POPULATION_VARIABLE][["source_cbsa", "value"]].rename(columns={"value": "pop"})
+		medians = medians.merge(pop, on="source_cbsa", how="left").sort_values("pop", ascending=False, na_position="last")
+		medians = medians.drop_duplicates(["target_cbsa", "year", "variable"])[["target_cbsa", "year", "variable", "value"]]
+	out = pd.concat([counts, medians], axis=0, ignore_index=True)
+	return out.rename(columns={"target_cbsa": "cbsa_code"})
+
+def load_team_cities(db_path=DB_PATH):
+	conn = sqlite3.connect(db_path)
+	rows = conn.execute("SELECT DISTINCT City, State FROM minor_league_teams;").fetchall()
+	conn.close()
+	return rows
+
+def resolve_team_cbsas(city_state_list, cbsa_vintage, cache_path=CACHE_PATH):
+	'''
+	Set of target-vintage CBSA codes for team cities; lookups are cached so each city is geocoded once.
+	Only answers are cached (a code, or None for "no CBSA"); a failed request is retried on the next run.
+	'''
+	path = os.path.join(cache_path, f"team_cbsas_{cbsa_vintage}.json")
+	resolved = {}
+	if os.path.exists(path):
+		with open(path, "r", encoding="utf-8") as f:
+			resolved = json.load(f)
+	acs_year = acs_year_for_vintage(cbsa_vintage)
+	for city, state in city_state_list:
+		key = f"{city}, {state}"
+		if key not in resolved:
+			try:
+				result = city_state_to_cbsa_with_micro(city, state, acs_year, raise_errors=True)
+			except requests.exceptions.RequestException as e:
+				print(f"CBSA lookup failed, will retry next run: {key} ({e})")
+				continue
+			resolved[key] = result["cbsa_code"] if result else None
+	os.makedirs(cache_path, exist_ok=True)
+	with open(path, "w", encoding="utf-8") as f:
+		json.dump(resolved, f, indent=1)
+	return {code for code in resolved.values() if code}
+
+def build_acs5_panel(start_year=PANEL_START_YEAR, end_year=ACS_YEAR, variables=ACS_VARIABLES, target_vintage=None,
+					db_path=DB_PATH, cache_path=CACHE_PATH, delineation_path=DELINEATION_PATH, output_path=PANEL_PATH,
+					refresh=False, max_workers=MAX_WORKERS):
+	'''
+	Build the long ACS5 panel for team metros, harmonized to one CBSA vintage.
+
+	:param target_vintage: CBSA vintage to report in; defaults to the vintage of end_year
+	:param refresh: Re-fetch every year instead of only missing ones
+	:return: DataFrame [cbsa_code, year, variable, value]
+	'''
+	years = list(range(start_year, end_year + 1))
+	target_vintage = str(target_vintage or cbsa_vintage_for_acs_year(end_year))
+	failed = fetch_missing_years(years, variables, api_key=get_census_api_key(), cache_path=cache_path,
+								refresh=refresh, max_workers=max_workers)
+	crosswalks, frames = {}, []
+	for year in years:
+		if year in failed or not is_cached(year, variables, cache_path):
+			continue
+		source_vintage = cbsa_vintage_for_acs_year(year)
+		if source_vintage not in crosswalks:
+			crosswalks[source_vintage] = cbsa_vintage_crosswalk(source_vintage, target_vintage, delineation_path)
+		frames.append(harmonize_to_vintage(load_cached_year(year, variables, cache_path), crosswalks[source_vintage]))
+	if not frames:
+		return None
+	panel = pd.concat(frames, axis=0, ignore_index=True)
+	# Team metros only (skip the filter if there is no teams table yet)
+	try:
+		team_cbsas = resolve_team_cbsas(load_team_cities(db_path), target_vintage, cache_path)
+		panel = panel[panel["cbsa_code"].isin(team_cbsas)]
+	except sqlite3.Error as e:
+		print(f"Keeping all CBSAs, could not read team cities: {e}")
+	panel = panel.sort_values(["cbsa_code", "year", "variable"]).reset_index(drop=True)
+	panel["year"] = panel["year"].astype("int16")
+	panel["cbsa_vintage"] = target_vintage
+	os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+	panel.to_parquet(output_path, index=False)
+	return panel
@@ -1,6 +1,9 @@
 import os 
-from dotenv import load_dotenv
 
-dotenv_path = os.path.join(os.path.dirname(__file__), "..", "...", ".env") # One level up
-load_dotenv(dotenv_path=dotenv_path)
-fred_api_key = os.getenv("FRED_API_KEY")
+DOTENV_PATH = os.path.join(os.path.dirname(__file__), "..", ".env") # Same .env as census_api
+
+def get_fred_api_key(dotenv_path=DOTENV_PATH):
+	'''Read FRED_API_KEY at call time (.env is loaded here, not on import).'''
+	from dotenv import load_dotenv
+	load_dotenv(dotenv_path=dotenv_path)
+	return os.getenv("FRED_API_KEY")
@@ -0,0 +1,245 @@
+'''
+Docstring for collect.logos
+
+Team logos: club page links from the archived teams page -> infobox image on each club page -> thumbnail store.
+- Club pages are cached in data/raw/wikipedia/club and only fetched when missing (Wikipedia's host budget is tight)
+- Images are downloaded concurrently through the shared transport (per-host rate limits apply); refreshes send
+  If-None-Match / If-Modified-Since, so unchanged images come back as 304 and are not downloaded again
+- Originals are kept once per content hash (data/raw/logos/<sha256>.<ext>); teams sharing a logo share one thumbnail
+- Thumbnails (THUMB_SIZE, PNG, centered on transparent padding) are packed back to back into data/fin/logos.pack;
+  data/fin/logos_index.json maps team -> image hash -> (offset, length). Both files are replaced atomically
+- LogoStore reads one logo with a single seek/read (or from a memory map) instead of opening thousands of files
+'''
+
+# Imports
+import asyncio, hashlib, io, json, mmap, os, re
+from urllib.parse import urljoin, urlsplit, unquote
+from bs4 import BeautifulSoup
+from src.utils.transport import get_transport
+
+# Constants
+TEAMS_LINK = "https://en.wikipedia.org/wiki/List_of_Minor_League_Baseball_leagues_and_teams"
+TEAMS_HTML_PATH = os.path.join("data","raw","wikipedia","milb")
+CLUB_HTML_PATH = os.path.join("data","raw","wikipedia","club")
+LOGO_RAW_PATH = os.path.join("data","raw","logos")
+LOGO_PACK_PATH = os.path.join("data","fin","logos.pack")
+LOGO_INDEX_PATH = os.path.join("data","fin","logos_index.json")
+THUMB_SIZE = (96, 96)
+IMAGE_EXTENSIONS = {"image/png": ".png", "image/jpeg": ".jpg", "image/gif": ".gif", "image/webp": ".webp", "image/svg+xml": ".svg"}
+
+# Classes
+class LogoStore:
+	'''Read-only access to the packed thumbnails: store.get("Akron RubberDucks") -> PNG bytes (or None).'''
+	def __init__(self, pack_path=LOGO_PACK_PATH, index_path=LOGO_INDEX_PATH):
+		self.index = read_index(index_path)
+		self._file = open(pack_path, "rb")
+		self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if os.path.getsize(pack_path) else None
+
+	def sha_for(self, team):
+		image_url = self.index["teams"].get(team, {}).get("image_url")
+		return self.index["urls"].get(image_url, {}).get("sha256")
+
+	def get(self, team):
+		entry = self.index["images"].get(self.sha_for(team))
+		if entry is None or self._map is None:
+			return None
+		return self._map[entry["offset"]:entry["offset"] + entry["length"]]
+
+	def image(self, team):
+		from PIL import Image
+		data = self.get(team)
+		return Image.open(io.BytesIO(data)) if data else None
+
+	def teams(self):
+		return sorted(t for t in self.index["teams"] if self.sha_for(t) in self.index["images"])
+
+	def close(self):
+		if self._map is not None:
+			self._map.close()
+		self._file.close()
+
+# Functions
+def team_page_links(soup, page_url=TEAMS_LINK):
+	'''{team name: club page URL} from the Team column of every wikitable on the teams page.'''
+	links = {}
+	for table in soup.find_all("table", class_=re.compile("wikitable")):
+		rows = table.find_all("tr")
+		if not rows:
+			continue
+		headers = [cell.get_text(" ", strip=True) for cell in rows[0].find_all(["th", "td"])]
+		if "Team" not in headers:
+			continue
+		team_col = headers.index("Team")
+		for row in rows[1:]:
+			cells = row.find_all(["th", "td"])
+			if len(cells) <= team_col:
+				continue
+			anchor = cells[team_col].find("a", href=True)
+			if anchor is None or anchor["href"].startswith("#"):
+				continue
+			links[cells[team_col].get_text(" ", strip=True)] = urljoin(page_url, anchor["href"])
+	return links
+
+def infobox_image_url(soup, page_url):
+	'''Absolute URL of the first image in the page's infobox (the club logo); None if there is none.'''
+	table = soup.find("table", class_=re.compile("infobox"))
+	if table is None:
+		return None
+	cell = table.find(class_=re.compile("infobox-image")) or table
+	img = cell.find("img", src=True)
+	if img is None:
+		return None
+	return urljoin(page_url, img["src"]) # Wikipedia uses protocol-relative //upload.wikimedia.org/... sources
+
+def page_file_name(url):
+	return re.sub(r"[^\w.-]+", "_", unquote(urlsplit(url).path.rstrip("/").split("/")[-1])) + ".html"
+
+async def _fetch_all(transport, requests_):
+	'''[(url, headers)] -> responses (or exceptions), concurrently; the transport paces each host.'''
+	return await asyncio.gather(*(transport.aget(url, headers=headers) for url, headers in requests_), return_exceptions=True)
+
+def fetch_club_pages(links, header=None, transport=None, club_html_path=CLUB_HTML_PATH, refresh=False):
+	'''{team: BeautifulSoup} for each club page; cached pages are read from disk unless refresh.'''
+	transport = transport or get_transport()
+	os.makedirs(club_html_path, exist_ok=True)
+	paths = {team: os.path.join(club_html_path, page_file_name(url)) for team, url in links.items()}
+	missing = sorted({links[t] for t, p in paths.items() if refresh or not os.path.exists(p)})
+	responses = asyncio.run(_fetch_all(transport, [(url, header) for url in missing])) if missing else []
+	for url, response in zip(missing, responses):
+		if isinstance(response, Exception) or response.status_code != 200:
+			print(f"Club page failed: {url} ({response if isinstance(response, Exception) else response.status_code})")
+			continue
+		path = os.path.join(club_html_path, page_file_name(url))
+		with open(path + ".tmp", "w", encoding="utf-8-sig") as f:
+			f.write(response.text)
+		os.replace(path + ".tmp", path)
+	soups = {}
+	for team, path in paths.items():
+		if os.path.exists(path):
+			with open(path, "r", encoding="utf-8-sig") as f:
+				soups[team] = BeautifulSoup(f.read(), "html.parser")
+	return soups
+
+def make_thumbnail(data, size=THUMB_SIZE):
+	'''PNG bytes: the image scaled to fit `size`, centered on a transparent canvas.'''
+	from PIL import Image
+	with Image.open(io.BytesIO(data)) as image:
+		image = image.convert("RGBA")
+		image.thumbnail(size, Image.LANCZOS)
+		canvas = Image.new("RGBA", size, (0, 0, 0, 0))
+		canvas.paste(image, ((size[0] - image.width) // 2, (size[1] - image.height) // 2))
+	out = io.BytesIO()
+	canvas.save(out, format="PNG", optimize=True)
+	return out.getvalue()
+
+def read_index(index_path=LOGO_INDEX_PATH):
+	if not os.path.exists(index_path):
+		return {"thumb_size": list(THUMB_SIZE), "images": {}, "urls": {}, "teams": {}}
+	with open(index_path, "r", encoding="utf-8") as f:
+		return json.load(f)
+
+def download_images(urls, index, header=None, transport=None, raw_path=LOGO_RAW_PATH):
+	'''
+	Conditional, concurrent download of image URLs. Updates index["urls"] in place.
+
+	:return: dict with downloaded, not_modified and failed URL counts
+	'''
+	transport = transport or get_transport()
+	requests_ = []
+	for url in urls:
+		headers = dict(header or {})
+		known = index["urls"].get(url, {})
+		if known.get("sha256") and os.path.exists(known.get("raw_file") or ""):
+			if known.get("etag"):
+				headers["If-None-Match"] = known["etag"]
+			if known.get("last_modified"):
+				headers["If-Modified-Since"] = known["last_modified"]
+		requests_.append((url, headers))
+	responses = asyncio.run(_fetch_all(transport, requests_)) if requests_ else []
+
+	counts = {"downloaded": 0, "not_modified": 0, "failed": 0}
+	os.makedirs(raw_path, exist_ok=True)
+	for (url, _), response in zip(requests_, responses):
+		if isinstance(response, Exception) or response.status_code not in (200, 304):
+			print(f"Logo failed: {url} ({response if isinstance(response, Exception) else response.status_code})")
+			counts["failed"] += 1
+			continue
+		if response.status_code == 304:
+			counts["not_modified"] += 1
+			continue
+		sha = hashlib.sha256(response.content).hexdigest()
+		content_type = response.headers.get("Content-Type", "").split(";")[0].strip()
+		raw_file = os.path.join(raw_path, sha + IMAGE_EXTENSIONS.get(content_type, os.path.splitext(urlsplit(url).path)[1]))
+		if not os.path.exists(raw_file): # Same bytes under another URL: already stored
+			with open(raw_file + ".tmp", "wb") as f:
+				f.write(response.content)
+			os.replace(raw_file + ".tmp", raw_file)
+		index["urls"][url] = {"sha256": sha, "raw_file": raw_file, "etag": response.headers.get("ETag"),
+							"last_modified": response.headers.get("Last-Modified")}
+		counts["downloaded"] += 1
+	return counts
+
+def write_store(index, pack_path=LOGO_PACK_PATH, index_path=LOGO_INDEX_PATH, size=THUMB_SIZE):
+	'''
+	Rewrite the pack with a thumbnail for every image hash the teams reference; thumbnails already in the
+	old pack are copied over, only new hashes are rendered. Pack, then index, each replaced atomically.
+
+	:return: number of thumbnails rendered
+	'''
+	wanted = sorted({index["urls"][t["image_url"]]["sha256"] for t in index["teams"].values()
+					if t.get("image_url") in index["urls"]})
+	old_images = index["images"] if list(index.get("thumb_size", [])) == list(size) else {}
+	old_pack = open(pack_path, "rb") if old_images and os.path.exists(pack_path) else None
+	by_sha = {info["sha256"]: info["raw_file"] for info in index["urls"].values()}
+	images, offset, rendered = {}, 0, 0
+	os.makedirs(os.path.dirname(os.path.abspath(pack_path)), exist_ok=True)
+	try:
+		with open(pack_path + ".tmp", "wb") as out:
+			for sha in wanted:
+				if old_pack is not None and sha in old_images:
+					old_pack.seek(old_images[sha]["offset"])
+					thumb = old_pack.read(old_images[sha]["length"])
+				else:
+					try:
+						with open(by_sha[sha], "rb") as f:
+							thumb = make_thumbnail(f.read(), size)
+					except Exception as e: # Unreadable image (e.g. SVG original): leave the team without a logo
+						print(f"Thumbnail failed: {by_sha[sha]} ({e})")
+						continue
+					rendered += 1
+				out.write(thumb)
+				images[sha] = {"offset": offset, "length": len(thumb)}
+				offset += len(thumb)
+	finally:
+		if old_pack is not None:
+			old_pack.close()
+	os.replace(pack_path + ".tmp", pack_path)
+	index["images"], index["thumb_size"] = images, list(size)
+	with open(index_path + ".tmp", "w", encoding="utf-8") as f:
+		json.dump(index, f, indent=1, sort_keys=True)
+	os.replace(index_path + ".tmp", index_path)
+	return rendered
+
+def collect_logos(teams_soup=None, teams_page_url=TEAMS_LINK, header=None, transport=None, teams_html_path=TEAMS_HTML_PATH,
+				club_html_path=CLUB_HTML_PATH, raw_path=LOGO_RAW_PATH, pack_path=LOGO_PACK_PATH, index_path=LOGO_INDEX_PATH,
+				refresh_pages=False, size=THUMB_SIZE):
+	'''
+	Full logo pipeline; safe to re-run (only new club pages, changed images and new hashes cost anything).
+
+	:param teams_soup: Parsed teams page; default is the latest archived one in teams_html_path
+	:return: dict of counts
+	'''
+	if teams_soup is None:
+		from src.utils.html import find_latest_html, cook_html
+		teams_soup = cook_html(find_latest_html(os.path.abspath(teams_html_path)))
+	links = team_page_links(teams_soup, teams_page_url)
+	soups = fetch_club_pages(links, header=header, transport=transport, club_html_path=club_html_path, refresh=refresh_pages)
+
+	index = read_index(index_path)
+	index["teams"] = {team: {"page": links[team], "image_url": infobox_image_url(soup, links[team])} for team, soup in soups.items()}
+	urls = sorted({t["image_url"] for t in index["teams"].values() if t["image_url"]})
+	counts = download_images(urls, index, header=header, transport=transport, raw_path=raw_path)
+	counts["rendered"] = write_store(index, pack_path, index_path, size)
+	counts["teams"], counts["with_logo"], counts["unique_images"] = len(links), sum(
+		1 for t in index["teams"].values() if t["image_url"] in index["urls"]), len(index["images"])
+	return counts
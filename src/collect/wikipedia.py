@@ -8,21 +8,33 @@ Store the data in a convenient way and retrieve.
 '''
 
 # Imports
-import datetime as dt
 import os
 from src.utils.html import cook_soup, set_user_agent
 # Constants
-SLEEP_TIME = 6 # seconds for sleep
 TEAMS_LINK = "https://en.wikipedia.org/wiki/List_of_Minor_League_Baseball_leagues_and_teams"
-USER_AGENT = set_user_agent(header_file=os.path.abspath(os.path.join(".","user-agent.txt")))
+USER_AGENT_FILE = "user-agent.txt"
+TEAMS_HTML_PATH = os.path.join("data","raw","wikipedia","milb") # Where clean_teams looks
+CITY_HTML_PATH = os.path.join("data","raw","wikipedia","city") # Where clean_cities looks
+SEASON_HTML_PATH = os.path.join("data","raw","wikipedia","season") # Where clean.season_history looks
 
 # Functions
-def cook_teams_soup(header = USER_AGENT, output_file_path = os.path.join("data","html","milb")):
+def wiki_header(headers_file=USER_AGENT_FILE):
+	'''Resolve request headers at call time (not import time) from the user-agent file.'''
+	user_agent = set_user_agent(headers_file=os.path.abspath(headers_file))
+	return {"User-Agent": user_agent} if user_agent else None
+
+def cook_teams_soup(header = None, output_file_path = TEAMS_HTML_PATH):
 	# # Get team soup and parse (custom function, NOT universal)
-	cook_soup(TEAMS_LINK, user_agent = header, html_file_path = output_file_path)
+	os.makedirs(output_file_path, exist_ok=True)
+	return cook_soup(TEAMS_LINK, header = header or wiki_header(), html_file_path = output_file_path)
 
-def cook_city_soup(city, state, header = USER_AGENT, output_file_path = os.path.join("data","html","city")):
+def cook_city_soup(city, state, header = None, output_file_path = CITY_HTML_PATH):
 	url = "https://en.wikipedia.org/wiki/" + city.replace(" ","_") + ",_" + state.replace(" ","_") 
-	cook_soup(url, user_agent = header , html_file_path = output_file_path)
-
+	os.makedirs(output_file_path, exist_ok=True)
+	return cook_soup(url, header = header or wiki_header(), html_file_path = output_file_path)
 
+def cook_season_soup(season, league, header = None, output_file_path = SEASON_HTML_PATH):
+	# e.g. (2005, "Eastern League") -> 2005_Eastern_League_season, archived as wiki_2005_eastern_league_season_<timestamp>.html
+	url = "https://en.wikipedia.org/wiki/" + f"{season}_{league}_season".replace(" ","_")
+	os.makedirs(output_file_path, exist_ok=True)
+	return cook_soup(url, header = header or wiki_header(), html_file_path = output_file_path)
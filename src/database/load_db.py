@@ -1,3 +1,4 @@
+import json
 import sqlite3
 import pandas as pd
 from datetime import datetime
@@ -5,4 +6,68 @@ from datetime import datetime
 DB_FILE = "database/milb.sqlite"
 
 def get_connection():
-    return sqlite3.connect(DB_FILE)
\ No newline at end of file
+    return sqlite3.connect(DB_FILE)
+def ensure_columns(conn, table, columns):
+    """Add any of {name: type} missing from an existing table (CREATE TABLE IF NOT EXISTS won't)."""
+    existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+    for name, col_type in columns.items():
+        if name not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {col_type}")
+
+def records_from_frame(df, cols):
+    """
+    Row tuples for sqlite3 from a DataFrame, column-wise rather than cell by cell:
+    NaN/NA -> None, numpy scalars -> Python scalars, list/dict/set cells -> JSON text.
+    """
+    out = df[cols].astype(object)
+    out = out.where(out.notna(), None)
+    for col in cols:
+        if df[col].dtype == object and any(isinstance(v, (list, dict, set)) for v in out[col]):
+            out[col] = [json.dumps(list(v) if isinstance(v, set) else v) if isinstance(v, (list, dict, set)) else v for v in out[col]]
+    return list(out.itertuples(index=False, name=None))
+
+def bulk_upsert(conn, table, key_cols, value_cols, records, touch_col="updated_on"):
+    """
+    Set-based upsert through a temp staging table.
+    Records are bulk-inserted into staging, rows identical to what is stored are dropped in one join,
+    and a single INSERT ... SELECT ... ON CONFLICT DO UPDATE writes only what is new or changed
+    (unchanged rows are never rewritten, so no update triggers fire for them).
+
+    :param conn: sqlite3 connection; the caller commits
+    :param table: Target table with a UNIQUE constraint on key_cols
+    :param records: Iterable of tuples ordered key_cols + value_cols
+    :param touch_col: Timestamp column stamped on changed rows (None to skip)
+    :return: dict {"inserted", "updated", "unchanged"}
+    """
+    cols = key_cols + value_cols
+    col_list, key_list = ", ".join(cols), ", ".join(key_cols)
+    n_keys = len(key_cols)
+    records = list({tuple(r[:n_keys]): r for r in records}.values()) # Last record per key wins, as with row-by-row upserts
+    staging = f"staging_{table}"
+    conn.execute("PRAGMA temp_store = MEMORY")
+    conn.execute(f"DROP TABLE IF EXISTS temp.{staging}")
+    # Same column affinities as the target, so staged values compare the way stored ones do
+    conn.execute(f"CREATE TEMP TABLE {staging} AS SELECT {col_list} FROM main.{table} WHERE 0")
+    conn.executemany(f"INSERT INTO temp.{staging} ({col_list}) VALUES ({', '.join('?' for _ in cols)})", records)
+
+    # Drop staged rows that match the stored row exactly
+    key_match = " AND ".join(f"t.{k} = s.{k}" for k in key_cols)
+    any_changed = " OR ".join(f"t.{v} IS NOT s.{v}" for v in value_cols) or "0"
+    conn.execute(f"""
+        DELETE FROM temp.{staging} WHERE rowid IN (
+            SELECT s.rowid FROM temp.{staging} s JOIN main.{table} t ON {key_match} WHERE NOT ({any_changed})
+        )
+    """)
+    pending = conn.execute(f"SELECT COUNT(*) FROM temp.{staging}").fetchone()[0]
+    inserted = conn.execute(f"SELECT COUNT(*) FROM temp.{staging} s WHERE NOT EXISTS (SELECT 1 FROM main.{table} t WHERE {key_match})").fetchone()[0]
+
+    if pending:
+        set_list = [f"{v}=excluded.{v}" for v in value_cols] + ([f"{touch_col}=CURRENT_TIMESTAMP"] if touch_col else [])
+        conflict = f"DO UPDATE SET {', '.join(set_list)}" if value_cols else "DO NOTHING"
+        conn.execute(f"""
+            INSERT INTO main.{table} ({col_list})
+            SELECT {col_list} FROM temp.{staging} WHERE true
+            ON CONFLICT ({key_list}) {conflict}
+        """)
+    conn.execute(f"DROP TABLE temp.{staging}")
+    return {"inserted": inserted, "updated": pending - inserted, "unchanged": len(records) - pending}
@@ -0,0 +1,200 @@
+'''
+Docstring for database.read_db
+
+Read-side API for notebooks and the (planned) Streamlit app: batched lookups, cached results.
+- Each query has one fixed SQL text whatever the batch size (ids are bound as a JSON array and expanded with
+  json_each), so sqlite3's per-connection statement cache always hits: prepared once, reused
+- One long-lived read-only connection per database file
+- Results sit in an LRU keyed by (query, arguments) and tagged with PRAGMA data_version, which changes whenever
+  another connection commits; a stale generation empties the cache before the next lookup
+- Frames are built once as Arrow tables (when pyarrow is installed) and handed out as Arrow-backed pandas
+  frames without copying. Cached results are shared: treat them as read-only
+'''
+
+# Imports
+import json, math, os, sqlite3, threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+# Constants
+DB_PATH = os.path.abspath(os.path.join('.','database','milb.sqlite'))
+CACHE_SIZE = 512
+EARTH_RADIUS_MI = 3958.8
+
+CITY_COLUMNS = ["id", "city", "state", "country", "metro", "county", "elevation", "population_density", "fips_code",
+				"year_founded_max", "year_founded_min", "area_max", "area_min", "pop_max", "pop_min", "gdp_max", "gdp_min",
+				"gnis_est", "msa_est", "latitude", "longitude"]
+
+CITY_FEATURES_SQL = f"""
+	SELECT {", ".join(CITY_COLUMNS)}
+	FROM cities
+	WHERE id IN (SELECT value FROM json_each(?))
+	ORDER BY id;
+"""
+
+TEAM_HISTORY_SQL = """
+	SELECT team_id, season, Team, League, Division, City, State, Stadium, Capacity, Affiliate, Mascot, TeamFingerprint
+	FROM team_history
+	WHERE team_id IN (SELECT value FROM json_each(?1))
+	AND (?2 IS NULL OR season IN (SELECT value FROM json_each(?2)))
+	ORDER BY team_id, season;
+"""
+
+TEAMS_IN_BOX_SQL = """
+	SELECT t.id AS team_id, t.Team, t.League, t.City, t.State, c.id AS city_id, c.latitude, c.longitude
+	FROM cities c
+	JOIN minor_league_teams t ON t.City = c.city AND t.State = c.state
+	WHERE c.latitude BETWEEN ?1 AND ?2 AND c.longitude BETWEEN ?3 AND ?4;
+"""
+
+TEAMS_IN_BOX_SEASON_SQL = """
+	SELECT h.team_id, h.Team, h.League, h.City, h.State, c.id AS city_id, c.latitude, c.longitude
+	FROM cities c
+	JOIN team_history h ON h.City = c.city AND h.State = c.state
+	WHERE c.latitude BETWEEN ?1 AND ?2 AND c.longitude BETWEEN ?3 AND ?4
+	AND h.season = ?5;
+"""
+
+# Classes
+class _Reader:
+	'''Read-only connection + generation-tagged LRU for one database file.'''
+	def __init__(self, db_path, cache_size=CACHE_SIZE):
+		uri = "file:{}?mode=ro".format(os.path.abspath(db_path).replace("\\", "/"))
+		self.conn = sqlite3.connect(uri, uri=True, check_same_thread=False, cached_statements=64)
+		self.lock = threading.Lock()
+		self.cache = OrderedDict()
+		self.cache_size = cache_size
+		self.generation = None
+
+	def _check_generation(self):
+		generation = self.conn.execute("PRAGMA data_version").fetchone()[0]
+		if generation != self.generation:
+			self.cache.clear()
+			self.generation = generation
+
+	def query(self, key, sql, params):
+		'''(columns, rows) for sql/params, from cache when the database has not changed.'''
+		with self.lock:
+			self._check_generation()
+			if key in self.cache:
+				self.cache.move_to_end(key)
+				return self.cache[key]
+			cursor = self.conn.execute(sql, params)
+			result = ([d[0] for d in cursor.description], cursor.fetchall())
+			self.cache[key] = result
+			if len(self.cache) > self.cache_size:
+				self.cache.popitem(last=False)
+			return result
+
+	def cached_frame(self, key, build):
+		'''Memoize a derived frame next to its query result (same generation, same eviction).'''
+		with self.lock:
+			self._check_generation()
+			if key in self.cache:
+				self.cache.move_to_end(key)
+				return self.cache[key]
+		frame = build()
+		with self.lock:
+			self.cache[key] = frame
+			if len(self.cache) > self.cache_size:
+				self.cache.popitem(last=False)
+		return frame
+
+	def close(self):
+		self.conn.close()
+
+# Functions
+_READERS = {}
+_READERS_LOCK = threading.Lock()
+
+def get_reader(db_path=DB_PATH):
+	path = os.path.abspath(db_path)
+	with _READERS_LOCK:
+		if path not in _READERS:
+			_READERS[path] = _Reader(path)
+		return _READERS[path]
+
+def clear_cache(db_path=None):
+	'''Drop cached results (all databases if db_path is None).'''
+	with _READERS_LOCK:
+		readers = list(_READERS.values()) if db_path is None else [r for p, r in _READERS.items() if p == os.path.abspath(db_path)]
+	for reader in readers:
+		with reader.lock:
+			reader.cache.clear()
+
+def _ids_param(ids):
+	'''Normalize ids to a sorted, de-duplicated JSON array (also the cache key).'''
+	if ids is None:
+		return None
+	if isinstance(ids, (int, str)):
+		ids = [ids]
+	return json.dumps(sorted({int(i) for i in ids}))
+
+def _to_frame(columns, rows, as_arrow):
+	'''Arrow table (as_arrow) or pandas frame; the pandas frame wraps the Arrow buffers when pyarrow is available.'''
+	try:
+		import pyarrow as pa
+	except ImportError:
+		if as_arrow:
+			raise
+		return pd.DataFrame.from_records(rows, columns=columns)
+	values = list(zip(*rows)) if rows else [[] for _ in columns]
+	table = pa.table({col: pa.array(list(vals)) for col, vals in zip(columns, values)})
+	if as_arrow:
+		return table
+	return table.to_pandas(types_mapper=pd.ArrowDtype)
+
+def haversine_miles(lat, lon, lats, lons):
+	'''Great-circle distance in miles from one point to arrays of points.'''
+	lat1, lon1 = np.radians(lat), np.radians(lon)
+	lat2, lon2 = np.radians(lats), np.radians(lons)
+	a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+	return 2 * EARTH_RADIUS_MI * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+def _frame(reader,name, sql, params, as_arrow):
+	key = (name, params)
+	columns, rows = reader.query(key, sql, params)
+	return reader.cached_frame(key + ("arrow" if as_arrow else "pandas",), lambda: _to_frame(columns, rows, as_arrow))
+
+def get_city_features(city_ids, db_path=DB_PATH, as_arrow=False):
+	'''
+	City feature rows for a batch of cities.
+
+	:param city_ids: cities.id values (any iterable, or a single id)
+	:param as_arrow: Return a pyarrow.Table instead of a pandas DataFrame
+	'''
+	return _frame(get_reader(db_path), "city_features", CITY_FEATURES_SQL, (_ids_param(city_ids),), as_arrow)
+
+def get_team_history(team_ids, years=None, db_path=DB_PATH, as_arrow=False):
+	'''
+	Season rows from team_history for a batch of teams.
+
+	:param team_ids: minor_league_teams.id values
+	:param years: Seasons to include; None for all
+	'''
+	return _frame(get_reader(db_path), "team_history", TEAM_HISTORY_SQL, (_ids_param(team_ids), _ids_param(years)), as_arrow)
+
+def teams_in_radius(lat, lon, miles, season=None, db_path=DB_PATH, as_arrow=False):
+	'''
+	Teams whose city lies within `miles` of (lat, lon), nearest first, with a distance_mi column.
+	A bounding box narrows candidates in SQL (indexed); exact great-circle distance is applied afterwards.
+
+	:param season: Use team_history for that season instead of current teams
+	'''
+	dlat = miles / 69.0
+	dlon = miles / max(1e-6, 69.0 * math.cos(math.radians(lat)))
+	params = (lat - dlat, lat + dlat, lon - dlon, lon + dlon)
+	sql = TEAMS_IN_BOX_SQL
+	if season is not None:
+		sql, params = TEAMS_IN_BOX_SEASON_SQL, params + (int(season),)
+	reader = get_reader(db_path)
+	key = ("teams_in_radius", round(lat, 6), round(lon, 6), float(miles), season, as_arrow)
+	def build():
+		columns, rows = reader.query(("teams_in_box",) + params, sql, params)
+		lats = np.array([row[columns.index("latitude")] for row in rows], dtype=float)
+		lons = np.array([row[columns.index("longitude")] for row in rows], dtype=float)
+		distances = haversine_miles(lat, lon, lats, lons)
+		nearest = [i for i in np.argsort(distances, kind="stable") if distances[i] <= miles] # NaN (no coordinates) drops out
+		return _to_frame(columns + ["distance_mi"], [rows[i] + (float(distances[i]),) for i in nearest], as_arrow)
+	return reader.cached_frame(key, build)
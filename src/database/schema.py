@@ -0,0 +1,51 @@
+from src.database.load_db import ensure_columns
+
+# Season-grain team history (README: TEAM_HISTORY). One row per team, league and season;
+# team_id links to minor_league_teams.id when the team still exists today.
+CREATE_TEAM_HISTORY_SQL = """
+    CREATE TABLE IF NOT EXISTS team_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    season INTEGER NOT NULL,
+    team_id INTEGER,
+    Team TEXT NOT NULL,
+    League TEXT NOT NULL,
+    Division TEXT,
+    City TEXT,
+    State TEXT,
+    Stadium TEXT,
+    Capacity INTEGER,
+    Affiliate TEXT,
+    Mascot TEXT,
+    HasCityPrefix INTEGER,
+    TeamFingerprint INTEGER,
+    created_on TEXT DEFAULT CURRENT_TIMESTAMP,
+    updated_on TEXT DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (season, Team, City, League)
+);
+"""
+
+CREATE_TEAM_HISTORY_INDEX_SQL = "CREATE INDEX IF NOT EXISTS idx_team_history_team ON team_history (team_id, season);"
+CREATE_TEAM_HISTORY_FINGERPRINT_INDEX_SQL = "CREATE INDEX IF NOT EXISTS idx_team_history_fingerprint ON team_history (TeamFingerprint, season);"
+
+CREATE_CITY_COORDS_INDEX_SQL = "CREATE INDEX IF NOT EXISTS idx_cities_lat_lon ON cities (latitude, longitude);"
+
+TEAM_HISTORY_KEY_COLUMNS = ["season", "Team", "City", "League"]
+TEAM_HISTORY_VALUE_COLUMNS = ["team_id", "Division", "State", "Stadium", "Capacity", "Affiliate", "Mascot", "HasCityPrefix", "TeamFingerprint"]
+# Derived by clean.team_names (TeamFingerprint: same cleaned Team/City in any season -> same value); added to older DBs
+TEAM_NAME_COLUMNS = {"HasCityPrefix": "INTEGER", "TeamFingerprint": "INTEGER"}
+
+def ensure_team_history(conn):
+    conn.execute(CREATE_TEAM_HISTORY_SQL)
+    ensure_columns(conn, "team_history", TEAM_NAME_COLUMNS)
+    conn.execute(CREATE_TEAM_HISTORY_INDEX_SQL)
+    conn.execute(CREATE_TEAM_HISTORY_FINGERPRINT_INDEX_SQL)
+
+def link_team_ids(conn):
+    """Fill team_history.team_id from minor_league_teams where (Team, City, League) match."""
+    conn.execute("""
+        UPDATE team_history SET team_id = (
+            SELECT t.id FROM minor_league_teams t
+            WHERE t.Team = team_history.Team AND t.City = team_history.City AND t.League = team_history.League
+        )
+        WHERE team_id IS NULL
+    """)
@@ -0,0 +1,164 @@
+'''
+Docstring for features.analytics
+
+Columnar analytics layer (DuckDB) over the SQLite database and the data/fin Parquet files.
+- database/milb.sqlite is attached read-only as schema `milb` (DuckDB sqlite extension); if the extension cannot be
+  loaded (e.g. offline, not installed), the SQLite tables are copied into an in-memory `milb` schema instead
+- Every Parquet file (or hive-partitioned Parquet directory) in data/fin becomes a view named after it,
+  e.g. data/fin/acs5_cbsa_panel.parquet -> acs5_cbsa_panel
+- Standard feature joins and window aggregates are kept as named queries (NAMED_QUERIES) and run with run_query()
+'''
+
+# Imports
+import os, sqlite3
+import duckdb
+import pandas as pd
+
+# Constants
+DB_PATH = os.path.abspath(os.path.join('.','database','milb.sqlite'))
+FIN_PATH = os.path.join(".","data","fin")
+SQLITE_SCHEMA = "milb"
+POPULATION_VARIABLE = "B01003_001E"
+
+NAMED_QUERIES = {
+	# Current teams with their city's features; city-level and league-level counts as context
+	"team_city_features": {
+		"sql": """
+			SELECT t.id AS team_id, t.Team, t.League, t.Division, t.City, t.State, t.Capacity, t.Affiliate,
+				c.id AS city_id, c.metro, c.county, c.elevation, c.population_density, c.pop_max, c.area_max, c.gdp_max,
+				c.year_founded_min, c.latitude, c.longitude,
+				count(*) OVER (PARTITION BY t.City, t.State) AS teams_in_city,
+				count(*) OVER (PARTITION BY t.League) AS league_size
+			FROM milb.minor_league_teams t
+			LEFT JOIN milb.cities c ON c.city = t.City AND c.state = t.State
+			ORDER BY t.League, t.Team;
+		""",
+		"params": {},
+	},
+	# Year-over-year and 5-year changes of one ACS variable per CBSA (population by default). Joined on year - 1 / year - 5,
+	# not lag(): the panel has gaps (years that failed to fetch, CBSAs missing in some vintages), so rows are not years
+	"population_deltas": {
+		"sql": """
+			WITH p AS (
+				SELECT cbsa_code, year, value FROM acs5_cbsa_panel WHERE variable = $variable
+			)
+			SELECT p.cbsa_code, p.year, p.value AS population,
+				p.value - p1.value AS delta_1y,
+				p.value / nullif(p1.value, 0) - 1 AS pct_1y,
+				p.value - p5.value AS delta_5y,
+				p.value / nullif(p5.value, 0) - 1 AS pct_5y
+			FROM p
+			LEFT JOIN p p1 ON p1.cbsa_code = p.cbsa_code AND p1.year = p.year - 1
+			LEFT JOIN p p5 ON p5.cbsa_code = p.cbsa_code AND p5.year = p.year - 5
+			ORDER BY p.cbsa_code, p.year;
+		""",
+		"params": {"variable": POPULATION_VARIABLE},
+	},
+	# Per league and season: teams, arrivals since the league's previous season, departures before this one
+	"league_churn": {
+		"sql": """
+			WITH rosters AS (
+				SELECT DISTINCT League, season, Team, City FROM milb.team_history
+			), seasons AS (
+				SELECT League, season,
+					lag(season) OVER (PARTITION BY League ORDER BY season) AS prev_league_season,
+					lead(season) OVER (PARTITION BY League ORDER BY season) AS next_league_season
+				FROM (SELECT DISTINCT League, season FROM rosters)
+			), stints AS (
+				SELECT League, season,
+					lag(season) OVER (PARTITION BY League, Team, City ORDER BY season) AS prev_season,
+					lead(season) OVER (PARTITION BY League, Team, City ORDER BY season) AS next_season
+				FROM rosters
+			), per_season AS (
+				SELECT s.League, s.season, l.prev_league_season, count(*) AS teams,
+					count(*) FILTER (WHERE s.prev_season IS DISTINCT FROM l.prev_league_season) AS arrivals,
+					count(*) FILTER (WHERE s.next_season IS DISTINCT FROM l.next_league_season) AS leaving
+				FROM stints s JOIN seasons l USING (League, season)
+				GROUP BY s.League, s.season, l.prev_league_season
+			)
+			SELECT League, season, teams,
+				CASE WHEN prev_league_season IS NULL THEN NULL ELSE arrivals END AS joined,
+				lag(leaving) OVER w AS departed,
+				CAST(CASE WHEN prev_league_season IS NULL THEN NULL ELSE arrivals END + lag(leaving) OVER w AS DOUBLE)
+					/ nullif(lag(teams) OVER w, 0) AS churn_rate
+			FROM per_season
+			WINDOW w AS (PARTITION BY League ORDER BY season)
+			ORDER BY League, season;
+		""",
+		"params": {},
+	},
+}
+
+# Functions
+def attach_sqlite(con, db_path=DB_PATH, schema=SQLITE_SCHEMA):
+	'''
+	Make the SQLite tables available as <schema>.<table>.
+	Prefers a live read-only ATTACH; falls back to copying each table in (via pandas).
+
+	:return: "attach" or "copy"
+	'''
+	try:
+		con.execute(f"ATTACH '{os.path.abspath(db_path)}' AS {schema} (TYPE sqlite, READ_ONLY);")
+		return "attach"
+	except duckdb.Error as e:
+		print(f"DuckDB sqlite extension unavailable, copying tables instead: {str(e).splitlines()[0]}")
+	con.execute(f"CREATE SCHEMA IF NOT EXISTS {schema};")
+	conn = sqlite3.connect(db_path)
+	try:
+		tables = [r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%';")]
+		for table in tables:
+			df = pd.read_sql_query(f'SELECT * FROM "{table}";', conn)
+			con.register("_sqlite_import", df)
+			con.execute(f'CREATE OR REPLACE TABLE {schema}."{table}" AS SELECT * FROM _sqlite_import;')
+			con.unregister("_sqlite_import")
+	finally:
+		conn.close()
+	return "copy"
+
+def register_parquet(con, fin_path=FIN_PATH):
+	'''One view per Parquet file or hive-partitioned Parquet directory in fin_path. Returns the view names.'''
+	views = []
+	if not os.path.isdir(fin_path):
+		return views
+	for entry in sorted(os.listdir(fin_path)):
+		path = os.path.abspath(os.path.join(fin_path, entry))
+		if not entry.endswith(".parquet"):
+			continue
+		name = entry[:-len(".parquet")]
+		if os.path.isdir(path):
+			source = f"read_parquet('{path}/**/*.parquet', hive_partitioning = true)"
+		else:
+			source = f"read_parquet('{path}')"
+		con.execute(f'CREATE OR REPLACE VIEW "{name}" AS SELECT * FROM {source};')
+		views.append(name)
+	return views
+
+def connect(db_path=DB_PATH, fin_path=FIN_PATH):
+	'''In-memory DuckDB connection with the SQLite database and the fin Parquet files in scope.'''
+	con = duckdb.connect()
+	if os.path.exists(db_path):
+		attach_sqlite(con, db_path)
+	register_parquet(con, fin_path)
+	return con
+
+def run_query(name, con=None, db_path=DB_PATH, fin_path=FIN_PATH, **params):
+	'''
+	Run a named query and return a DataFrame.
+
+	:param con: Reuse an open connection from connect(); otherwise one is opened and closed around the query
+	:param params: Overrides for the query's parameters (see NAMED_QUERIES[name]["params"])
+	'''
+	if name not in NAMED_QUERIES:
+		raise KeyError(f"Unknown query {name!r}; expected one of {sorted(NAMED_QUERIES)}")
+	query = NAMED_QUERIES[name]
+	unknown = set(params) - set(query["params"])
+	if unknown:
+		raise TypeError(f"{name} does not take {sorted(unknown)}")
+	owned = con is None
+	con = con or connect(db_path, fin_path)
+	try:
+		bound = {**query["params"], **params}
+		return con.execute(query["sql"], bound or None).df()
+	finally:
+		if owned:
+			con.close()
@@ -0,0 +1,232 @@
+'''
+Docstring for features.modeling_table
+
+Incremental builder for data/fin/modeling_table.parquet: one row per team and season (team_history) with the
+team city's features (cities) and that year's ACS5 metrics for the city's CBSA (acs5_cbsa_panel).
+- Output is a hive-partitioned Parquet directory, one partition per season (season=YYYY/part-0.parquet)
+- _manifest.json keeps a fingerprint per season of every input row that feeds it (team rows, their city rows, their
+  CBSA mapping and panel rows) plus BUILDER_VERSION; only seasons whose fingerprint changed are joined and rewritten
+- Changed seasons are joined CHUNK_SEASONS at a time, cast to compact dtypes (MODELING_DTYPES), and each partition
+  file is written to a temp name and os.replace()d, then recorded in the manifest, so an interrupted run never
+  leaves a half-written partition and simply redoes the missing seasons next time
+- Seasons no longer in team_history are removed from disk (season=* directories), also on a --full rebuild
+- verify_modeling_table() rebuilds everything from scratch in a temp directory and compares the partitions on disk
+'''
+
+# Imports
+import hashlib, json, os, shutil, sqlite3, tempfile
+import numpy as np
+import pandas as pd
+from src.collect.census_api import ACS_VARIABLES
+
+# Constants
+DB_PATH = os.path.abspath(os.path.join('.','database','milb.sqlite'))
+PANEL_PATH = os.path.join(".","data","fin","acs5_cbsa_panel.parquet")
+CBSA_CACHE_PATH = os.path.join(".","data","raw","census","acs5")
+MODELING_TABLE_PATH = os.path.join(".","data","fin","modeling_table.parquet")
+MANIFEST_FILE = "_manifest.json"
+BUILDER_VERSION = 3 # Bump when the join or dtypes change: every partition is rebuilt
+CHUNK_SEASONS = 8
+
+TEAM_COLUMNS = ["season", "team_id", "Team", "League", "Division", "City", "State", "Stadium", "Capacity", "Affiliate", "Mascot"]
+CITY_FEATURE_COLUMNS = ["city_id", "metro", "county", "csa", "year_founded_min", "year_founded_max", "area_max", "pop_max",
+						"gdp_max", "latitude", "longitude"]
+METRIC_COLUMNS = [f"acs_{v}" for v in ACS_VARIABLES]
+
+MODELING_DTYPES = {
+	"season": "int16", "team_id": "Int32", "Team": "category", "League": "category", "Division": "category",
+	"City": "category", "State": "category", "Stadium": "category", "Capacity": "Int32", "Affiliate": "category",
+	"Mascot": "category", "cbsa_code": "category",
+	"city_id": "Int32", "metro": "category", "county": "category", "csa": "category", # csa: infobox text (CSA name)
+	"year_founded_min": "Int16", "year_founded_max": "Int16", "area_max": "float32", "pop_max": "float64", "gdp_max": "float32",
+	"latitude": "float32", "longitude": "float32",
+	**{col: "float64" for col in METRIC_COLUMNS},
+}
+MODELING_COLUMNS = list(MODELING_DTYPES)
+
+# Functions
+def load_team_history(db_path=DB_PATH):
+	conn = sqlite3.connect(db_path)
+	df = pd.read_sql_query(f"SELECT {', '.join(TEAM_COLUMNS)} FROM team_history;", conn)
+	conn.close()
+	return df
+
+def load_city_features(db_path=DB_PATH):
+	conn = sqlite3.connect(db_path)
+	df = pd.read_sql_query(f"""
+		SELECT id AS city_id, city AS City, state AS State, {', '.join(CITY_FEATURE_COLUMNS[1:])}
+		FROM cities;
+	""", conn)
+	conn.close()
+	return df
+
+def load_panel_wide(panel_path=PANEL_PATH):
+	'''ACS panel pivoted to one row per (cbsa_code, season) with acs_<variable> columns; also returns its CBSA vintage.'''
+	if not os.path.exists(panel_path):
+		return pd.DataFrame(columns=["cbsa_code", "season"] + METRIC_COLUMNS), None
+	panel = pd.read_parquet(panel_path)
+	vintage = panel["cbsa_vintage"].iloc[0] if len(panel) and "cbsa_vintage" in panel.columns else None
+	panel = panel[panel["variable"].isin(ACS_VARIABLES)]
+	wide = panel.pivot_table(index=["cbsa_code", "year"], columns="variable", values="value", aggfunc="first")
+	wide = wide.reindex(columns=ACS_VARIABLES).add_prefix("acs_").reset_index().rename(columns={"year": "season"})
+	wide.columns.name = None
+	wide["season"] = wide["season"].astype("int64")
+	return wide, vintage
+
+def load_cbsa_map(vintage, cache_path=CBSA_CACHE_PATH):
+	'''"City, State" -> CBSA code, as resolved (and cached) by census_panel.resolve_team_cbsas. No lookups here.'''
+	path = os.path.join(cache_path, f"team_cbsas_{vintage}.json")
+	if vintage is None or not os.path.exists(path):
+		return {}
+	with open(path, "r", encoding="utf-8") as f:
+		return {k: v for k, v in json.load(f).items() if v}
+
+def row_hashes(df, columns):
+	'''One uint64 per row over the given columns (0 where the frame has no row, after a left merge).'''
+	if df.empty:
+		return np.zeros(0, dtype="uint64")
+	return pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+
+def season_fingerprints(history, cities, panel_wide, cbsa_map):
+	'''
+	Fingerprint per season over exactly the inputs that season's rows depend on.
+
+	:return: (dict season -> hex digest, history with cbsa_code attached)
+	'''
+	history = history.copy()
+	history["cbsa_code"] = (history["City"] + ", " + history["State"]).map(cbsa_map).astype(object) # object even when nothing maps
+	keyed = history[["season", "City", "State", "cbsa_code"]].copy()
+	keyed["_team"] = row_hashes(history, TEAM_COLUMNS + ["cbsa_code"])
+	# Merge row positions rather than the hashes themselves (a left merge would turn uint64 into lossy float64)
+	keyed = keyed.merge(cities[["City", "State"]].assign(_city_row=np.arange(len(cities))), on=["City", "State"], how="left")
+	keyed = keyed.merge(panel_wide[["cbsa_code", "season"]].assign(_panel_row=np.arange(len(panel_wide))), on=["cbsa_code", "season"], how="left")
+	city_hashes = np.append(row_hashes(cities, list(cities.columns)), np.uint64(0)) # Position -1 -> 0 (no city row)
+	panel_hashes = np.append(row_hashes(panel_wide, list(panel_wide.columns)), np.uint64(0))
+	keyed["_city"] = city_hashes[keyed["_city_row"].fillna(-1).astype("int64").to_numpy()]
+	keyed["_panel"] = panel_hashes[keyed["_panel_row"].fillna(-1).astype("int64").to_numpy()]
+	keyed = keyed.sort_values(["season", "_team", "_city", "_panel"], kind="stable")
+	fingerprints = {}
+	for season, group in keyed.groupby("season", sort=True):
+		digest = hashlib.sha256(str(BUILDER_VERSION).encode())
+		digest.update(group[["_team", "_city", "_panel"]].to_numpy(dtype="uint64").tobytes())
+		fingerprints[int(season)] = digest.hexdigest()
+	return fingerprints, history
+
+def join_chunk(history, cities, panel_wide):
+	'''Team-season rows for a chunk of seasons joined with city features and metrics (numeric MODELING_DTYPES).'''
+	df = history.merge(cities, on=["City", "State"], how="left")
+	df = df.merge(panel_wide, on=["cbsa_code", "season"], how="left")
+	for col in MODELING_COLUMNS:
+		if col not in df.columns:
+			df[col] = np.nan
+	df = df[MODELING_COLUMNS].copy()
+	numeric = {col: dtype for col, dtype in MODELING_DTYPES.items() if dtype != "category"}
+	for col in numeric: # SQLite columns keep whatever was stored (e.g. text in an INTEGER column): non-numbers -> NA
+		df[col] = pd.to_numeric(df[col], errors="coerce")
+	for col in set(MODELING_COLUMNS) - set(numeric): # Categories are always strings (csa may be stored as a number)
+		df[col] = df[col].map(lambda v: v if v is None or isinstance(v, str) or pd.isna(v) else str(v)).astype(object)
+	df = df.astype({col: ("float64" if dtype in ("Int16", "Int32") else dtype) for col, dtype in numeric.items()}).astype(numeric)
+	return df.sort_values(["season", "League", "Team", "City"], kind="stable").reset_index(drop=True)
+
+def compact_partition(df):
+	'''Categoricals are built per season, so a partition never depends on which chunk it was joined in.'''
+	return df.astype({col: "category" for col, dtype in MODELING_DTYPES.items() if dtype == "category"}).reset_index(drop=True)
+
+def partition_dir(output_path, season):
+	return os.path.join(output_path, f"season={season}")
+
+def seasons_on_disk(output_path):
+	'''Seasons with a season=YYYY directory under output_path, whatever the manifest says.'''
+	if not os.path.isdir(output_path):
+		return []
+	return sorted(int(name[7:]) for name in os.listdir(output_path)
+				if name.startswith("season=") and name[7:].isdigit() and os.path.isdir(os.path.join(output_path, name)))
+
+def partition_schema():
+	'''Arrow schema for a partition file, fixed up front so an all-null column is typed the same in every season.'''
+	import pyarrow as pa
+	arrow_types = {"int16": pa.int16(), "Int16": pa.int16(), "Int32": pa.int32(), "float32": pa.float32(),
+					"float64": pa.float64(), "category": pa.dictionary(pa.int32(), pa.string())}
+	return pa.schema([(col, arrow_types[dtype]) for col, dtype in MODELING_DTYPES.items() if col != "season"])
+
+def write_partition(df, output_path, season):
+	'''Write one season atomically (temp file + os.replace). The season column lives in the directory name.'''
+	import pyarrow as pa
+	import pyarrow.parquet as pq
+	folder = partition_dir(output_path, season)
+	os.makedirs(folder, exist_ok=True)
+	final_path = os.path.join(folder, "part-0.parquet")
+	tmp_path = final_path + ".tmp"
+	table = pa.Table.from_pandas(df.drop(columns="season"), schema=partition_schema(), preserve_index=False)
+	pq.write_table(table, tmp_path)
+	os.replace(tmp_path, final_path)
+
+def read_manifest(output_path):
+	path = os.path.join(output_path, MANIFEST_FILE)
+	if not os.path.exists(path):
+		return {}
+	with open(path, "r", encoding="utf-8") as f:
+		return {int(k): v for k, v in json.load(f).get("seasons", {}).items()}
+
+def write_manifest(output_path, seasons):
+	path = os.path.join(output_path, MANIFEST_FILE)
+	with open(path + ".tmp", "w", encoding="utf-8") as f:
+		json.dump({"builder_version": BUILDER_VERSION, "seasons": {str(k): v for k, v in sorted(seasons.items())}}, f, indent=1)
+	os.replace(path + ".tmp", path)
+
+def build_modeling_table(db_path=DB_PATH, panel_path=PANEL_PATH, output_path=MODELING_TABLE_PATH,
+						cbsa_cache_path=CBSA_CACHE_PATH, full=False, chunk_seasons=CHUNK_SEASONS):
+	'''
+	Bring the modeling table up to date with its inputs.
+
+	:param full: Ignore the manifest and rebuild every season
+	:param chunk_seasons: Seasons joined per chunk (bounds memory of the join)
+	:return: dict with built/removed/unchanged season lists
+	'''
+	history = load_team_history(db_path)
+	cities = load_city_features(db_path)
+	panel_wide, vintage = load_panel_wide(panel_path)
+	fingerprints, history = season_fingerprints(history, cities, panel_wide, load_cbsa_map(vintage, cbsa_cache_path))
+
+	os.makedirs(output_path, exist_ok=True)
+	manifest = {} if full else read_manifest(output_path)
+	stale = [s for s in fingerprints if manifest.get(s) != fingerprints[s] or not os.path.exists(partition_dir(output_path, s))]
+	removed = sorted((set(seasons_on_disk(output_path)) | set(manifest)) - set(fingerprints)) # Disk too: --full resets the manifest
+
+	for season in removed:
+		shutil.rmtree(partition_dir(output_path, season), ignore_errors=True)
+		manifest.pop(season, None)
+	if removed:
+		write_manifest(output_path, manifest)
+
+	for i in range(0, len(stale), chunk_seasons):
+		chunk = stale[i:i + chunk_seasons]
+		joined = join_chunk(history[history["season"].isin(chunk)], cities, panel_wide)
+		for season, part in joined.groupby("season", sort=True):
+			write_partition(compact_partition(part), output_path, int(season))
+			manifest[int(season)] = fingerprints[int(season)]
+		write_manifest(output_path, manifest) # Per chunk: a crash loses at most one chunk of work
+		print(f"modeling_table: built seasons {chunk[0]}-{chunk[-1]}")
+
+	return {"built": sorted(stale), "removed": sorted(removed), "unchanged": sorted(set(fingerprints) - set(stale))}
+
+def verify_modeling_table(db_path=DB_PATH, panel_path=PANEL_PATH, output_path=MODELING_TABLE_PATH, cbsa_cache_path=CBSA_CACHE_PATH):
+	'''
+	Rebuild from scratch in a temp directory and compare with output_path partition by partition.
+
+	:return: dict with ok flag and the seasons that are missing, extra or different
+	'''
+	import pyarrow.parquet as pq
+	with tempfile.TemporaryDirectory(prefix="modeling_table_") as tmp:
+		fresh_path = os.path.join(tmp, "modeling_table.parquet")
+		build_modeling_table(db_path, panel_path, fresh_path, cbsa_cache_path, full=True)
+		fresh, current = seasons_on_disk(fresh_path), seasons_on_disk(output_path) # What readers see, not the manifest
+		missing = sorted(set(fresh) - set(current))
+		extra = sorted(set(current) - set(fresh))
+		different = []
+		for season in sorted(set(fresh) & set(current)):
+			a = os.path.join(partition_dir(fresh_path, season), "part-0.parquet")
+			b = os.path.join(partition_dir(output_path, season), "part-0.parquet")
+			if not os.path.exists(b) or not pq.read_table(a).equals(pq.read_table(b)):
+				different.append(season)
+	return {"ok": not (missing or extra or different), "missing": missing, "extra": extra, "different": different}
@@ -0,0 +1,230 @@
+'''
+Docstring for modeling.runner
+
+Cross-validated model runs on the modeling table ("what makes a team viable?").
+- The feature matrix is built once per feature set and saved as .npy; workers open it with mmap_mode="r", so every
+  process shares the same pages instead of receiving a pickled copy
+- Every (fold, hyperparameter candidate) pair is a task on a process pool
+- Fitted models and fold scores are cached under data/models/<feature hash>/<params hash>/; a repeated experiment
+  only runs the tasks that are missing
+- Each run reports wall time and worker peak RSS for the folds it ran (each run gets a fresh pool), plus the parent's
+  peak RSS, which is a process-lifetime high-water mark; the report is appended to data/models/experiments.jsonl
+
+Default label: the team (same Team, City and League) is in the table again next season. The final season is unlabeled.
+'''
+
+# Imports
+import hashlib, json, os, pickle, sys, time
+import datetime as dt
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+try:
+	import resource
+except ImportError: # Windows
+	resource = None
+
+# Constants
+MODELING_TABLE_PATH = os.path.join(".","data","fin","modeling_table.parquet")
+MODEL_CACHE_PATH = os.path.join(".","data","models")
+EXPERIMENT_LOG = "experiments.jsonl"
+N_SPLITS = 5
+MODEL_NAME = "hist_gradient_boosting"
+PARAM_GRID = [
+	{"learning_rate": 0.05, "max_leaf_nodes": 15, "max_iter": 200},
+	{"learning_rate": 0.05, "max_leaf_nodes": 31, "max_iter": 200},
+	{"learning_rate": 0.1, "max_leaf_nodes": 15, "max_iter": 100},
+	{"learning_rate": 0.1, "max_leaf_nodes": 31, "max_iter": 100},
+]
+ID_COLUMNS = ["season", "team_id", "Team", "League", "City", "State", "cbsa_code", "city_id"]
+
+# Functions
+def stable_hash(obj):
+	return hashlib.sha256(json.dumps(obj, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+def peak_rss_mb(who="self"):
+	'''Peak resident set size in MB (this process, or the largest finished child) over the process lifetime; None where unsupported.'''
+	if resource is None:
+		return None
+	usage = resource.getrusage(resource.RUSAGE_SELF if who == "self" else resource.RUSAGE_CHILDREN)
+	scale = 1 if sys.platform == "darwin" else 1024 # ru_maxrss: bytes on macOS, KB on Linux
+	return round(usage.ru_maxrss * scale / 2**20, 1)
+
+def next_season_label(df):
+	'''1 if the same Team/City/League appears in the following season, 0 if not, NaN in the last season.'''
+	keys = ["Team", "City", "League", "season"]
+	rows = df[keys].astype({"Team": object, "City": object, "League": object, "season": "int64"})
+	following = rows.drop_duplicates().assign(season=lambda d: d["season"] - 1, _next=1.0)
+	label = rows.merge(following, on=keys, how="left")["_next"].fillna(0.0).to_numpy(dtype="float32")
+	label[rows["season"].to_numpy() == rows["season"].max()] = np.nan
+	return label
+
+def feature_frame(df):
+	'''Numeric model inputs: everything but identifiers, categoricals as their codes (-1 -> NaN).'''
+	features = {}
+	for col in df.columns:
+		if col in ID_COLUMNS:
+			continue
+		if isinstance(df[col].dtype, pd.CategoricalDtype):
+			codes = df[col].cat.codes.astype("float32")
+			features[col] = codes.where(codes >= 0)
+		elif pd.api.types.is_numeric_dtype(df[col]):
+			features[col] = df[col].astype("float32")
+	return pd.DataFrame(features)
+
+def prepare_features(table_path=MODELING_TABLE_PATH, cache_path=MODEL_CACHE_PATH):
+	'''
+	Build (or reuse) the on-disk feature matrix for the current modeling table.
+
+	:return: dict with feature_hash, paths to X/y/groups .npy files, column names and shape
+	'''
+	df = pd.read_parquet(table_path)
+	df = df.sort_values(["season", "League", "Team", "City"], kind="stable").reset_index(drop=True)
+	y = next_season_label(df)
+	keep = ~np.isnan(y)
+	X = feature_frame(df)[keep]
+	X = X.loc[:, X.nunique(dropna=True) > 1] # Empty/constant columns carry nothing (and break histogram binning)
+	columns = list(X.columns)
+	X = np.ascontiguousarray(X.to_numpy(dtype="float32", na_value=np.nan))
+	y, groups = y[keep].astype("int8"), df.loc[keep, "season"].to_numpy(dtype="int16")
+
+	digest = hashlib.sha256(json.dumps(columns).encode())
+	for arr in (X, y, groups):
+		digest.update(arr.tobytes())
+	feature_hash = digest.hexdigest()[:16]
+	folder = os.path.join(cache_path, feature_hash)
+	paths = {name: os.path.join(folder, f"{name}.npy") for name in ("X", "y", "groups")}
+	if not all(os.path.exists(p) for p in paths.values()):
+		os.makedirs(folder, exist_ok=True)
+		for name, arr in (("X", X), ("y", y), ("groups", groups)):
+			np.save(paths[name] + ".tmp.npy", arr)
+			os.replace(paths[name] + ".tmp.npy", paths[name])
+		with open(os.path.join(folder, "columns.json"), "w", encoding="utf-8") as f:
+			json.dump(columns, f)
+	return {"feature_hash": feature_hash, "paths": paths, "columns": columns, "shape": list(X.shape)}
+
+def cv_folds(groups, n_splits=N_SPLITS):
+	'''Folds by season (no season is split between train and test). Returns [(train_idx, test_idx)].'''
+	seasons = np.unique(groups)
+	blocks = np.array_split(seasons, min(n_splits, len(seasons)))
+	return [(np.flatnonzero(~np.isin(groups, block)), np.flatnonzero(np.isin(groups, block))) for block in blocks]
+
+def make_model(params):
+	from sklearn.ensemble import HistGradientBoostingClassifier
+	return HistGradientBoostingClassifier(random_state=0, **params)
+
+def task_dir(cache_path, feature_hash, params_key):
+	return os.path.join(cache_path, feature_hash, params_key)
+
+def run_fold(paths, fold, n_splits, params, out_dir):
+	'''Worker: fit one candidate on one fold from the memory-mapped matrix; cache the model and scores.'''
+	from sklearn.metrics import accuracy_score, log_loss, roc_auc_score
+	X = np.load(paths["X"], mmap_mode="r")
+	y = np.load(paths["y"], mmap_mode="r")
+	groups = np.load(paths["groups"], mmap_mode="r")
+	train_idx, test_idx = cv_folds(groups, n_splits)[fold]
+	start = time.perf_counter()
+	model = make_model(params).fit(X[train_idx], y[train_idx])
+	fit_seconds = time.perf_counter() - start
+	proba = model.predict_proba(X[test_idx])[:, 1]
+	y_test = np.asarray(y[test_idx])
+	result = {
+		"fold": fold, "params": params, "n_train": int(len(train_idx)), "n_test": int(len(test_idx)),
+		"fit_seconds": round(fit_seconds, 3),
+		"roc_auc": float(roc_auc_score(y_test, proba)) if len(np.unique(y_test)) > 1 else None,
+		"log_loss": float(log_loss(y_test, proba, labels=[0, 1])),
+		"accuracy": float(accuracy_score(y_test, proba >= 0.5)),
+		"worker_peak_rss_mb": peak_rss_mb("self"),
+	}
+	os.makedirs(out_dir, exist_ok=True)
+	with open(os.path.join(out_dir, f"fold_{fold}.pkl.tmp"), "wb") as f:
+		pickle.dump(model, f)
+	os.replace(os.path.join(out_dir, f"fold_{fold}.pkl.tmp"), os.path.join(out_dir, f"fold_{fold}.pkl"))
+	with open(os.path.join(out_dir, f"fold_{fold}.json"), "w", encoding="utf-8") as f:
+		json.dump(result, f)
+	return result
+
+def load_fold_result(out_dir, fold):
+	path = os.path.join(out_dir, f"fold_{fold}.json")
+	if not os.path.exists(path) or not os.path.exists(os.path.join(out_dir, f"fold_{fold}.pkl")):
+		return None
+	with open(path, "r", encoding="utf-8") as f:
+		return json.load(f)
+
+def summarize(results):
+	'''Mean fold scores per candidate, best (lowest log loss) first.'''
+	rows = []
+	for params_key, folds in results.items():
+		frame = pd.DataFrame(folds)
+		rows.append({"params_key": params_key, "params": folds[0]["params"], "folds": len(frame),
+					"roc_auc": frame["roc_auc"].mean(), "log_loss": frame["log_loss"].mean(),
+					"accuracy": frame["accuracy"].mean(), "fit_seconds": frame["fit_seconds"].sum()})
+	return sorted(rows, key=lambda r: r["log_loss"])
+
+def run_experiment(param_grid=PARAM_GRID, n_splits=N_SPLITS, table_path=MODELING_TABLE_PATH, cache_path=MODEL_CACHE_PATH,
+					max_workers=None):
+	'''
+	Cross-validate every candidate in param_grid, reusing cached folds.
+
+	:param max_workers: Pool size (default: os.cpu_count())
+	:return: dict with the ranked candidates, task counts, wall time and peak memory
+	'''
+	start = time.perf_counter()
+	features = prepare_features(table_path, cache_path)
+	tasks, results, run_now = [], {}, []
+	for params in param_grid:
+		params_key = stable_hash({"model": MODEL_NAME, "params": params, "n_splits": n_splits})
+		out_dir = task_dir(cache_path, features["feature_hash"], params_key)
+		results[params_key] = []
+		for fold in range(n_splits):
+			cached = load_fold_result(out_dir, fold)
+			if cached is not None:
+				results[params_key].append(cached)
+			else:
+				tasks.append((params_key, fold, params, out_dir))
+
+	if tasks:
+		with ProcessPoolExecutor(max_workers=max_workers) as pool:
+			futures = {pool.submit(run_fold, features["paths"], fold, n_splits, params, out_dir): params_key
+						for params_key, fold, params, out_dir in tasks}
+			for future in as_completed(futures):
+				try:
+					result = future.result()
+					results[futures[future]].append(result)
+					run_now.append(result)
+				except Exception as e:
+					print(f"{futures[future]}: fold failed ({e})")
+
+	report = {
+		"finished_on": dt.datetime.now().isoformat(timespec="seconds"),
+		"feature_hash": features["feature_hash"], "shape": features["shape"], "n_splits": n_splits,
+		"tasks_run": len(tasks), "tasks_cached": len(param_grid) * n_splits - len(tasks),
+		"wall_seconds": round(time.perf_counter() - start, 3),
+		# Workers: max over the folds run by this experiment (None if everything was cached). Parent: since process start,
+		# so in a notebook it can be an earlier experiment's peak
+		"worker_peak_rss_mb": max((r["worker_peak_rss_mb"] for r in run_now if r.get("worker_peak_rss_mb") is not None), default=None),
+		"process_lifetime_peak_rss_mb": peak_rss_mb("self"),
+		"candidates": summarize({k: v for k, v in results.items() if v}),
+	}
+	with open(os.path.join(cache_path, EXPERIMENT_LOG), "a", encoding="utf-8") as f:
+		f.write(json.dumps(report, default=str) + "\n")
+	return report
+
+def main(argv=None):
+	import argparse
+	parser = argparse.ArgumentParser(description="Cross-validate models on the modeling table (cached, parallel).")
+	parser.add_argument("--table", default=MODELING_TABLE_PATH)
+	parser.add_argument("--cache", default=MODEL_CACHE_PATH)
+	parser.add_argument("--splits", type=int, default=N_SPLITS)
+	parser.add_argument("--workers", type=int, default=None)
+	parser.add_argument("--grid", default=None, help="JSON list of parameter dicts (default: PARAM_GRID)")
+	args = parser.parse_args(argv)
+
+	grid = json.loads(args.grid) if args.grid else PARAM_GRID
+	report = run_experiment(grid, n_splits=args.splits, table_path=args.table, cache_path=args.cache, max_workers=args.workers)
+	print(f"features {report['feature_hash']} {report['shape']}  tasks run {report['tasks_run']}, cached {report['tasks_cached']}")
+	print(f"wall {report['wall_seconds']:.2f}s  worker peak RSS {report['worker_peak_rss_mb']} MB (this run)  "
+		f"parent peak RSS {report['process_lifetime_peak_rss_mb']} MB (process lifetime)")
+	for row in report["candidates"]:
+		print(f"  {row['params']}  auc={row['roc_auc']:.4f}  log_loss={row['log_loss']:.4f}  acc={row['accuracy']:.4f}  fit={row['fit_seconds']:.1f}s")
+	return report
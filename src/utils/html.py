@@ -1,8 +1,8 @@
 # Imports
-import requests 
 from bs4 import BeautifulSoup
 import datetime as dt
 import os, re
+from src.utils.transport import get_transport
 
 def set_user_agent(headers_file='user-agent.txt'):
 	wiki_user_headers = {}
@@ -24,9 +24,9 @@ def cook_soup(url, header = None, html_file_path = None, parser = 'html.parser')
 	if not header:
 		return None
 	try:
-		response = requests.get(
-		url = url,
-		headers = header) # Only need user-agent ('User-Agent' in .txt)
+		response = get_transport().get(
+		url,
+		headers = header) # Only need user-agent ('User-Agent' in .txt); pooled, rate-limited per host
 		timestamp = dt.datetime.now().strftime(format="%Y%m%d_%H%M%S")
 		response.raise_for_status()
 		# Parse soup
@@ -65,6 +65,19 @@ def find_latest_html(folder_path, internal_text=None):
 		return None
 	return os.path.join(folder_path, latest_file)
 
+def find_all_html(folder_path, internal_text):
+	'''Every archived snapshot of a page, oldest first: [(datetime, path), ...].'''
+	pattern = re.compile(
+		rf"wiki_{re.escape(internal_text)}_(\d{{8}}_\d{{6}})\.html")
+	snapshots = []
+	for filename in os.listdir(folder_path):
+		match = pattern.fullmatch(filename)
+		if not match:
+			continue
+		file_date = dt.datetime.strptime(match.group(1), "%Y%m%d_%H%M%S")
+		snapshots.append((file_date, os.path.join(folder_path, filename)))
+	return sorted(snapshots)
+
 def cook_html(html_file_path):
 	with open(html_file_path, 'r', encoding="utf-8-sig") as f:
 		# Read the file's content into a variable
@@ -0,0 +1,180 @@
+'''
+Docstring for utils.transport
+
+One HTTP transport for every collector (Wikipedia, Census, Nominatim, ...).
+- Keep-alive connection pooling through a shared requests.Session
+- Per-host token buckets instead of fixed time.sleep() pacing; unknown hosts get DEFAULT_POLICY
+- Timeouts on every request; retries with exponential backoff (+ jitter) that honor Retry-After
+- Sync (get) and asyncio (aget, gather_get) interfaces share the same pool and host budgets,
+  so different hosts run concurrently while each host stays within its own rate
+'''
+
+# Imports
+import asyncio
+import email.utils
+import random
+import threading
+import time
+import datetime as dt
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+
+# Constants
+DEFAULT_TIMEOUT = 20 # seconds (connect + read)
+MAX_RETRIES = 4
+BACKOFF_BASE = 1.0 # seconds; attempt n waits ~BACKOFF_BASE * 2**n
+MAX_BACKOFF = 120
+POOL_SIZE = 16
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+HOST_POLICIES = { # host: (requests per second, burst)
+	"en.wikipedia.org": (1 / 6, 1), # Previously SLEEP_TIME = 6 between page pulls
+	"upload.wikimedia.org": (2, 4),
+	"api.census.gov": (2, 2), # Previously SLEEP_TIME = 0.5
+	"geocoding.geo.census.gov": (2, 2),
+	"nominatim.openstreetmap.org": (1, 1), # Nominatim usage policy: max 1 request/second
+}
+DEFAULT_POLICY = (5, 5)
+
+# Classes
+class TokenBucket:
+	'''Thread-safe token bucket. reserve() takes a token now and says how long to wait before using it.'''
+	def __init__(self, rate, burst=1):
+		self.rate = float(rate)
+		self.capacity = float(burst)
+		self.tokens = float(burst)
+		self.updated = time.monotonic()
+		self.lock = threading.Lock()
+
+	def _refill(self, now):
+		self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+		self.updated = now
+
+	def reserve(self):
+		with self.lock:
+			self._refill(time.monotonic())
+			self.tokens -= 1 # May go negative: callers queue up behind the debt
+			return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+	def penalize(self, seconds):
+		'''Hold the bucket empty for at least `seconds` (e.g. after a Retry-After).'''
+		with self.lock:
+			self._refill(time.monotonic())
+			self.tokens = min(self.tokens, -seconds * self.rate)
+
+class Transport:
+	def __init__(self, policies=None, timeout=DEFAULT_TIMEOUT, max_retries=MAX_RETRIES, backoff_base=BACKOFF_BASE,
+				pool_size=POOL_SIZE, headers=None):
+		self.policies = dict(HOST_POLICIES if policies is None else policies)
+		self.timeout = timeout
+		self.max_retries = max_retries
+		self.backoff_base = backoff_base
+		self.session = requests.Session()
+		adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0) # Retries handled here
+		self.session.mount("https://", adapter)
+		self.session.mount("http://", adapter)
+		if headers:
+			self.session.headers.update(headers)
+		self._buckets = {}
+		self._lock = threading.Lock()
+
+	def bucket(self, host):
+		with self._lock:
+			if host not in self._buckets:
+				rate, burst = self.policies.get(host, DEFAULT_POLICY)
+				self._buckets[host] = TokenBucket(rate, burst)
+			return self._buckets[host]
+
+	def throttle(self, host):
+		'''Block until the host's budget allows another request (also for clients outside this session, e.g. geopy).'''
+		wait = self.bucket(host).reserve()
+		if wait > 0:
+			time.sleep(wait)
+
+	async def athrottle(self, host):
+		wait = self.bucket(host).reserve()
+		if wait > 0:
+			await asyncio.sleep(wait)
+
+	def _backoff(self, attempt):
+		delay = self.backoff_base * (2 ** attempt)
+		return min(MAX_BACKOFF, delay + random.uniform(0, self.backoff_base))
+
+	def _retry_delay(self, response, attempt):
+		'''Seconds to wait before retrying a response; Retry-After wins over the backoff schedule.'''
+		retry_after = response.headers.get("Retry-After")
+		if retry_after:
+			try:
+				return min(MAX_BACKOFF, max(0.0, float(retry_after)))
+			except ValueError:
+				try:
+					when = email.utils.parsedate_to_datetime(retry_after)
+					return min(MAX_BACKOFF, max(0.0, (when - dt.datetime.now(dt.timezone.utc)).total_seconds()))
+				except (TypeError, ValueError):
+					pass
+		return self._backoff(attempt)
+
+	def request(self, method, url, **kwargs):
+		'''requests-style call with pooling, host rate limits, timeout and retries. Raises like requests does.'''
+		host = urlsplit(url).hostname or ""
+		kwargs.setdefault("timeout", self.timeout)
+		for attempt in range(self.max_retries + 1):
+			self.throttle(host)
+			try:
+				response = self.session.request(method, url, **kwargs)
+			except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+				if attempt == self.max_retries:
+					raise
+				time.sleep(self._backoff(attempt))
+				continue
+			if response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+				delay = self._retry_delay(response, attempt)
+				self.bucket(host).penalize(delay) # Everyone else hitting this host backs off too
+				continue
+			return response
+		return response
+
+	def get(self, url, **kwargs):
+		return self.request("GET", url, **kwargs)
+
+	async def arequest(self, method, url, **kwargs):
+		'''asyncio version of request(); the blocking I/O runs in a worker thread on the shared pool.'''
+		host = urlsplit(url).hostname or ""
+		kwargs.setdefault("timeout", self.timeout)
+		for attempt in range(self.max_retries + 1):
+			await self.athrottle(host)
+			try:
+				response = await asyncio.to_thread(self.session.request, method, url, **kwargs)
+			except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+				if attempt == self.max_retries:
+					raise
+				await asyncio.sleep(self._backoff(attempt))
+				continue
+			if response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+				delay = self._retry_delay(response, attempt)
+				self.bucket(host).penalize(delay)
+				continue
+			return response
+		return response
+
+	async def aget(self, url, **kwargs):
+		return await self.arequest("GET", url, **kwargs)
+
+	async def gather_get(self, urls, **kwargs):
+		'''GET many URLs concurrently; results (response or exception) come back in input order.'''
+		return await asyncio.gather(*(self.aget(url, **kwargs) for url in urls), return_exceptions=True)
+
+	def close(self):
+		self.session.close()
+
+# Functions
+_TRANSPORT = None
+_TRANSPORT_LOCK = threading.Lock()
+
+def get_transport():
+	'''Process-wide shared Transport, created on first use (not on import).'''
+	global _TRANSPORT
+	with _TRANSPORT_LOCK:
+		if _TRANSPORT is None:
+			_TRANSPORT = Transport()
+		return _TRANSPORT
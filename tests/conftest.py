@@ -0,0 +1,6 @@
+# Tests import the pipeline as the CLI does (src.*), from the repo root
+import os, sys
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if REPO_ROOT not in sys.path:
+	sys.path.insert(0, REPO_ROOT)
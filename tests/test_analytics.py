@@ -0,0 +1,25 @@
+'''
+Docstring for tests.test_analytics
+
+population_deltas compares against the year 1 and 5 years back, even where the panel skips years.
+'''
+
+# Imports
+import math, os
+import pandas as pd
+import pytest
+
+# Functions
+def test_population_deltas_by_year_with_gaps(tmp_path):
+	pytest.importorskip("duckdb")
+	from src.features.analytics import run_query
+	years = [2009, 2010, 2012, 2014, 2015, 2016, 2017] # 2011 and 2013 failed to fetch
+	panel = pd.DataFrame({"cbsa_code": "10420", "year": years, "variable": "B01003_001E", "value": [float(y - 2000) for y in years]})
+	panel.to_parquet(tmp_path / "acs5_cbsa_panel.parquet", index=False)
+	df = run_query("population_deltas", db_path=os.path.join(str(tmp_path), "missing.sqlite"), fin_path=str(tmp_path))
+	rows = df.set_index("year")
+	assert rows.loc[2010, "delta_1y"] == 1.0
+	assert math.isnan(rows.loc[2012, "delta_1y"]) # No 2011 row: not compared with 2010
+	assert rows.loc[2015, "delta_1y"] == 1.0 and rows.loc[2015, "delta_5y"] == 5.0 # 2010
+	assert math.isnan(rows.loc[2016, "delta_5y"]) # No 2011 row
+	assert rows.loc[2017, "delta_5y"] == 5.0 # 2012
@@ -0,0 +1,27 @@
+'''
+Docstring for tests.test_census_panel
+
+resolve_team_cbsas caches answers only: a failed lookup is retried on the next run.
+'''
+
+# Imports
+import json
+import requests
+from src.collect import census_panel
+
+# Functions
+def test_failed_lookup_is_not_cached(tmp_path, monkeypatch):
+	answers = {"Toledo": {"cbsa_code": "45780"}, "Nowhere": None}
+	def lookup(city, state, acs_year, raise_errors=False):
+		if city not in answers:
+			raise requests.exceptions.ConnectionError("network down")
+		return answers[city]
+	monkeypatch.setattr(census_panel, "city_state_to_cbsa_with_micro", lookup)
+	cities = [("Akron", "Ohio"), ("Toledo", "Ohio"), ("Nowhere", "Ohio")]
+
+	assert census_panel.resolve_team_cbsas(cities, "2020", str(tmp_path)) == {"45780"}
+	with open(tmp_path / "team_cbsas_2020.json", "r", encoding="utf-8") as f:
+		assert json.load(f) == {"Toledo, Ohio": "45780", "Nowhere, Ohio": None}
+
+	answers["Akron"] = {"cbsa_code": "10420"} # Network is back
+	assert census_panel.resolve_team_cbsas(cities, "2020", str(tmp_path)) == {"10420", "45780"}
@@ -0,0 +1,41 @@
+'''
+Docstring for tests.test_city_history
+
+Backfilling an older snapshot replays the place's history without re-parsing snapshots already seen.
+'''
+
+# Imports
+import random, sqlite3
+from benchmarks.synth import synth_city_page, load_infobox_keys
+from src.clean.city_history import build_place_history, ensure_history_tables
+from src.clean.clean_cities import city_page_id
+
+# Functions
+def write_snapshot(folder, stamp, seed):
+	html = synth_city_page(random.Random(seed), "Akron", "Ohio", load_infobox_keys())
+	with open(folder / f"wiki_{city_page_id('Akron', 'Ohio')}_{stamp}.html", "w", encoding="utf-8-sig") as f:
+		f.write(html)
+
+def build(db_path, html_path):
+	conn = sqlite3.connect(db_path)
+	ensure_history_tables(conn)
+	with conn:
+		stats = build_place_history(conn, "Akron", "Ohio", html_path=str(html_path))
+	rows = conn.execute("SELECT field, qualifier, valid_from, value FROM city_fact_history ORDER BY 1, 2, 3").fetchall()
+	conn.close()
+	return stats, rows
+
+def test_backfill_parses_only_the_new_snapshot(tmp_path):
+	html_path = tmp_path / "city"
+	html_path.mkdir()
+	write_snapshot(html_path, "20230101_000000", seed=1)
+	write_snapshot(html_path, "20250101_000000", seed=2)
+	stats, _ = build(str(tmp_path / "a.sqlite"), html_path)
+	assert stats["parsed"] == 2
+
+	write_snapshot(html_path, "20240101_000000", seed=3) # Older than the newest one already stored
+	stats, rows = build(str(tmp_path / "a.sqlite"), html_path)
+	assert stats["parsed"] == 1 and stats["reused"] == 2
+
+	_, fresh_rows = build(str(tmp_path / "fresh.sqlite"), html_path)
+	assert rows == fresh_rows
@@ -0,0 +1,66 @@
+'''
+Docstring for tests.test_crosswalks
+
+canonicalize_key over every infobox key seen in the wild (city_html_all_infobox_data.txt), and the DST rows that
+must not reach the population/GDP aggregates.
+'''
+
+# Imports
+import os
+import pytest
+from src.clean.crosswalks import canonicalize_key, infobox_to_facts
+from src.clean.clean_cities import city_row_from_facts
+
+# Constants
+KEYS_FILE = os.path.join(os.path.dirname(__file__), "..", "city_html_all_infobox_data.txt")
+EXPECTED = {
+	"Country": ("country", ""), "State": ("state", ""), "Region": ("region", ""), "Metro": ("metro", ""), "County": ("county", ""),
+	"First settled": ("founded", "first settled"), "Founded": ("founded", "founded"), "Incorporated": ("founded", "incorporated"),
+	"Named after": ("named_after", ""),
+	"Government Type": ("government", "type"), "Government Body": ("government", "body"), "Government Mayor": ("government", "mayor"),
+	"Government Deputy Mayor": ("government", "deputy mayor"), "Government State Senators": ("government", "state senators"),
+	"Government Assemblymembers": ("government", "assemblymembers"), "Government US Rep": ("government", "us rep"),
+	"Area City": ("area", "city"), "Area Land": ("area_component", "land"), "Area Water": ("area_component", "water"),
+	"Elevation": ("elevation", ""),
+	"Population City": ("population", "city"), "Population Rank": ("population_rank", ""), "Population Density": ("population_density", ""),
+	"Population Urban": ("population", "urban"), "Population Urbandensity": ("population_density", "urban"),
+	"Population Metro": ("population", "metro"), "Demonyms": ("demonym", ""), "GDP Metro": ("gdp", "metro"), "Time zone": ("time_zone", ""),
+	"GDP Summer": ("time_zone", "summer"), "ZIP code": ("zip_code", ""), "Area codes": ("area_code", ""), "FIPS code": ("fips_code", ""),
+	"GNIS feature ID": ("gnis", ""), "Website": ("website", ""), "Settled": ("founded", "settled"), "Area Total": ("area", "total"),
+	"Population Total": ("population", "total"), "Population Estimate": ("population", "estimate"), "Demonym": ("demonym", ""),
+	"GDP Charlotte": ("gdp", "charlotte"), "ZIP Codes": ("zip_code", ""), "Counties": ("county", ""),
+	"Government Council members": ("government", "council members"), "Area State capital city": ("area", "state capital city"),
+	"Population State capital city": ("population", "state capital city"), "Government City Manager": ("government", "city manager"),
+	"Government Council": ("government", "council"), "Population Summer": ("time_zone", "summer"), "ZIP codes": ("zip_code", ""),
+	"Primary Airport": ("airport", ""), "Public transportation": ("public_transportation", ""), "Established": ("founded", "established"),
+	"Area code": ("area_code", ""),
+}
+
+# Functions
+def read_keys():
+	with open(KEYS_FILE, "r", encoding="utf-8") as f:
+		return [line.strip() for line in f if line.strip()]
+
+def test_every_known_key_is_mapped():
+	keys = read_keys()
+	assert set(keys) == set(EXPECTED), "keys file changed: update EXPECTED"
+	assert {k: canonicalize_key(k) for k in keys} == {k: EXPECTED[k] for k in keys}
+
+@pytest.mark.parametrize("raw_key, expected", [
+	("Population CSA", ("population", "csa")), ("Population TriCities", ("population", "tricities")),
+	("Population CSA density", ("population_density", "csa")), ("GDP", ("gdp", "")), ("GDP Total", ("gdp", "total")),
+	("GDP Greensboro", ("gdp", "greensboro")), ("Area Urban", ("area", "urban")), ("Area Metro", ("area", "metro")),
+	("Urban Area", ("urban_area", "")), ("Metropolitan statistical area", ("msa", "")), ("  population   city ", ("population", "city")),
+	("Population Something new", None), ("GDP Raleigh", None), ("Area Winter", None),
+])
+def test_other_keys(raw_key, expected):
+	assert canonicalize_key(raw_key) == expected
+
+def test_summer_rows_do_not_feed_aggregates():
+	unknown = {}
+	facts = infobox_to_facts("Akron, Ohio", {"Population City": "190,469", "Population Summer": "UTC−4", "GDP Metro": "$40.1 billion",
+											"GDP Summer": "UTC−4", "Population Festival": "12"}, unknown_keys=unknown)
+	row = city_row_from_facts("Akron", "Ohio", facts)
+	assert row["pop_min"] == row["pop_max"] == 190469.0
+	assert row["gdp_min"] == row["gdp_max"]
+	assert unknown == {"Population Festival": 1}
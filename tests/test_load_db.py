@@ -0,0 +1,94 @@
+'''
+Docstring for tests.test_load_db
+
+bulk_upsert against the real minor_league_teams table and its updated_on trigger.
+'''
+
+# Imports
+import sqlite3
+import pytest
+from src.clean.clean_teams import CREATE_TABLE_SQL, CREATE_UPDATE_TRIGGER_SQL
+from src.database.load_db import bulk_upsert
+
+# Constants
+KEYS = ["Team", "City", "League"]
+VALUES = ["Stadium", "Capacity", "Affiliate"]
+SENTINEL = "2000-01-01 00:00:00"
+ROWS = [
+	("Akron RubberDucks", "Akron", "Eastern League", "Canal Park", 7630, "Cleveland Guardians"),
+	("Toledo Mud Hens", "Toledo", "International League", "Fifth Third Field", 10300, "Detroit Tigers"),
+	("Erie SeaWolves", "Erie", "Eastern League", "UPMC Park", 6000, None),
+]
+
+# Functions
+@pytest.fixture
+def conn():
+	conn = sqlite3.connect(":memory:")
+	conn.execute(CREATE_TABLE_SQL)
+	conn.execute(CREATE_UPDATE_TRIGGER_SQL)
+	# Counts every UPDATE on the table, including ones made by other triggers
+	conn.execute("CREATE TABLE audit (team TEXT)")
+	conn.execute("CREATE TRIGGER trg_audit AFTER UPDATE ON minor_league_teams BEGIN INSERT INTO audit VALUES (NEW.Team); END")
+	yield conn
+	conn.close()
+
+def upsert(conn, rows):
+	counts = bulk_upsert(conn, "minor_league_teams", KEYS, VALUES, rows)
+	conn.commit()
+	return counts
+
+def stored(conn):
+	return conn.execute(f"SELECT {', '.join(KEYS + VALUES)} FROM minor_league_teams ORDER BY Team").fetchall()
+
+def stamps(conn):
+	return dict(conn.execute("SELECT Team, updated_on FROM minor_league_teams"))
+
+def backdate(conn):
+	conn.execute("UPDATE minor_league_teams SET updated_on = ?", (SENTINEL,))
+	conn.execute("DELETE FROM audit")
+	conn.commit()
+
+def test_insert_reload_and_partial_change(conn):
+	assert upsert(conn, ROWS) == {"inserted": 3, "updated": 0, "unchanged": 0}
+	assert stored(conn) == sorted(ROWS)
+	assert upsert(conn, ROWS) == {"inserted": 0, "updated": 0, "unchanged": 3}
+
+	changed = [ROWS[0][:3] + ("Canal Park", 7630, "Cleveland Indians")] + ROWS[1:]
+	new = ("Reading Fightin Phils", "Reading", "Eastern League", "FirstEnergy Stadium", 9000, None)
+	assert upsert(conn, changed + [new]) == {"inserted": 1, "updated": 1, "unchanged": 2}
+	assert stored(conn) == sorted(changed + [new])
+
+def test_null_to_value_and_back_is_a_change(conn):
+	upsert(conn, ROWS)
+	erie = ROWS[2]
+	assert upsert(conn, [erie[:5] + ("Detroit Tigers",)])["updated"] == 1 # NULL -> value
+	assert upsert(conn, [erie])["updated"] == 1 # value -> NULL
+	assert upsert(conn, [erie])["unchanged"] == 1 # NULL -> NULL is not a change
+
+def test_duplicate_keys_last_record_wins(conn):
+	first = ROWS[0]
+	last = first[:3] + ("Canal Park", 9999, "Cleveland Guardians")
+	assert upsert(conn, [first, ROWS[1], last]) == {"inserted": 2, "updated": 0, "unchanged": 0}
+	assert conn.execute("SELECT Capacity FROM minor_league_teams WHERE Team = ?", (first[0],)).fetchone() == (9999,)
+
+def test_unchanged_rows_keep_updated_on(conn):
+	upsert(conn, ROWS)
+	backdate(conn)
+	upsert(conn, [ROWS[0][:4] + (8000, ROWS[0][5])] + ROWS[1:])
+	after = stamps(conn)
+	assert after[ROWS[0][0]] != SENTINEL
+	assert after[ROWS[1][0]] == SENTINEL and after[ROWS[2][0]] == SENTINEL
+	assert conn.execute("SELECT COUNT(*) FROM audit").fetchone() == (1,) # Unchanged rows are never rewritten
+
+def test_trigger_stamps_once(conn):
+	upsert(conn, ROWS)
+	backdate(conn)
+	# bulk_upsert sets updated_on itself, so the WHEN clause keeps the trigger from updating the row a second time
+	upsert(conn, [ROWS[0][:4] + (8000, ROWS[0][5])])
+	assert conn.execute("SELECT COUNT(*) FROM audit").fetchone() == (1,)
+
+	# A plain UPDATE that leaves updated_on alone is stamped by the trigger: one extra write, not a loop
+	backdate(conn)
+	conn.execute("UPDATE minor_league_teams SET Stadium = 'Canal Park II' WHERE Team = ?", (ROWS[0][0],))
+	assert stamps(conn)[ROWS[0][0]] != SENTINEL
+	assert conn.execute("SELECT COUNT(*) FROM audit").fetchone() == (2,)
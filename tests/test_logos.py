@@ -0,0 +1,62 @@
+'''
+Docstring for tests.test_logos
+
+collect_logos against the local StubSite: cold run, unchanged refresh (all 304) and a partial re-color.
+'''
+
+# Imports
+import threading
+from http.server import ThreadingHTTPServer
+import pytest
+from bs4 import BeautifulSoup
+from benchmarks.synth import StubSite
+from src.collect.logos import collect_logos, LogoStore
+from src.utils.transport import Transport
+
+# Constants
+N_TEAMS, N_UNIQUE, N_CHANGED = 12, 5, 2 # Teams share logos modulo N_UNIQUE
+
+# Functions
+@pytest.fixture
+def site():
+	site = StubSite(N_TEAMS, N_UNIQUE)
+	server = ThreadingHTTPServer(("127.0.0.1", 0), site.handler())
+	threading.Thread(target=server.serve_forever, daemon=True).start()
+	site.base = f"http://127.0.0.1:{server.server_address[1]}"
+	site.transport = Transport(policies={"127.0.0.1": (500, 50)})
+	yield site
+	server.shutdown()
+	server.server_close()
+	site.transport.close()
+
+def test_cold_refresh_and_recolor(site, tmp_path):
+	paths = {"club_html_path": str(tmp_path / "club"), "raw_path": str(tmp_path / "logos"),
+			"pack_path": str(tmp_path / "logos.pack"), "index_path": str(tmp_path / "logos_index.json")}
+	teams_soup = BeautifulSoup(site.transport.get(site.base + "/teams").text, "html.parser")
+	def run():
+		site.image_hits, site.served = 0, {}
+		return collect_logos(teams_soup, teams_page_url=site.base + "/teams", transport=site.transport, **paths)
+
+	counts = run()
+	assert site.served == {k: 1 for k in range(N_UNIQUE)} # Each unique image downloaded exactly once
+	assert counts["downloaded"] == N_UNIQUE and counts["rendered"] == N_UNIQUE
+	assert counts["teams"] == counts["with_logo"] == N_TEAMS and counts["unique_images"] == N_UNIQUE
+
+	counts = run()
+	assert counts["not_modified"] == N_UNIQUE and counts["downloaded"] == 0 and counts["rendered"] == 0
+	assert site.image_hits == 0
+
+	before = LogoStore(paths["pack_path"], paths["index_path"])
+	unchanged_team = next(t for t in before.teams() if t.endswith(f" {N_UNIQUE - 1}"))
+	unchanged_thumb = before.get(unchanged_team)
+	before.close()
+	for k in range(N_CHANGED):
+		site.versions[k] += 1
+	counts = run()
+	assert site.served == {k: 1 for k in range(N_CHANGED)}
+	assert counts["downloaded"] == N_CHANGED and counts["rendered"] == N_CHANGED
+	assert counts["not_modified"] == N_UNIQUE - N_CHANGED and counts["unique_images"] == N_UNIQUE
+
+	store = LogoStore(paths["pack_path"], paths["index_path"])
+	assert len(store.teams()) == N_TEAMS and store.get(unchanged_team) == unchanged_thumb
+	store.close()
@@ -0,0 +1,77 @@
+'''
+Docstring for tests.test_modeling_table
+
+build_modeling_table on a small real-schema database: text csa, deleted seasons, --full and --verify.
+'''
+
+# Imports
+import os, sqlite3
+import pandas as pd
+import pytest
+from src.clean.clean_cities import CREATE_TABLE_SQL as CREATE_CITIES_SQL, ADDED_COLUMNS
+from src.database.load_db import ensure_columns
+from src.database.schema import ensure_team_history
+from src.features.modeling_table import build_modeling_table, verify_modeling_table, seasons_on_disk, CITY_FEATURE_COLUMNS
+
+# Functions
+@pytest.fixture
+def paths(tmp_path):
+	db_path = str(tmp_path / "milb.sqlite")
+	conn = sqlite3.connect(db_path)
+	conn.execute(CREATE_CITIES_SQL)
+	ensure_columns(conn, "cities", ADDED_COLUMNS)
+	ensure_team_history(conn)
+	conn.executemany("INSERT INTO cities (city, state, metro, csa, pop_max, year_founded_min) VALUES (?, ?, ?, ?, ?, ?)", [
+		("Akron", "Ohio", "Akron", "Cleveland–Akron–Canton", 190000.0, 1825), # Infobox text, as clean_cities stores it
+		("Toledo", "Ohio", "Toledo", 534, 270000.0, 1833),
+	])
+	conn.executemany("INSERT INTO team_history (season, Team, City, State, League) VALUES (?, ?, ?, ?, ?)", [
+		(season, team, city, "Ohio", "Eastern League")
+		for season in (2000, 2001, 2002) for team, city in (("Akron RubberDucks", "Akron"), ("Toledo Mud Hens", "Toledo"))
+	])
+	conn.commit()
+	conn.close()
+	return {"db_path": db_path, "panel_path": str(tmp_path / "no_panel.parquet"), "output_path": str(tmp_path / "modeling_table.parquet"),
+			"cbsa_cache_path": str(tmp_path / "acs5")}
+
+def delete_season(db_path, season):
+	conn = sqlite3.connect(db_path)
+	conn.execute("DELETE FROM team_history WHERE season = ?", (season,))
+	conn.commit()
+	conn.close()
+
+def test_text_csa_builds(paths):
+	report = build_modeling_table(**paths)
+	assert report["built"] == [2000, 2001, 2002]
+	df = pd.read_parquet(paths["output_path"])
+	assert len(df) == 6
+	assert set(df["csa"].astype(str)) == {"Cleveland–Akron–Canton", "534"}
+	assert set(CITY_FEATURE_COLUMNS) <= set(df.columns)
+	assert set(df["year_founded_min"].astype(int)) == {1825, 1833}
+	assert verify_modeling_table(**paths)["ok"]
+
+def test_incremental_matches_full_rebuild(paths):
+	build_modeling_table(**paths)
+	conn = sqlite3.connect(paths["db_path"])
+	conn.execute("UPDATE team_history SET Stadium = 'Canal Park' WHERE season = 2001 AND City = 'Akron'")
+	conn.commit()
+	conn.close()
+	report = build_modeling_table(**paths)
+	assert report["built"] == [2001] and report["unchanged"] == [2000, 2002]
+	assert verify_modeling_table(**paths)["ok"]
+
+@pytest.mark.parametrize("full", [False, True])
+def test_deleted_season_is_removed(paths, full):
+	build_modeling_table(**paths)
+	delete_season(paths["db_path"], 2000)
+	report = build_modeling_table(**paths, full=full)
+	assert report["removed"] == [2000]
+	assert seasons_on_disk(paths["output_path"]) == [2001, 2002]
+	assert sorted(pd.read_parquet(paths["output_path"])["season"].astype(int).unique()) == [2001, 2002]
+	assert verify_modeling_table(**paths)["ok"]
+
+def test_verify_reports_stale_partition_on_disk(paths):
+	build_modeling_table(**paths)
+	delete_season(paths["db_path"], 2000) # Not rebuilt: season=2000/ is still on disk
+	report = verify_modeling_table(**paths)
+	assert not report["ok"] and report["extra"] == [2000]
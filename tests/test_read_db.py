@@ -0,0 +1,64 @@
+'''
+Docstring for tests.test_read_db
+
+read_db on a small database: cached reads are invalidated by commits from other connections (PRAGMA data_version),
+and every lookup returns the same frame type.
+'''
+
+# Imports
+import sqlite3
+import pandas as pd
+import pyarrow as pa
+import pytest
+from src.clean.clean_cities import CREATE_TABLE_SQL as CREATE_CITIES_SQL, ADDED_COLUMNS
+from src.database import read_db
+from src.database.load_db import ensure_columns
+from src.database.schema import ensure_team_history
+
+# Functions
+@pytest.fixture
+def db_path(tmp_path):
+	db_path = str(tmp_path / "milb.sqlite")
+	conn = sqlite3.connect(db_path)
+	conn.execute(CREATE_CITIES_SQL)
+	ensure_columns(conn, "cities", ADDED_COLUMNS)
+	conn.executemany("INSERT INTO cities (city, state, pop_max, latitude, longitude) VALUES (?, ?, ?, ?, ?)", [
+		("Akron", "Ohio", 190000.0, 41.08, -81.52),
+		("Canton", "Ohio", 70000.0, 40.80, -81.38),
+		("Toledo", "Ohio", 270000.0, 41.66, -83.56),
+		("Nowhere", "Ohio", None, None, None),
+	])
+	conn.execute("CREATE TABLE minor_league_teams (id INTEGER PRIMARY KEY, Team TEXT, League TEXT, City TEXT, State TEXT)")
+	conn.executemany("INSERT INTO minor_league_teams (Team, League, City, State) VALUES (?, 'Eastern League', ?, 'Ohio')",
+					[("Toledo Mud Hens", "Toledo"), ("Canton Team", "Canton"), ("Akron RubberDucks", "Akron"), ("Ghosts", "Nowhere")])
+	ensure_team_history(conn)
+	conn.commit()
+	conn.close()
+	yield db_path
+	read_db.get_reader(db_path).close()
+	read_db._READERS.pop(db_path, None)
+
+def test_commit_from_another_connection_invalidates_cache(db_path):
+	first = read_db.get_city_features([1], db_path=db_path)
+	assert first["pop_max"].tolist() == [190000.0]
+	assert read_db.get_city_features([1], db_path=db_path) is first # Unchanged database: served from cache
+
+	writer = sqlite3.connect(db_path)
+	writer.execute("UPDATE cities SET pop_max = 200000 WHERE id = 1")
+	writer.commit()
+	writer.close()
+	assert read_db.get_city_features([1], db_path=db_path)["pop_max"].tolist() == [200000.0]
+
+def test_lookups_return_arrow_backed_frames(db_path):
+	frames = [read_db.get_city_features([1, 2], db_path=db_path), read_db.get_team_history([1], db_path=db_path),
+			read_db.teams_in_radius(41.08, -81.52, 50, db_path=db_path)]
+	for df in frames:
+		assert isinstance(df, pd.DataFrame)
+		assert all(isinstance(dtype, pd.ArrowDtype) for dtype in df.dtypes)
+
+def test_teams_in_radius_nearest_first(db_path):
+	df = read_db.teams_in_radius(41.08, -81.52, 50, db_path=db_path)
+	assert df["Team"].tolist() == ["Akron RubberDucks", "Canton Team"] # Toledo is ~110 miles away; Nowhere has no coordinates
+	assert df["distance_mi"].tolist()[0] == pytest.approx(0.0)
+	table = read_db.teams_in_radius(41.08, -81.52, 50, db_path=db_path, as_arrow=True)
+	assert isinstance(table, pa.Table) and table.column_names == list(df.columns)
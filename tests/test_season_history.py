@@ -0,0 +1,52 @@
+'''
+Docstring for tests.test_season_history
+
+A changed season page replaces its previous ingest: teams it no longer lists leave team_history.
+'''
+
+# Imports
+import random, sqlite3
+from benchmarks.synth import synth_season_page
+from src.clean.season_history import ingest_season_pages
+
+# Constants
+OLD_STAMP, NEW_STAMP = "20240101_000000", "20250101_000000"
+
+# Functions
+def write_page(folder, html, stamp=OLD_STAMP):
+	with open(folder / f"wiki_2005_international_league_season_{stamp}.html", "w", encoding="utf-8-sig") as f:
+		f.write(html)
+
+def teams(db_path):
+	conn = sqlite3.connect(db_path)
+	rows = conn.execute("SELECT Team FROM team_history WHERE season = 2005 AND League = 'International League' ORDER BY Team").fetchall()
+	conn.close()
+	return [row[0] for row in rows]
+
+def setup_page(tmp_path):
+	html_path = tmp_path / "season"
+	html_path.mkdir()
+	html = synth_season_page(random.Random(0), 2005, "International League", "standard", n_teams=4)
+	write_page(html_path, html)
+	db_path = str(tmp_path / "milb.sqlite")
+	counts = ingest_season_pages(db_path=db_path, html_path=str(html_path), max_workers=0)
+	assert counts["inserted"] == 4
+	old_team = teams(db_path)[0]
+	return html_path, db_path, html, old_team
+
+def test_changed_page_drops_teams_it_no_longer_lists(tmp_path):
+	html_path, db_path, html, old_team = setup_page(tmp_path)
+	write_page(html_path, html.replace(old_team, "Renamed Club"))
+	counts = ingest_season_pages(db_path=db_path, html_path=str(html_path), max_workers=0)
+	assert counts["pages"] == 1 and counts["inserted"] == 1 and counts["removed"] == 1
+	assert len(teams(db_path)) == 4 and "Renamed Club" in teams(db_path) and old_team not in teams(db_path)
+
+def test_newer_snapshot_replaces_older_one(tmp_path):
+	html_path, db_path, html, old_team = setup_page(tmp_path)
+	write_page(html_path, html.replace(old_team, "Renamed Club"), stamp=NEW_STAMP)
+	counts = ingest_season_pages(db_path=db_path, html_path=str(html_path), max_workers=0)
+	assert counts["removed"] == 1 and old_team not in teams(db_path) and len(teams(db_path)) == 4
+	conn = sqlite3.connect(db_path)
+	assert conn.execute("SELECT file_name FROM season_pages").fetchall() == [(f"wiki_2005_international_league_season_{NEW_STAMP}.html",)]
+	conn.close()
+	assert ingest_season_pages(db_path=db_path, html_path=str(html_path), max_workers=0)["skipped"] == 1
@@ -0,0 +1,80 @@
+'''
+Docstring for tests.test_team_names
+
+The column-wise name pass matches get_mascot_name, its derived columns reach the database, and names stored before
+the pass (footnote markers) are cleaned in place instead of duplicated.
+'''
+
+# Imports
+import random, sqlite3
+import pandas as pd
+from benchmarks.bench_names import synth_names
+from src.clean.clean_teams import get_mascot_name, upsert_minor_league_teams, snapshot_team_history, CREATE_TABLE_SQL
+from src.clean.team_names import derive_mascots, normalize_team_names
+from src.database.schema import CREATE_TEAM_HISTORY_SQL
+
+# Functions
+def test_mascots_match_get_mascot_name():
+	df = pd.concat([synth_names(5000, 500, seed=3), pd.DataFrame({
+		"Team": ["Hawks", "Toledo Mud Hens", "Mud Hens", "Akron", "New York Yankees", "St. Paul Saints", " Blue  Rocks "],
+		"City": ["Boise", "Toledo", "Toledo", "Akron", "Staten Island", "St. Paul", "Wilmington"],
+	})], ignore_index=True)
+	expected = df.apply(get_mascot_name, axis=1).tolist()
+	assert list(derive_mascots(df["Team"].to_numpy(dtype=object), df["City"].to_numpy(dtype=object))) == expected
+
+def test_normalize_cleans_and_fingerprints():
+	df = normalize_team_names(pd.DataFrame({"Team": ["Akron RubberDucks[a]", "Akron  RubberDucks", "akron rubberducks*", "RubberDucks"],
+											"City": ["Akron", "Akron", "AKRON", "Akron"]}))
+	assert df["Team"].tolist()[:2] == ["Akron RubberDucks", "Akron RubberDucks"]
+	assert df["Mascot"].tolist() == ["RubberDucks", "RubberDucks", "rubberducks", "RubberDucks"]
+	assert df["HasCityPrefix"].tolist() == [True, True, False, False]
+	assert df["TeamFingerprint"].nunique() == 2 and df["TeamFingerprint"].iloc[0] == df["TeamFingerprint"].iloc[2]
+
+def teams_frame(team):
+	return pd.DataFrame([{"Team": team, "City": "Akron", "League": "Eastern League", "Division": "Southwest", "State": "Ohio",
+						"Stadium": "Canal Park", "Capacity": 7630, "Affiliate": "Cleveland Guardians", "TableIndex": 1}])
+
+def legacy_db(path, rows):
+	'''A database written before the name pass: no HasCityPrefix/TeamFingerprint columns, raw names.'''
+	conn = sqlite3.connect(path)
+	conn.execute(CREATE_TABLE_SQL.replace("HasCityPrefix INTEGER,", "").replace("TeamFingerprint INTEGER,", ""))
+	conn.execute(CREATE_TEAM_HISTORY_SQL.replace("HasCityPrefix INTEGER,", "").replace("TeamFingerprint INTEGER,", ""))
+	for team in rows:
+		conn.execute("INSERT INTO minor_league_teams (Team, City, League) VALUES (?, 'Akron', 'Eastern League')", (team,))
+		team_id = conn.execute("SELECT id FROM minor_league_teams WHERE Team = ?", (team,)).fetchone()[0]
+		conn.execute("INSERT INTO team_history (season, team_id, Team, City, League) VALUES (2023, ?, ?, 'Akron', 'Eastern League')", (team_id, team))
+	conn.commit()
+	conn.close()
+
+def test_derived_columns_are_stored(tmp_path):
+	db_path = str(tmp_path / "milb.sqlite")
+	upsert_minor_league_teams(normalize_team_names(teams_frame("Akron RubberDucks[a]")), db_path=db_path)
+	snapshot_team_history(db_path=db_path, season=2024)
+	conn = sqlite3.connect(db_path)
+	expected = int(normalize_team_names(teams_frame("Akron RubberDucks"))["TeamFingerprint"].iloc[0])
+	assert conn.execute("SELECT Team, Mascot, HasCityPrefix, TeamFingerprint FROM minor_league_teams").fetchall() == [
+		("Akron RubberDucks", "RubberDucks", 1, expected)]
+	assert conn.execute("SELECT season, Team, HasCityPrefix, TeamFingerprint FROM team_history").fetchall() == [
+		(2024, "Akron RubberDucks", 1, expected)]
+	conn.close()
+
+def test_stored_footnote_names_are_migrated(tmp_path):
+	db_path = str(tmp_path / "milb.sqlite")
+	legacy_db(db_path, ["Akron RubberDucks[a]"])
+	upsert_minor_league_teams(normalize_team_names(teams_frame("Akron RubberDucks[a]")), db_path=db_path)
+	snapshot_team_history(db_path=db_path, season=2024)
+	conn = sqlite3.connect(db_path)
+	assert conn.execute("SELECT id, Team, TeamFingerprint IS NOT NULL FROM minor_league_teams").fetchall() == [(1, "Akron RubberDucks", 1)]
+	assert conn.execute("SELECT season, team_id, Team FROM team_history ORDER BY season").fetchall() == [
+		(2023, 1, "Akron RubberDucks"), (2024, 1, "Akron RubberDucks")]
+	conn.close()
+
+def test_duplicate_rows_from_earlier_runs_are_merged(tmp_path):
+	db_path = str(tmp_path / "milb.sqlite")
+	legacy_db(db_path, ["Akron RubberDucks[a]", "Akron RubberDucks"]) # Old row plus the cleaned one a later run inserted
+	upsert_minor_league_teams(normalize_team_names(teams_frame("Akron RubberDucks")), db_path=db_path)
+	snapshot_team_history(db_path=db_path, season=2023)
+	conn = sqlite3.connect(db_path)
+	assert conn.execute("SELECT id, Team FROM minor_league_teams").fetchall() == [(2, "Akron RubberDucks")]
+	assert conn.execute("SELECT season, team_id, Team FROM team_history").fetchall() == [(2023, 2, "Akron RubberDucks")]
+	conn.close()
@@ -0,0 +1,134 @@
+'''
+Docstring for tests.test_transport
+
+Transport against a local http.server stub: Retry-After, shared host backoff, retry limits, connection errors and
+gather_get ordering.
+'''
+
+# Imports
+import asyncio, email.utils, socket, threading, time
+import datetime as dt
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import requests
+from src.utils.transport import Transport, TokenBucket
+
+# Constants
+HOST = "127.0.0.1"
+FAST = {HOST: (1000, 1000)} # The stub is never the bottleneck unless a test penalizes it
+
+# Classes
+class Stub:
+	'''
+	/limited     429 with Retry-After: 1 on the first hit, then 200
+	/unavailable always 503
+	/flaky       drops the connection on the first hit, then 200
+	/sleep/<ms>  200 with the path as body, after <ms> milliseconds
+	'''
+	def __init__(self):
+		self.hits = {}
+		self.arrivals = {}
+		self.limited_at = None
+		self.limited = threading.Event()
+		self.lock = threading.Lock()
+
+	def handler(self):
+		stub = self
+		class Handler(BaseHTTPRequestHandler):
+			def log_message(self, *args):
+				pass
+			def send(self, status, body=b"", headers=None):
+				self.send_response(status)
+				self.send_header("Content-Length", str(len(body)))
+				for key, value in (headers or {}).items():
+					self.send_header(key, value)
+				self.end_headers()
+				self.wfile.write(body)
+			def do_GET(self):
+				with stub.lock:
+					hit = stub.hits[self.path] = stub.hits.get(self.path, 0) + 1
+					stub.arrivals.setdefault(self.path, []).append(time.monotonic())
+				if self.path == "/limited" and hit == 1:
+					stub.limited_at = time.monotonic()
+					self.send(429, headers={"Retry-After": "1"})
+					stub.limited.set()
+					return
+				if self.path == "/unavailable":
+					return self.send(503)
+				if self.path == "/flaky" and hit == 1:
+					self.close_connection = True # No response at all: the client sees a ConnectionError
+					return
+				if self.path.startswith("/sleep/"):
+					time.sleep(int(self.path.rsplit("/", 1)[1]) / 1000)
+				self.send(200, self.path.encode())
+		return Handler
+
+# Functions
+@pytest.fixture
+def stub():
+	stub = Stub()
+	server = ThreadingHTTPServer((HOST, 0), stub.handler())
+	thread = threading.Thread(target=server.serve_forever, daemon=True)
+	thread.start()
+	stub.url = f"http://{HOST}:{server.server_address[1]}"
+	yield stub
+	server.shutdown()
+	server.server_close()
+
+def closed_port_url():
+	with socket.socket() as s:
+		s.bind((HOST, 0))
+		return f"http://{HOST}:{s.getsockname()[1]}/"
+
+def test_token_bucket_burst_then_rate():
+	bucket = TokenBucket(rate=10, burst=2)
+	assert bucket.reserve() == 0 and bucket.reserve() == 0
+	assert bucket.reserve() == pytest.approx(0.1, abs=0.02)
+	bucket.penalize(1.0)
+	assert bucket.reserve() == pytest.approx(1.1, abs=0.02)
+
+def test_retry_after_seconds_and_http_date():
+	transport = Transport(policies=FAST, backoff_base=0.01)
+	response = requests.Response()
+	response.headers["Retry-After"] = "3"
+	assert transport._retry_delay(response, 0) == 3
+	response.headers["Retry-After"] = email.utils.format_datetime(dt.datetime.now(dt.timezone.utc) + dt.timedelta(seconds=30), usegmt=True)
+	assert 28 <= transport._retry_delay(response, 0) <= 30
+	response.headers["Retry-After"] = "soon"
+	assert transport._retry_delay(response, 0) < 0.03 # Unparseable: normal backoff
+
+def test_429_waits_retry_after_and_holds_back_other_callers(stub):
+	transport = Transport(policies=FAST)
+	results = {}
+	first = threading.Thread(target=lambda: results.update(limited=transport.get(stub.url + "/limited")))
+	first.start()
+	assert stub.limited.wait(5)
+	time.sleep(0.2) # Let the first caller read the 429 and penalize the host
+	other = transport.get(stub.url + "/sleep/0")
+	first.join()
+	assert results["limited"].status_code == 200 and stub.hits["/limited"] == 2
+	assert stub.arrivals["/limited"][1] - stub.limited_at >= 0.9
+	assert stub.arrivals["/sleep/0"][0] - stub.limited_at >= 0.9 # Same host, different caller: also waited
+	assert other.status_code == 200
+
+def test_retries_stop_at_max_retries(stub):
+	transport = Transport(policies=FAST, max_retries=2, backoff_base=0.01)
+	response = transport.get(stub.url + "/unavailable")
+	assert response.status_code == 503 and stub.hits["/unavailable"] == 3
+
+def test_connection_errors_are_retried(stub):
+	transport = Transport(policies=FAST, max_retries=2, backoff_base=0.01)
+	response = transport.get(stub.url + "/flaky")
+	assert response.status_code == 200 and stub.hits["/flaky"] == 2
+	with pytest.raises(requests.exceptions.ConnectionError):
+		transport.get(closed_port_url())
+
+def test_gather_get_keeps_input_order(stub):
+	transport = Transport(policies=FAST, max_retries=0)
+	urls = [stub.url + f"/sleep/{ms}" for ms in (300, 0, 150)] + [closed_port_url()]
+	start = time.monotonic()
+	results = asyncio.run(transport.gather_get(urls))
+	elapsed = time.monotonic() - start
+	assert [r.text for r in results[:3]] == ["/sleep/300", "/sleep/0", "/sleep/150"]
+	assert isinstance(results[3], requests.exceptions.ConnectionError)
+	assert elapsed < 0.45 # Concurrent: one after another would take at least 0.45s